@@ -1 +1,6 @@
-from .load import main
\ No newline at end of file
+def __getattr__(name: str):
+    # Maya is only loaded once the tool is opened, so `core` can be imported on its own
+    if name == 'main':
+        from .load import main
+        return main
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
@@ -0,0 +1,68 @@
+from maya import cmds
+import numpy as np
+from typing import List
+from .core import *
+from .core import animation
+
+"""
+Bakes the bind skeletons of one or more characters to keyframes, for game export and cache handoff.
+
+All bind joints are sampled in a single sweep over the frame range, one block of frames at a time.
+Each block is decomposed into channels with NumPy and optionally simplified. Once the sweep is done, the joints'
+constraints are replaced with one new animation curve per channel, all through cmds so the bake can be undone.
+"""
+
+def bake(bind_groups: List[str] = None, start: float = None, end: float = None, step: float = 1.0, simplify: bool = True) -> int:
+    """Bakes the joints under `bind_groups`, or the active character's bind group, over the playback range.
+    Returns the number of keys written."""
+    bind_groups = bind_groups or [naming.bind_grp]
+    if start is None:
+        start = cmds.playbackOptions(q=True, min=True)
+    if end is None:
+        end = cmds.playbackOptions(q=True, max=True)
+    bind_joints = [joint for grp in bind_groups for joint in cmds.listRelatives(grp, ad=True, type='joint', fullPath=True) or []]
+    if not bind_joints:
+        raise Exception("No bind joints under " + ', '.join(bind_groups))
+    unsupported = [joint for joint in bind_joints if attributes.get(joint, 'rotateOrder') != 0]
+    if unsupported:
+        raise Exception("Only the xyz rotate order can be baked: " + ', '.join(unsupported))
+
+    orients = animation.rotation_xyz(np.radians([attributes.get(joint, 'jointOrient') for joint in bind_joints]))
+    compensated = np.array([bool(attributes.get(joint, 'segmentScaleCompensate')) for joint in bind_joints])
+    plugs = [naming.attr_path(joint, channel) for joint in bind_joints for channel in animation.CHANNELS]
+    # The kept times and values of each plug, one pair of arrays per block
+    blocks = [([], []) for _ in plugs]
+    keys = 0
+    previous = None
+    with trace.span('bake', joints=len(bind_joints)), animation.suspended():
+        for times, matrices, inverse_scales in animation.sweep(
+                [naming.attr_path(joint, 'matrix') for joint in bind_joints],
+                animation.frames(start, end, step),
+                vectors=[naming.attr_path(joint, 'inverseScale') for joint in bind_joints]):
+            # With segment scale compensation, the matrix ends in the parent's inverse scale, which Maya applies again
+            # on top of the baked channels, so it is taken back out before decomposing
+            inverse_scales[..., ~compensated, :] = 1
+            inverse_scales[inverse_scales == 0] = 1
+            matrices[..., :3, :3] /= inverse_scales[..., np.newaxis, :]
+            values = animation.channels(matrices, orients)
+            values[..., 3:6] = animation.unwrap(values[..., 3:6], previous)
+            previous = values[-1, :, 3:6]
+            for j in range(len(bind_joints)):
+                for c in range(len(animation.CHANNELS)):
+                    series = values[:, j, c]
+                    keep = animation.simplify(times, series, animation.TOLERANCES[c]) if simplify else slice(None)
+                    kept_times, kept_values = blocks[j * len(animation.CHANNELS) + c]
+                    kept_times.append(times[keep])
+                    kept_values.append(series[keep])
+                    keys += len(times[keep])
+
+    constraints = [node for grp in bind_groups for node in cmds.listRelatives(grp, ad=True, type='constraint') or []]
+    if constraints:
+        cmds.delete(constraints)
+    cmds.cutKey(bind_joints, at=animation.CHANNELS, clear=True)
+    for i, (plug, (kept_times, kept_values)) in enumerate(zip(plugs, blocks)):
+        type_ = animation.CURVE_TYPES[i % len(animation.CHANNELS)]
+        curve = animation.create_curve(type_, plug, np.concatenate(kept_times), np.concatenate(kept_values))
+        cmds.connectAttr(naming.attr_path(curve, 'output'), plug)
+    print("Baked {0} joints over frames {1} to {2} with {3} keys".format(len(bind_joints), start, end, keys))
+    return keys
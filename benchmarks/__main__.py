@@ -0,0 +1,23 @@
+"""
+Runs the regression benchmarks outside of Maya's script editor:
+
+    python MayaRig/benchmarks [scene ...] [--save-baseline]
+
+Uses mayapy's Maya when there is one, and the stand-in `maya` package otherwise.
+"""
+
+import importlib
+import os
+import sys
+
+benchmarks = os.path.dirname(os.path.abspath(__file__))
+package = os.path.dirname(benchmarks)
+sys.path.insert(0, os.path.dirname(package))
+try:
+    import maya.standalone
+    maya.standalone.initialize()
+except ImportError:
+    sys.path.insert(0, os.path.join(benchmarks, 'standin'))
+
+regression = importlib.import_module(os.path.basename(package) + '.benchmarks.regression')
+sys.exit(regression.main())
@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import platform
+import time
+from collections import Counter
+from contextlib import contextmanager
+from maya import cmds
+from typing import Dict, List
+from ..core import *
+from .. import editor
+from . import scenes
+
+"""
+Builds the reference scenes through `editor.create_metarig` and flags changes that make builds more expensive.
+
+Every run records build time, scene command calls and generated nodes per scene in a local history file,
+and is compared against a stored baseline. From inside Maya:
+
+    from MayaRig.benchmarks import regression
+    regression.run()
+
+The scenes are built in new scenes, so save your work first, or pass `force=True` to discard it.
+
+Without Maya, run the package's benchmarks folder with Python to build against the stand-in `maya` package:
+
+    python MayaRig/benchmarks --save-baseline
+
+Timings against the stand-in only cover the Python side of a build, but call and node counts match Maya's.
+"""
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+HISTORY = os.environ.get('MAYARIG_BENCH_HISTORY', os.path.join(DIRECTORY, 'history.jsonl'))
+BASELINE = os.environ.get('MAYARIG_BENCH_BASELINE', os.path.join(DIRECTORY, 'baseline.json'))
+REPEAT = 3
+
+# Largest allowed ratio to the baseline for each metric
+THRESHOLDS = {'seconds': 1.5, 'calls': 1.1, 'nodes': 1.1}
+
+def measure(scene: str, repeat: int = REPEAT, force=False) -> dict:
+    """Builds a reference scene `repeat` times, and returns its fastest build time and its command and node counts.
+    Each build replaces the open scene, so unsaved changes stop it unless `force` is set."""
+    if not force and cmds.file(q=True, modified=True):
+        raise Exception("The open scene has unsaved changes; save it first or run with force=True")
+    times = []
+    for _ in range(repeat):
+        cmds.file(new=True, force=True)
+        scenes.SCENES[scene]()
+        before = set(cmds.ls())
+        trace.enable()
+        with _counting() as calls:
+            start = time.perf_counter()
+            editor.create_metarig({generator.name: generator for generator in editor.GENERATORS})
+            times.append(time.perf_counter() - start)
+        trace.disable()
+    created = [node for node in cmds.ls() if node not in before]
+    stages = Counter()
+    for event in trace.events():
+        if event['cat'] == 'build':
+            stages[event['name'].split('.')[-1]] += event['dur'] / 1e6
+    return dict(
+        seconds=min(times),
+        calls=sum(calls.values()),
+        nodes=len(created),
+        stages=dict(stages),
+        commands=dict(calls.most_common()),
+        node_types=dict(Counter(cmds.nodeType(node) for node in created).most_common()),
+    )
+
+def run(scene_names: List[str] = None, repeat: int = REPEAT, history: str = HISTORY, baseline: str = BASELINE, thresholds: Dict[str, float] = None, save_baseline=False, force=False) -> List[str]:
+    """Measures the reference scenes, records them in `history`, and returns any regressions against `baseline`.
+    With `force`, unsaved changes to the open scene are discarded."""
+    scene_names = scene_names or list(scenes.SCENES)
+    results = {name: measure(name, repeat, force=force or i > 0) for i, name in enumerate(scene_names)}
+    record = dict(
+        time=time.strftime('%Y-%m-%dT%H:%M:%S'),
+        host=platform.node(),
+        environment=environment(),
+        results=results
+    )
+    with open(history, 'a') as file:
+        file.write(json.dumps(record) + '\n')
+
+    regressions = []
+    if os.path.exists(baseline):
+        with open(baseline) as file:
+            regressions = compare(record, json.load(file), thresholds)
+    _report(results, regressions)
+    if save_baseline:
+        with open(baseline, 'w') as file:
+            json.dump(record, file, indent=2, sort_keys=True)
+        print('Saved baseline to', baseline)
+    return regressions
+
+def compare(record: dict, baseline: dict, thresholds: Dict[str, float] = None) -> List[str]:
+    """Returns a description of every metric that grew past its threshold since the baseline"""
+    thresholds = dict(THRESHOLDS, **(thresholds or dict()))
+    if record['environment'] != baseline['environment']:
+        print("Baseline was measured in {0}, skipping comparison".format(baseline['environment']))
+        return []
+    ret = []
+    for scene, result in record['results'].items():
+        previous = baseline['results'].get(scene)
+        if not previous:
+            continue
+        for metric, threshold in thresholds.items():
+            if previous[metric] > 0 and result[metric] / previous[metric] > threshold:
+                ret.append("{0}: {1} went from {2:.4g} to {3:.4g} ({4:.2f}x, limit {5:.2f}x)".format(
+                    scene, metric, previous[metric], result[metric], result[metric] / previous[metric], threshold))
+    return ret
+
+def environment() -> str:
+    if getattr(cmds, 'STANDIN', False):
+        return 'standin'
+    return 'maya ' + cmds.about(version=True)
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark rig builds of the reference scenes")
+    parser.add_argument('scenes', nargs='*', help="scenes to build, defaults to all of: " + ', '.join(scenes.SCENES))
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="builds per scene, the fastest one is kept")
+    parser.add_argument('--history', default=HISTORY)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the new baseline")
+    parser.add_argument('--force', action='store_true', help="discard unsaved changes to the open scene")
+    parser.add_argument('--threshold', action='append', default=[], metavar='METRIC=RATIO', help="override a regression threshold, e.g. seconds=2")
+    args = parser.parse_args(argv)
+    for scene in args.scenes:
+        if scene not in scenes.SCENES:
+            parser.error("unknown scene " + scene)
+
+    thresholds = dict()
+    for threshold in args.threshold:
+        metric, _, ratio = threshold.partition('=')
+        if metric not in THRESHOLDS:
+            parser.error("unknown metric " + metric)
+        thresholds[metric] = float(ratio)
+    regressions = run(args.scenes, args.repeat, args.history, args.baseline, thresholds, args.save_baseline, args.force)
+    return 1 if regressions else 0
+
+# Helper methods ---------------------------------------------------------------------------------
+
+@contextmanager
+def _counting():
+    """Counts calls to every scene command while active"""
+    calls = Counter()
+    originals = dict()
+    for name in dir(cmds):
+        command = getattr(cmds, name, None)
+        if name.startswith('_') or not callable(command) or isinstance(command, type):
+            continue
+        originals[name] = command
+        setattr(cmds, name, _counted(name, command, calls))
+    try:
+        yield calls
+    finally:
+        for name, command in originals.items():
+            setattr(cmds, name, command)
+
+def _counted(name, command, calls):
+    def counted(*args, **kwargs):
+        calls[name] += 1
+        return command(*args, **kwargs)
+    return counted
+
+def _report(results: dict, regressions: List[str]):
+    print('{0:<14}{1:>10}{2:>10}{3:>10}'.format('scene', 'seconds', 'calls', 'nodes'))
+    for scene, result in results.items():
+        print('{0:<14}{1:>10.3f}{2:>10}{3:>10}'.format(scene, result['seconds'], result['calls'], result['nodes']))
+    for regression in regressions:
+        print('REGRESSION', regression)
@@ -0,0 +1,76 @@
+from maya import cmds
+from typing import Callable, Dict
+from ..core import *
+from ..generators import simple, arm, leg, torso, spine
+
+"""
+Reference characters for the regression benchmarks.
+
+Each scene adds a character's markers to the current, empty, Maya scene through the generators' own marker code.
+"""
+
+CHAIN_LENGTH = 25
+
+def simple_chain():
+    _character('chain', 'CH')
+    selection.clear()
+    root = None
+    for i in range(CHAIN_LENGTH):
+        joint = joints.marker(Side.CENTER, 'joint', (0, 2 * i, 0))
+        if not root:
+            root = joint
+    joints.mark_root(root, simple.name, False)
+    attributes.add_enum(root, 'axis', 'X:Y:Z:', active=1, keyable=True)
+
+def arm_only():
+    _character('arm', 'AR')
+    arm.create_markers(Side.LEFT)
+
+def compact_arm():
+    _character('compactArm', 'CA')
+    arm.create_markers(Side.LEFT, compact_hand=True)
+
+def leg_only():
+    _character('leg', 'LG')
+    leg.create_markers(Side.LEFT)
+
+def fk_torso():
+    _character('torso', 'TO')
+    torso.create_markers('FK')
+
+def spline_spine():
+    _character('spine', 'SP')
+    spine.create_markers(count=8, length=40)
+
+def biped():
+    """A torso with mirrored arms and legs, and a simple neck"""
+    _character('biped', 'BP')
+    torso.create_markers('FK')
+    cmds.parent(arm.create_markers(Side.LEFT), _marker('spine2'))
+    cmds.parent(leg.create_markers(Side.LEFT), _marker('pelvis'))
+
+    selection.set_(_marker('neckBase'))
+    neck = joints.marker(Side.CENTER, 'neck', (0, 38, -5))
+    joints.marker(Side.CENTER, 'head', (0, 46, -3))
+    joints.mark_root(neck, simple.name, False)
+    attributes.add_enum(neck, 'axis', 'X:Y:Z:', active=1, keyable=True)
+
+SCENES: Dict[str, Callable[[], None]] = {
+    'simple_chain': simple_chain,
+    'arm': arm_only,
+    'compact_arm': compact_arm,
+    'leg': leg_only,
+    'torso': fk_torso,
+    'spine': spline_spine,
+    'biped': biped,
+}
+
+# Helper methods ---------------------------------------------------------------------------------
+
+def _character(name: str, initials: str):
+    naming.set_active_character(name, initials)
+    cmds.group(name=naming.marker_grp, em=True)
+    attributes.add(naming.marker_grp, 'initials', initials, 'string', lock=True)
+
+def _marker(name: str) -> str:
+    return naming.compose(Side.CENTER, name, Suffix.marker)
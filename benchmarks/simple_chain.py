@@ -0,0 +1,60 @@
+import time
+from maya import cmds
+from typing import List, Tuple
+from ..core import *
+from ..generators import simple
+from .. import editor
+
+"""
+Times `simple.create_controllers` on chains of increasing length. Run from inside Maya:
+
+    from MayaRig.benchmarks import simple_chain
+    simple_chain.run()
+
+Each length is built in a new scene, so it refuses to run while the open scene has unsaved changes,
+unless `force` is set.
+"""
+
+LENGTHS = (10, 50, 100, 250, 500, 1000)
+
+def run(lengths=LENGTHS, force=False) -> List[Tuple[int, float]]:
+    """Returns (chain length, seconds) pairs, and prints the cost per joint for each length.
+    With `force`, unsaved changes to the open scene are discarded."""
+    if not force and cmds.file(q=True, modified=True):
+        raise Exception("The open scene has unsaved changes; save it first or run with force=True")
+    results = []
+    for length in lengths:
+        cmds.file(new=True, force=True)
+        chain = _create_chain(length)
+
+        start = time.perf_counter()
+        simple.create_controllers(chain)
+        elapsed = time.perf_counter() - start
+
+        results.append((length, elapsed))
+        print('{0:>5} joints: {1:8.3f} s, {2:6.3f} ms per joint'.format(length, elapsed, 1000 * elapsed / length))
+    first_length, first_time = results[0]
+    last_length, last_time = results[-1]
+    print('Cost per joint grew {0:.2f}x from {1} to {2} joints'.format(
+        (last_time / last_length) / (first_time / first_length), first_length, last_length))
+    return results
+
+def _create_chain(length: int) -> List[str]:
+    """Creates a straight simple chain of `length` markers, and returns its driver joints"""
+    naming.set_active_character('benchmark', 'BM')
+    cmds.group(name=naming.marker_grp, em=True)
+    attributes.add(naming.marker_grp, 'initials', 'BM', 'string', lock=True)
+
+    selection.clear()
+    root = None
+    for i in range(length):
+        joint = joints.marker(Side.CENTER, 'joint', (0, 2 * i, 0))
+        if not root:
+            root = joint
+    joints.mark_root(root, simple.name, False)
+    attributes.add_enum(root, 'axis', 'X:Y:Z:', active=1, keyable=True)
+
+    editor.create_rig_groups()
+    editor.create_driver_bones()
+    editor.create_layout_control()
+    return editor.get_roots()[0][1]
@@ -0,0 +1,3 @@
+"""
+Stand-in for the parts of Maya the rig builder uses, so benchmarks can run without it.
+"""
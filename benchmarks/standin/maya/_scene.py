@@ -0,0 +1,413 @@
+"""
+Scene graph behind the stand-in `maya.cmds` and `maya.api.OpenMaya`.
+
+Only what the rig builder needs is modelled: a DAG of named nodes with static transform attributes,
+dynamic attributes, connections and curve CVs. Nothing is evaluated through connections or constraints,
+so the scene reflects the calls made rather than a posed rig.
+"""
+
+import math
+import re
+import uuid
+
+IDENTITY = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+
+# Matrices are flat, row-major and multiply row vectors, like Maya's
+
+def mult(a, b):
+    return [
+        a[r * 4] * b[c] + a[r * 4 + 1] * b[4 + c] + a[r * 4 + 2] * b[8 + c] + a[r * 4 + 3] * b[12 + c]
+        for r in range(4) for c in range(4)
+    ]
+
+def inverse(m):
+    """General 4x4 inverse by cofactors"""
+    inv = [0.0] * 16
+    inv[0] = m[5]*m[10]*m[15] - m[5]*m[11]*m[14] - m[9]*m[6]*m[15] + m[9]*m[7]*m[14] + m[13]*m[6]*m[11] - m[13]*m[7]*m[10]
+    inv[4] = -m[4]*m[10]*m[15] + m[4]*m[11]*m[14] + m[8]*m[6]*m[15] - m[8]*m[7]*m[14] - m[12]*m[6]*m[11] + m[12]*m[7]*m[10]
+    inv[8] = m[4]*m[9]*m[15] - m[4]*m[11]*m[13] - m[8]*m[5]*m[15] + m[8]*m[7]*m[13] + m[12]*m[5]*m[11] - m[12]*m[7]*m[9]
+    inv[12] = -m[4]*m[9]*m[14] + m[4]*m[10]*m[13] + m[8]*m[5]*m[14] - m[8]*m[6]*m[13] - m[12]*m[5]*m[10] + m[12]*m[6]*m[9]
+    inv[1] = -m[1]*m[10]*m[15] + m[1]*m[11]*m[14] + m[9]*m[2]*m[15] - m[9]*m[3]*m[14] - m[13]*m[2]*m[11] + m[13]*m[3]*m[10]
+    inv[5] = m[0]*m[10]*m[15] - m[0]*m[11]*m[14] - m[8]*m[2]*m[15] + m[8]*m[3]*m[14] + m[12]*m[2]*m[11] - m[12]*m[3]*m[10]
+    inv[9] = -m[0]*m[9]*m[15] + m[0]*m[11]*m[13] + m[8]*m[1]*m[15] - m[8]*m[3]*m[13] - m[12]*m[1]*m[11] + m[12]*m[3]*m[9]
+    inv[13] = m[0]*m[9]*m[14] - m[0]*m[10]*m[13] - m[8]*m[1]*m[14] + m[8]*m[2]*m[13] + m[12]*m[1]*m[10] - m[12]*m[2]*m[9]
+    inv[2] = m[1]*m[6]*m[15] - m[1]*m[7]*m[14] - m[5]*m[2]*m[15] + m[5]*m[3]*m[14] + m[13]*m[2]*m[7] - m[13]*m[3]*m[6]
+    inv[6] = -m[0]*m[6]*m[15] + m[0]*m[7]*m[14] + m[4]*m[2]*m[15] - m[4]*m[3]*m[14] - m[12]*m[2]*m[7] + m[12]*m[3]*m[6]
+    inv[10] = m[0]*m[5]*m[15] - m[0]*m[7]*m[13] - m[4]*m[1]*m[15] + m[4]*m[3]*m[13] + m[12]*m[1]*m[7] - m[12]*m[3]*m[5]
+    inv[14] = -m[0]*m[5]*m[14] + m[0]*m[6]*m[13] + m[4]*m[1]*m[14] - m[4]*m[2]*m[13] - m[12]*m[1]*m[6] + m[12]*m[2]*m[5]
+    inv[3] = -m[1]*m[6]*m[11] + m[1]*m[7]*m[10] + m[5]*m[2]*m[11] - m[5]*m[3]*m[10] - m[9]*m[2]*m[7] + m[9]*m[3]*m[6]
+    inv[7] = m[0]*m[6]*m[11] - m[0]*m[7]*m[10] - m[4]*m[2]*m[11] + m[4]*m[3]*m[10] + m[8]*m[2]*m[7] - m[8]*m[3]*m[6]
+    inv[11] = -m[0]*m[5]*m[11] + m[0]*m[7]*m[9] + m[4]*m[1]*m[11] - m[4]*m[3]*m[9] - m[8]*m[1]*m[7] + m[8]*m[3]*m[5]
+    inv[15] = m[0]*m[5]*m[10] - m[0]*m[6]*m[9] - m[4]*m[1]*m[10] + m[4]*m[2]*m[9] + m[8]*m[1]*m[6] - m[8]*m[2]*m[5]
+    det = m[0] * inv[0] + m[1] * inv[4] + m[2] * inv[8] + m[3] * inv[12]
+    if abs(det) < 1e-12:
+        return list(IDENTITY)
+    return [value / det for value in inv]
+
+def translation(t):
+    return [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, t[0], t[1], t[2], 1]
+
+def scaling(s):
+    return [s[0], 0, 0, 0, 0, s[1], 0, 0, 0, 0, s[2], 0, 0, 0, 0, 1]
+
+def rotation(degrees):
+    """Rotation for XYZ euler angles in degrees"""
+    x, y, z = (math.radians(angle) for angle in degrees)
+    cx, sx, cy, sy, cz, sz = math.cos(x), math.sin(x), math.cos(y), math.sin(y), math.cos(z), math.sin(z)
+    return [
+        cy * cz, cy * sz, -sy, 0,
+        sx * sy * cz - cx * sz, sx * sy * sz + cx * cz, sx * cy, 0,
+        cx * sy * cz + sx * sz, cx * sy * sz - sx * cz, cx * cy, 0,
+        0, 0, 0, 1
+    ]
+
+def euler(m):
+    """XYZ euler angles in degrees of the rotation part of an orthonormal matrix"""
+    sy = max(-1.0, min(1.0, -m[2]))
+    y = math.asin(sy)
+    if abs(math.cos(y)) > 1e-6:
+        x = math.atan2(m[6], m[10])
+        z = math.atan2(m[1], m[0])
+    else:
+        x = math.atan2(-m[9], m[5])
+        z = 0.0
+    return [math.degrees(x), math.degrees(y), math.degrees(z)]
+
+def decompose(m):
+    """Splits a matrix into translation, rotation matrix and scale"""
+    rows = [m[0:3], m[4:7], m[8:11]]
+    scale = [math.sqrt(sum(v * v for v in row)) or 1.0 for row in rows]
+    rot = list(IDENTITY)
+    for r in range(3):
+        for c in range(3):
+            rot[r * 4 + c] = rows[r][c] / scale[r]
+    return [m[12], m[13], m[14]], rot, scale
+
+def transform_point(p, m):
+    return [
+        p[0] * m[0] + p[1] * m[4] + p[2] * m[8] + m[12],
+        p[0] * m[1] + p[1] * m[5] + p[2] * m[9] + m[13],
+        p[0] * m[2] + p[1] * m[6] + p[2] * m[10] + m[14]
+    ]
+
+def transform_vector(v, m):
+    return [
+        v[0] * m[0] + v[1] * m[4] + v[2] * m[8],
+        v[0] * m[1] + v[1] * m[5] + v[2] * m[9],
+        v[0] * m[2] + v[1] * m[6] + v[2] * m[10]
+    ]
+
+def aim(direction, up):
+    """Rotation pointing X down `direction`, with Y as close to `up` as possible"""
+    x = _normalize(direction)
+    z = _normalize(_cross(x, up))
+    if not any(z):
+        z = _normalize(_cross(x, [0, 0, 1] if abs(x[1]) > 0.9 else [0, 1, 0]))
+    y = _cross(z, x)
+    return x + [0] + y + [0] + z + [0] + [0, 0, 0, 1]
+
+def _cross(a, b):
+    return [a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]]
+
+def _normalize(v):
+    length = math.sqrt(sum(c * c for c in v))
+    return [c / length for c in v] if length > 1e-12 else [0.0, 0.0, 0.0]
+
+# Nodes ------------------------------------------------------------------------------------------
+
+TRANSFORM_TYPES = {'transform', 'joint', 'ikHandle', 'clusterHandle'}
+SHAPE_TYPES = {'nurbsCurve'}
+
+VECTORS = {
+    'translate': ('t', 0.0), 'rotate': ('r', 0.0), 'scale': ('s', 1.0), 'jointOrient': ('jo', 0.0),
+    'rotateAxis': ('ra', 0.0), 'rotatePivot': ('rp', 0.0), 'scalePivot': ('sp', 0.0), 'shear': ('sh', 0.0),
+    'overrideColorRGB': ('ovrgb', 0.0),
+}
+SCALARS = {
+    'visibility': ('v', True), 'radius': ('radi', 1.0), 'overrideEnabled': ('ove', False),
+    'overrideDisplayType': ('ovdt', 0), 'overrideRGBColors': ('ovrgbf', False), 'overrideColor': ('ovc', 0),
+    'inheritsTransform': ('it', True), 'rotateOrder': ('ro', 0), 'segmentScaleCompensate': ('ssc', True),
+    'drawStyle': ('ds', 0),
+}
+MATRICES = {'offsetParentMatrix': 'opm', 'outputMatrix': 'omat'}
+COMPUTED = {'worldMatrix', 'worldInverseMatrix', 'matrix', 'inverseMatrix', 'parentMatrix', 'parentInverseMatrix'}
+
+def _aliases():
+    ret = dict()
+    for long_name, (short, _) in VECTORS.items():
+        ret[long_name] = ret[short] = (long_name, None)
+        for i, axis in enumerate('XYZ'):
+            ret[long_name + axis] = ret[short + axis.lower()] = (long_name, i)
+    for long_name in ('overrideColorR', 'overrideColorG', 'overrideColorB'):
+        ret[long_name] = ('overrideColorRGB', 'RGB'.index(long_name[-1]))
+    for long_name, (short, _) in SCALARS.items():
+        ret[long_name] = ret[short] = (long_name, None)
+    for long_name, short in MATRICES.items():
+        ret[long_name] = ret[short] = (long_name, None)
+    return ret
+
+ALIASES = _aliases()
+
+class Node:
+    def __init__(self, name, type_):
+        self.name = name
+        self.type = type_
+        self.parent = None
+        self.children = []
+        self.values = dict()
+        self.dynamic = dict()  # name -> dict of addAttr settings
+        self.locked = set()
+        self.cvs = []  # Curve shapes only
+        self.alive = True
+        self.history = False
+        self.uuid = str(uuid.uuid4()).upper()
+        self._world = None
+
+    @property
+    def is_transform(self):
+        return self.type in TRANSFORM_TYPES
+
+    @property
+    def is_dag(self):
+        return self.is_transform or self.type in SHAPE_TYPES or self.type.endswith('Constraint') or self.type == 'ikEffector'
+
+    def path(self):
+        names = []
+        node = self
+        while node:
+            names.append(node.name)
+            node = node.parent
+        return '|' + '|'.join(reversed(names))
+
+    # Attributes
+
+    def resolve(self, attr):
+        """Returns the stored attribute and component index for an attribute name, or None"""
+        attr = attr.split('.')[-1] if '[' not in attr else attr
+        base = re.sub(r'\[\d+\]', '', attr)
+        if base in self.dynamic:
+            return (base, None)
+        if not self.is_transform:
+            return (attr, None)
+        if base in COMPUTED:
+            return (base, None)
+        if base in ALIASES:
+            return ALIASES[base]
+        return None
+
+    def has(self, attr):
+        resolved = self.resolve(attr)
+        if resolved is None:
+            return False
+        return self.is_transform or resolved[0] in self.dynamic or resolved[0] in self.values
+
+    def get(self, attr):
+        key, index = self.resolve(attr)
+        if key in COMPUTED:
+            return self.computed(key)
+        if key in VECTORS:
+            value = self.values.get(key, [VECTORS[key][1]] * 3)
+            return value[index] if index is not None else list(value)
+        if key in SCALARS:
+            return self.values.get(key, SCALARS[key][1])
+        if key in MATRICES:
+            return list(self.values.get(key, IDENTITY))
+        if key in self.dynamic:
+            return self.values.get(key, self.dynamic[key].get('default'))
+        return self.values.get(key, 0.0)
+
+    def set(self, attr, value):
+        key, index = self.resolve(attr)
+        if key in VECTORS:
+            current = self.values.setdefault(key, [VECTORS[key][1]] * 3)
+            if index is None:
+                current[:] = [float(v) for v in value]
+            else:
+                current[index] = float(value)
+        elif key in MATRICES:
+            self.values[key] = [float(v) for v in value]
+        else:
+            self.values[key] = value
+
+    def is_locked(self, attr):
+        key, index = self.resolve(attr)
+        return (key, index) in self.locked or (key, None) in self.locked
+
+    # Transforms
+
+    def local(self):
+        """Local matrix, without the offset parent matrix"""
+        if not self.is_transform:
+            return list(IDENTITY)
+        m = mult(scaling(self.get('scale')), rotation(self.get('rotate')))
+        if self.type == 'joint':
+            m = mult(m, rotation(self.get('jointOrient')))
+        return mult(m, translation(self.get('translate')))
+
+    def parent_world(self):
+        parent = self.parent
+        return parent.world() if parent else list(IDENTITY)
+
+    def world(self):
+        if self._world is None or self._world[0] != Scene.version:
+            m = self.local()
+            if self.is_transform:
+                m = mult(m, self.get('offsetParentMatrix'))
+            if self.parent:
+                m = mult(m, self.parent.world())
+            self._world = (Scene.version, m)
+        return list(self._world[1])
+
+    def computed(self, key):
+        if key == 'worldMatrix':
+            return self.world()
+        if key == 'worldInverseMatrix':
+            return inverse(self.world())
+        if key == 'matrix':
+            return self.local()
+        if key == 'inverseMatrix':
+            return inverse(self.local())
+        if key == 'parentMatrix':
+            return self.parent_world()
+        return inverse(self.parent_world())
+
+    def set_local(self, m):
+        """Sets translate, rotate and scale from a local matrix. Joints keep their rotate and absorb the rest in joint orient."""
+        t, rot, s = decompose(m)
+        self.set('translate', t)
+        self.set('scale', s)
+        if self.type == 'joint':
+            self.set('jointOrient', euler(mult(inverse(rotation(self.get('rotate'))), rot)))
+        else:
+            self.set('rotate', euler(rot))
+        Scene.touch()
+
+    def set_world(self, m):
+        self.set_local(mult(m, inverse(mult(self.get('offsetParentMatrix'), self.parent_world()))))
+
+class Scene:
+    """The stand-in scene. There is only ever one, like in Maya."""
+    version = 0
+
+    def __init__(self):
+        self.nodes = dict()
+        self.selection = []
+        self.connections = dict()  # (node, attr) -> (node, attr)
+        self.node_added = dict()  # callback id -> (function, client data)
+        self.attribute_changed = dict()  # callback id -> (node, function, client data)
+        self._next_callback = 1
+
+    @staticmethod
+    def touch():
+        Scene.version += 1
+
+    def reset(self):
+        self.__init__()
+        Scene.touch()
+
+    def find(self, name):
+        if name is None:
+            return None
+        name = str(name)
+        if '.' in name:
+            name = name[:name.find('.')]
+        short = name[name.rfind('|') + 1:]
+        node = self.nodes.get(short)
+        if node and ('|' not in name or node.path().endswith(name.lstrip('|'))):
+            return node
+        return None
+
+    def node(self, name):
+        """Finds a node, raising like Maya when it doesn't exist"""
+        node = self.find(name)
+        if node is None:
+            raise ValueError("No object matches name: {0}".format(name))
+        return node
+
+    def unique_name(self, name):
+        if '#' in name:
+            i = 1
+            while name.replace('#', str(i)) in self.nodes:
+                i += 1
+            return name.replace('#', str(i))
+        if name not in self.nodes:
+            return name
+        match = re.search(r'\d+$', name)
+        base = name[:match.start()] if match else name
+        i = int(match.group()) + 1 if match else 1
+        while base + str(i) in self.nodes:
+            i += 1
+        return base + str(i)
+
+    def create(self, type_, name=None, parent=None):
+        node = Node(self.unique_name(name or (type_ + '#')), type_)
+        self.nodes[node.name] = node
+        if parent:
+            self.reparent(node, parent)
+        for callback_id, (function, data) in list(self.node_added.items()):
+            from .api import OpenMaya
+            function(OpenMaya.MObject(node), data)
+        return node
+
+    def rename(self, node, name):
+        if name == node.name:
+            return name
+        del self.nodes[node.name]
+        node.name = self.unique_name(name)
+        self.nodes[node.name] = node
+        return node.name
+
+    def reparent(self, node, parent):
+        if node.parent:
+            node.parent.children.remove(node)
+        node.parent = parent
+        if parent:
+            parent.children.append(node)
+        Scene.touch()
+
+    def delete(self, node):
+        if not node.alive:
+            return
+        for child in list(node.children):
+            self.delete(child)
+        if node.parent:
+            node.parent.children.remove(node)
+            node.parent = None
+        node.alive = False
+        self.nodes.pop(node.name, None)
+        self.selection = [selected for selected in self.selection if selected is not node]
+        sources = set()
+        for key, source in list(self.connections.items()):
+            if key[0] is node:
+                sources.add(source[0])
+                del self.connections[key]
+            elif source[0] is node:
+                del self.connections[key]
+        # Construction history goes along with the node it builds
+        for source in sources:
+            if source.history and source.alive and not any(src[0] is source for src in self.connections.values()):
+                self.delete(source)
+        Scene.touch()
+
+    def descendants(self, node):
+        """All descendants in Maya's order, the deepest and last first"""
+        ret = []
+        frontier = list(node.children)
+        while frontier:
+            child = frontier.pop(0)
+            ret.append(child)
+            frontier[0:0] = child.children
+        ret.reverse()
+        return ret
+
+    def add_callback(self, table, entry):
+        callback_id = self._next_callback
+        self._next_callback += 1
+        table[callback_id] = entry
+        return callback_id
+
+    def remove_callback(self, callback_id):
+        self.node_added.pop(callback_id, None)
+        self.attribute_changed.pop(callback_id, None)
+
+scene = Scene()
@@ -0,0 +1,398 @@
+"""
+Stand-in for the parts of `maya.api.OpenMaya` the rig builder uses.
+"""
+
+import math
+from .. import _scene
+from .._scene import scene
+
+class MSpace:
+    kInvalid, kTransform, kPreTransform, kPostTransform, kWorld, kObject = range(6)
+
+class MFn:
+    kInvalid = 0
+    kWorld = 1
+    kDependencyNode = 2
+    kDagNode = 3
+    kTransform = 4
+    kJoint = 5
+    kNurbsCurve = 6
+    kAttribute = 7
+
+# Math -------------------------------------------------------------------------------------------
+
+class MVector:
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = tuple(args[0])
+        self.x, self.y, self.z = (tuple(float(v) for v in args[:3]) + (0.0, 0.0, 0.0))[:3]
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, i):
+        return (self.x, self.y, self.z)[i]
+
+    def __add__(self, other):
+        return MVector(self.x + other[0], self.y + other[1], self.z + other[2])
+
+    def __sub__(self, other):
+        return MVector(self.x - other[0], self.y - other[1], self.z - other[2])
+
+    def __neg__(self):
+        return MVector(-self.x, -self.y, -self.z)
+
+    def __mul__(self, other):
+        if isinstance(other, MVector):
+            return self.x * other.x + self.y * other.y + self.z * other.z
+        if isinstance(other, MMatrix):
+            return MVector(_scene.transform_vector(list(self), other._m))
+        return MVector(self.x * other, self.y * other, self.z * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return MVector(self.x / other, self.y / other, self.z / other)
+
+    def __xor__(self, other):
+        return MVector(_scene._cross(list(self), list(other)))
+
+    def __eq__(self, other):
+        return isinstance(other, MVector) and tuple(self) == tuple(other)
+
+    def __repr__(self):
+        return 'MVector({0}, {1}, {2})'.format(self.x, self.y, self.z)
+
+    def length(self):
+        return math.sqrt(self * self)
+
+    def normal(self):
+        return MVector(_scene._normalize(list(self)))
+
+    def normalize(self):
+        self.x, self.y, self.z = _scene._normalize(list(self))
+        return self
+
+class MPoint(MVector):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.w = 1.0
+
+class MPointArray(list):
+    pass
+
+class MMatrix:
+    def __init__(self, values=None):
+        if values is None:
+            self._m = list(_scene.IDENTITY)
+        elif isinstance(values, MMatrix):
+            self._m = list(values._m)
+        else:
+            values = list(values)
+            if values and isinstance(values[0], (list, tuple)):
+                values = [v for row in values for v in row]
+            self._m = [float(v) for v in values]
+
+    def __iter__(self):
+        return iter(self._m)
+
+    def __len__(self):
+        return 16
+
+    def __getitem__(self, i):
+        return self._m[i]
+
+    def __mul__(self, other):
+        return MMatrix(_scene.mult(self._m, other._m))
+
+    def __eq__(self, other):
+        return isinstance(other, MMatrix) and all(abs(a - b) < 1e-10 for a, b in zip(self._m, other._m))
+
+    def __repr__(self):
+        return 'MMatrix({0})'.format(self._m)
+
+    def inverse(self):
+        return MMatrix(_scene.inverse(self._m))
+
+    def transpose(self):
+        return MMatrix([self._m[c * 4 + r] for r in range(4) for c in range(4)])
+
+    def getElement(self, row, column):
+        return self._m[row * 4 + column]
+
+    def setElement(self, row, column, value):
+        self._m[row * 4 + column] = float(value)
+
+class MTransformationMatrix:
+    def __init__(self, matrix=None):
+        self._m = MMatrix(matrix)
+
+    def translation(self, space):
+        return MVector(self._m._m[12:15])
+
+    def scale(self, space):
+        return _scene.decompose(self._m._m)[2]
+
+    def rotation(self, asQuaternion=False):
+        return _scene.euler(_scene.decompose(self._m._m)[1])
+
+    def asMatrix(self):
+        return MMatrix(self._m)
+
+# Scene access -----------------------------------------------------------------------------------
+
+class MObject:
+    kNullObj = None
+
+    def __init__(self, node=None, attribute=None):
+        self._node = node
+        self._attribute = attribute
+
+    def isNull(self):
+        return self._node is None and self._attribute is None
+
+    def hasFn(self, fn):
+        if self._attribute is not None:
+            return fn == MFn.kAttribute
+        if self._node is None:
+            return False
+        if self._node == 'world':
+            return fn == MFn.kWorld
+        return (
+            fn == MFn.kDependencyNode or
+            (fn == MFn.kDagNode and self._node.is_dag) or
+            (fn == MFn.kTransform and self._node.is_transform) or
+            (fn == MFn.kJoint and self._node.type == 'joint') or
+            (fn == MFn.kNurbsCurve and self._node.type == 'nurbsCurve')
+        )
+
+MObject.kNullObj = MObject()
+
+class MObjectHandle:
+    def __init__(self, obj):
+        self._obj = obj
+
+    def isValid(self):
+        return self._obj._node is not None and self._obj._node.alive
+
+    isAlive = isValid
+
+    def object(self):
+        return self._obj
+
+class MDagPath:
+    def __init__(self, node=None):
+        self._node = node
+
+    @staticmethod
+    def getAPathTo(obj):
+        return MDagPath(obj._node)
+
+    def node(self):
+        return MObject(self._node)
+
+    def fullPathName(self):
+        return self._node.path()
+
+    def partialPathName(self):
+        return self._node.name
+
+    def inclusiveMatrix(self):
+        return MMatrix(self._node.world())
+
+    def exclusiveMatrix(self):
+        return MMatrix(self._node.parent_world())
+
+    def childCount(self):
+        return len(self._node.children)
+
+    def child(self, i):
+        return MObject(self._node.children[i])
+
+    def extendToShape(self):
+        for child in self._node.children:
+            if child.type in _scene.SHAPE_TYPES:
+                return MDagPath(child)
+        raise RuntimeError("(kInvalidParameter): No shape below " + self._node.name)
+
+class MSelectionList:
+    def __init__(self):
+        self._nodes = []
+
+    def add(self, name):
+        node = scene.find(name)
+        if node is None:
+            raise RuntimeError("(kInvalidParameter): Object does not exist: {0}".format(name))
+        self._nodes.append(node)
+        return self
+
+    def length(self):
+        return len(self._nodes)
+
+    def getDependNode(self, i):
+        return MObject(self._nodes[i])
+
+    def getDagPath(self, i):
+        if not self._nodes[i].is_dag:
+            raise TypeError("(kInvalidParameter): Not a DAG node: " + self._nodes[i].name)
+        return MDagPath(self._nodes[i])
+
+def _node_of(obj):
+    return obj._node if isinstance(obj, (MObject, MDagPath)) else obj
+
+class MFnDependencyNode:
+    def __init__(self, obj=None):
+        self._node = _node_of(obj)
+
+    def name(self):
+        return self._node.name
+
+    def typeName(self):
+        return self._node.type
+
+    def hasAttribute(self, attr):
+        return self._node.has(attr)
+
+    def attribute(self, attr):
+        return MObject(self._node, attr)
+
+    def findPlug(self, attr, wantNetworkedPlug=False):
+        return MPlug(MObject(self._node), MObject(self._node, attr))
+
+class MFnDagNode(MFnDependencyNode):
+    def parent(self, i):
+        return MObject(self._node.parent or 'world')
+
+    def childCount(self):
+        return len(self._node.children)
+
+    def child(self, i):
+        return MObject(self._node.children[i])
+
+    def fullPathName(self):
+        return self._node.path()
+
+    def partialPathName(self):
+        return self._node.name
+
+class MFnAttribute:
+    def __init__(self, attribute):
+        self._attribute = attribute
+
+    @property
+    def parent(self):
+        return MObject.kNullObj
+
+class MPlug:
+    def __init__(self, node=None, attribute=None):
+        self._node = node._node if node else None
+        self._attr = attribute._attribute if attribute else None
+
+    def partialName(self, useLongNames=False, **kwargs):
+        return self._attr
+
+    def name(self):
+        return self._node.name + '.' + self._attr
+
+    def asString(self):
+        return str(self._node.get(self._attr) or '')
+
+    def asDouble(self):
+        return float(self._node.get(self._attr) or 0.0)
+
+    asFloat = asDouble
+
+    def asInt(self):
+        return int(self._node.get(self._attr) or 0)
+
+    def asBool(self):
+        return bool(self._node.get(self._attr))
+
+    @property
+    def isLocked(self):
+        return self._node.is_locked(self._attr)
+
+    @isLocked.setter
+    def isLocked(self, value):
+        key = self._node.resolve(self._attr)
+        if value:
+            self._node.locked.add(key)
+        else:
+            self._node.locked.discard(key)
+
+class MFnNurbsCurve:
+    def __init__(self, obj=None):
+        self._node = _node_of(obj)
+
+    def cvPositions(self, space=MSpace.kObject):
+        return MPointArray(MPoint(cv) for cv in self._node.cvs)
+
+    def setCVPositions(self, points, space=MSpace.kObject):
+        self._node.cvs = [[p[0], p[1], p[2]] for p in points]
+
+    def numCVs(self):
+        return len(self._node.cvs)
+
+    def updateCurve(self):
+        pass
+
+class MDGModifier:
+    def __init__(self):
+        self._operations = []
+
+    def removeAttribute(self, node, attribute):
+        self._operations.append(lambda: _remove_attribute(node._node, attribute._attribute))
+
+    def newPlugValueDouble(self, plug, value):
+        self._operations.append(lambda: plug._node.set(plug._attr, float(value)))
+
+    def newPlugValueString(self, plug, value):
+        self._operations.append(lambda: plug._node.set(plug._attr, value))
+
+    def deleteNode(self, node):
+        self._operations.append(lambda: scene.delete(node._node))
+
+    def doIt(self):
+        for operation in self._operations:
+            operation()
+        self._operations = []
+
+def _remove_attribute(node, attr):
+    if attr not in node.dynamic:
+        raise RuntimeError("(kInvalidParameter): No attribute {0}.{1}".format(node.name, attr))
+    del node.dynamic[attr]
+    node.values.pop(attr, None)
+    node.locked = {key for key in node.locked if key[0] != attr}
+    for key, source in list(scene.connections.items()):
+        if key == (node, attr) or source == (node, attr):
+            del scene.connections[key]
+
+# Messages ---------------------------------------------------------------------------------------
+
+class MMessage:
+    @staticmethod
+    def removeCallback(callback_id):
+        scene.remove_callback(callback_id)
+
+    @staticmethod
+    def removeCallbacks(callback_ids):
+        for callback_id in callback_ids:
+            scene.remove_callback(callback_id)
+
+class MDGMessage(MMessage):
+    @staticmethod
+    def addNodeAddedCallback(function, nodeType='dependNode', clientData=None):
+        return scene.add_callback(scene.node_added, (function, clientData))
+
+class MNodeMessage(MMessage):
+    kConnectionMade = 0x01
+    kConnectionBroken = 0x02
+    kAttributeEval = 0x04
+    kAttributeSet = 0x08
+
+    @staticmethod
+    def addAttributeChangedCallback(node, function, clientData=None):
+        return scene.add_callback(scene.attribute_changed, (node._node, function, clientData))
@@ -0,0 +1,7 @@
+"""
+Stand-in for `maya.api.OpenMayaAnim`. Rig builds don't use it, so it only defines the constants read on import.
+"""
+
+class MFnAnimCurve:
+    kAnimCurveTA, kAnimCurveTL, kAnimCurveTT, kAnimCurveTU = range(4)
+    kTangentGlobal, kTangentFixed, kTangentLinear = range(3)
@@ -0,0 +1,785 @@
+"""
+Stand-in for the `maya.cmds` commands the rig builder uses.
+
+Commands follow Maya's flags and return values closely enough to build the reference scenes.
+Anything else raises, so the stand-in never silently diverges from a real build.
+"""
+
+import fnmatch
+import math
+import os
+import pickle
+from . import _scene
+from ._scene import scene, Scene
+
+STANDIN = True
+
+ATTRIBUTE_TYPES = {'bool', 'long', 'short', 'byte', 'char', 'enum', 'float', 'double', 'doubleAngle', 'doubleLinear', 'time', 'message', 'compound', 'double3', 'float3', 'long3', 'matrix', 'fltMatrix'}
+DATA_TYPES = {'string', 'stringArray', 'matrix', 'reflectanceRGB', 'spectrumRGB', 'doubleArray', 'floatArray', 'Int32Array', 'vectorArray', 'nurbsCurve', 'nurbsSurface', 'mesh', 'lattice', 'pointArray', 'double3', 'float3'}
+CONSTRAINTS = {'parentConstraint', 'pointConstraint', 'orientConstraint', 'scaleConstraint', 'aimConstraint', 'poleVectorConstraint'}
+
+def _flag(kwargs, *names, default=None):
+    for name in names:
+        if name in kwargs:
+            return kwargs[name]
+    return default
+
+def _flatten(args):
+    ret = []
+    for arg in args:
+        if arg is None:
+            continue
+        if isinstance(arg, (list, tuple)):
+            ret.extend(_flatten(arg))
+        else:
+            ret.append(str(arg))
+    return ret
+
+def _targets(args):
+    """The nodes named by `args`, or the selection when there are none"""
+    names = _flatten(args)
+    if not names:
+        return list(scene.selection)
+    return [scene.node(name) for name in names]
+
+def _split(path):
+    node_name, attr = path.split('.', 1)
+    return scene.node(node_name), attr
+
+def _plug(path):
+    node, attr = _split(path)
+    if not node.has(attr) and node.is_transform:
+        raise ValueError("No object matches name: " + path)
+    return node, attr
+
+# Scene ------------------------------------------------------------------------------------------
+
+def file(*args, **kwargs):
+    if _flag(kwargs, 'q', 'query'):
+        if _flag(kwargs, 'mf', 'modified'):
+            return False  # The stand-in's scenes are only ever benchmark scenes
+        raise NotImplementedError("file: unsupported query {0}".format(sorted(kwargs)))
+    if kwargs.get('new'):
+        scene.reset()
+        return 'untitled'
+    path = args[0] if args else None
+    if _flag(kwargs, 'exportSelected', 'es'):
+        with open(path, 'wb') as handle:
+            pickle.dump(_export(scene.selection), handle)
+        return path
+    if _flag(kwargs, 'i', 'import'):
+        with open(path, 'rb') as handle:
+            _import(pickle.load(handle))
+        return path
+    raise NotImplementedError("file: unsupported flags {0}".format(sorted(kwargs)))
+
+def _export(roots):
+    nodes = []
+    for root in roots:
+        nodes.append(root)
+        nodes.extend(scene.descendants(root))
+    kept = set(id(node) for node in nodes)
+    connections = [
+        ((dst[0].name, dst[1]), (src[0].name, src[1])) for dst, src in scene.connections.items()
+        if id(dst[0]) in kept and id(src[0]) in kept
+    ]
+    return [(node.name, node.type, node.parent.name if node.parent and id(node.parent) in kept else None,
+             node.values, node.dynamic, node.locked, node.cvs) for node in nodes], connections
+
+def _import(data):
+    nodes, connections = data
+    created = dict()
+    for name, type_, parent, values, dynamic, locked, cvs in nodes:
+        node = scene.create(type_, name, created.get(parent))
+        node.values, node.dynamic, node.locked, node.cvs = values, dynamic, locked, cvs
+        created[name] = node
+    for (dst, dst_attr), (src, src_attr) in connections:
+        scene.connections[(created[dst], dst_attr)] = (created[src], src_attr)
+    Scene.touch()
+
+def objExists(name):
+    if '.' in name:
+        node = scene.find(name)
+        return bool(node) and node.has(name.split('.', 1)[1])
+    return scene.find(name) is not None
+
+def nodeType(name):
+    return scene.node(name).type
+
+def ls(*args, **kwargs):
+    objects_only = _flag(kwargs, 'o', 'objectsOnly', default=False)
+    long_names = _flag(kwargs, 'long', 'l', default=False)
+    type_ = _flag(kwargs, 'type', 'typ')
+    if _flag(kwargs, 'sl', 'selection'):
+        found = [(node, None) for node in scene.selection]
+    elif args and _flatten(args):
+        found = []
+        for pattern in _flatten(args):
+            node_pattern, _, attr = pattern.partition('.')
+            if any(char in node_pattern for char in '*?['):
+                candidates = [node for name, node in scene.nodes.items() if fnmatch.fnmatchcase(name, node_pattern)]
+            else:
+                candidates = [node for node in [scene.find(node_pattern)] if node]
+            for node in candidates:
+                if not attr:
+                    found.append((node, None))
+                elif node.has(attr):
+                    found.append((node, attr))
+    else:
+        found = [(node, None) for node in scene.nodes.values()]
+    if type_:
+        types = type_ if isinstance(type_, (list, tuple)) else [type_]
+        found = [(node, attr) for node, attr in found if node.type in types or ('transform' in types and node.is_transform)]
+    if _flag(kwargs, 'uuid'):
+        return list(dict.fromkeys(node.uuid for node, _ in found))
+    ret = []
+    seen = set()
+    for node, attr in found:
+        name = node.path() if long_names and node.is_dag else node.name
+        item = name if attr is None or objects_only else name + '.' + attr
+        if item not in seen:
+            seen.add(item)
+            ret.append(item)
+    return ret
+
+def select(*args, **kwargs):
+    if _flag(kwargs, 'cl', 'clear'):
+        scene.selection = []
+        return
+    nodes = [scene.node(name) for name in _flatten(args)]
+    if _flag(kwargs, 'add', 'af'):
+        scene.selection.extend(node for node in nodes if node not in scene.selection)
+    else:
+        scene.selection = nodes
+
+def delete(*args, **kwargs):
+    nodes = _targets(args)
+    if not nodes:
+        raise RuntimeError("delete: Not enough objects or values.")
+    for node in nodes:
+        scene.delete(node)
+
+def rename(*args, **kwargs):
+    if len(args) == 1:
+        node, name = scene.selection[0], args[0]
+    else:
+        node, name = scene.node(args[0]), args[1]
+    return scene.rename(node, name)
+
+def error(message, **kwargs):
+    raise RuntimeError(message)
+
+def warning(message, **kwargs):
+    print('Warning:', message)
+
+def undoInfo(*args, **kwargs):
+    # The stand-in keeps no undo queue
+    return None
+
+# Hierarchy --------------------------------------------------------------------------------------
+
+def listRelatives(*args, **kwargs):
+    full_path = _flag(kwargs, 'f', 'fullPath', default=False)
+    type_ = _flag(kwargs, 'type', 'typ')
+    types = None if type_ is None else (type_ if isinstance(type_, (list, tuple)) else [type_])
+    ret = []
+    seen = set()
+    for node in _targets(args):
+        if _flag(kwargs, 'p', 'parent'):
+            found = [node.parent] if node.parent else []
+        elif _flag(kwargs, 'ad', 'allDescendents'):
+            found = scene.descendants(node)
+        else:
+            found = list(node.children)
+        if _flag(kwargs, 's', 'shapes'):
+            found = [child for child in found if child.type in _scene.SHAPE_TYPES]
+        if types:
+            found = [child for child in found if child.type in types or ('transform' in types and child.is_transform)]
+        for child in found:
+            name = child.path() if full_path else child.name
+            if name not in seen:
+                seen.add(name)
+                ret.append(name)
+    return ret or None
+
+def parent(*args, **kwargs):
+    names = _flatten(args)
+    to_world = _flag(kwargs, 'w', 'world', default=False)
+    relative = _flag(kwargs, 'r', 'relative', default=False)
+    if to_world:
+        new_parent = None
+        children = [scene.node(name) for name in names] or list(scene.selection)
+    else:
+        if len(names) < 2:
+            names = [node.name for node in scene.selection] + names
+        new_parent = scene.node(names[-1])
+        children = [scene.node(name) for name in names[:-1]]
+    if not children:
+        raise RuntimeError("parent: Not enough objects or values.")
+    ret = []
+    for child in children:
+        if child.parent is new_parent:
+            warning("{0} is already a child of {1}.".format(child.name, new_parent.name if new_parent else 'the world'))
+            ret.append(child.name)
+            continue
+        ancestor = new_parent
+        while ancestor:
+            if ancestor is child:
+                raise RuntimeError("parent: Cannot parent {0} under its own descendant".format(child.name))
+            ancestor = ancestor.parent
+        world = child.world()
+        scene.reparent(child, new_parent)
+        if child.is_transform and not relative:
+            child.set_world(world)
+        ret.append(child.name)
+    return ret
+
+def group(*args, **kwargs):
+    name = _flag(kwargs, 'n', 'name', default='group#')
+    if _flag(kwargs, 'em', 'empty'):
+        return scene.create('transform', name).name
+    contents = _targets(args)
+    parents = set(id(node.parent) for node in contents)
+    common = contents[0].parent if len(parents) == 1 else None
+    grp = scene.create('transform', name, common)
+    parent(*[node.name for node in contents], grp.name)
+    return grp.name
+
+def duplicate(*args, **kwargs):
+    name = _flag(kwargs, 'n', 'name')
+    parent_only = _flag(kwargs, 'po', 'parentOnly', default=False)
+    ret = []
+    descendants = []
+    for node in _targets(args):
+        dup = _copy(node, name or node.name, node.parent, not parent_only, descendants)
+        ret.append(dup.name)
+    scene.selection = [scene.node(dup) for dup in ret]
+    return ret + descendants
+
+def _copy(node, name, parent_node, recurse, descendants):
+    dup = scene.create(node.type, name, parent_node)
+    dup.values = {key: list(value) if isinstance(value, list) else value for key, value in node.values.items()}
+    dup.dynamic = {key: dict(value) for key, value in node.dynamic.items()}
+    dup.locked = set(node.locked)
+    dup.cvs = [list(cv) for cv in node.cvs]
+    if recurse:
+        for child in node.children:
+            descendants.append(_copy(child, child.name, dup, True, descendants).name)
+    return dup
+
+# Attributes -------------------------------------------------------------------------------------
+
+def getAttr(path, **kwargs):
+    node, attr = _plug(path)
+    if _flag(kwargs, 'lock', 'l'):
+        return node.is_locked(attr)
+    value = node.get(attr)
+    key, index = node.resolve(attr)
+    if key in _scene.VECTORS and index is None:
+        return [tuple(value)]
+    return value
+
+def setAttr(path, *values, **kwargs):
+    node, attr = _plug(path)
+    lock = _flag(kwargs, 'l', 'lock')
+    if values:
+        if node.is_locked(attr):
+            raise RuntimeError("The attribute '{0}' is locked or connected and cannot be modified.".format(path))
+        type_ = _flag(kwargs, 'type', 'typ')
+        if len(values) == 1 and not isinstance(values[0], str) and hasattr(values[0], '__iter__'):
+            values = tuple(values[0])
+        key, index = node.resolve(attr)
+        if type_ == 'string' or len(values) == 1:
+            value = values[0]
+            if key in node.dynamic and node.dynamic[key].get('type') == 'bool':
+                value = bool(value)
+            node.set(attr, value)
+        else:
+            node.set(attr, [float(value) for value in values])
+        if node.is_transform:
+            Scene.touch()
+        _attribute_changed(node, attr)
+    if lock is not None:
+        key = node.resolve(attr)
+        if key[0] in _scene.VECTORS and key[1] is None:
+            keys = [key] + [(key[0], i) for i in range(3)]
+        else:
+            keys = [key]
+        for key in keys:
+            if lock:
+                node.locked.add(key)
+            else:
+                node.locked.discard(key)
+
+def _attribute_changed(node, attr):
+    from .api import OpenMaya
+    for node_, function, data in list(scene.attribute_changed.values()):
+        if node_ is node:
+            plug = OpenMaya.MPlug(OpenMaya.MObject(node), OpenMaya.MObject(node, attr))
+            function(OpenMaya.MNodeMessage.kAttributeSet, plug, None, data)
+
+def addAttr(*args, **kwargs):
+    if _flag(kwargs, 'e', 'edit'):
+        node, attr = _plug(args[0])
+        settings = node.dynamic.get(node.resolve(attr)[0], dict())
+        for flag, key in (('nn', 'nice'), ('niceName', 'nice'), ('min', 'min'), ('minValue', 'min'), ('max', 'max'), ('maxValue', 'max')):
+            if flag in kwargs:
+                settings[key] = kwargs[flag]
+        return
+    node = _targets(args)[0]
+    attr = _flag(kwargs, 'ln', 'longName')
+    attribute_type = _flag(kwargs, 'at', 'attributeType')
+    data_type = _flag(kwargs, 'dt', 'dataType')
+    if node.has(attr) and (attr in node.dynamic or node.is_transform):
+        raise RuntimeError("Found an attribute with the same name: {0}.{1}".format(node.name, attr))
+    if attribute_type is not None and attribute_type not in ATTRIBUTE_TYPES:
+        raise RuntimeError("Type '{0}' is not a valid attribute type".format(attribute_type))
+    if data_type is not None and data_type not in DATA_TYPES:
+        raise RuntimeError("Type '{0}' is not a valid data type".format(data_type))
+    type_ = attribute_type or data_type or 'double'
+    default = _flag(kwargs, 'dv', 'defaultValue')
+    if type_ == 'string':
+        default = None
+    elif default is None:
+        default = 0.0
+    node.dynamic[attr] = dict(
+        type=type_,
+        hidden=_flag(kwargs, 'h', 'hidden', default=False),
+        enum=_flag(kwargs, 'en', 'enumName'),
+        default=default,
+        min=_flag(kwargs, 'min', 'minValue'),
+        max=_flag(kwargs, 'max', 'maxValue'),
+    )
+
+def deleteAttr(*args, **kwargs):
+    attr = _flag(kwargs, 'at', 'attribute')
+    paths = [obj + '.' + attr for obj in _flatten(args)] if attr else _flatten(args)
+    for path in paths:
+        _delete_attr(path)
+
+def _delete_attr(path):
+    node, attr = _plug(path)
+    if attr not in node.dynamic:
+        raise RuntimeError("deleteAttr: {0} is not a dynamic attribute".format(path))
+    if node.is_locked(attr):
+        raise RuntimeError("Cannot delete locked attribute " + path)
+    del node.dynamic[attr]
+    node.values.pop(attr, None)
+
+def listAttr(*args, **kwargs):
+    node = _targets(args)[0]
+    if _flag(kwargs, 'ud', 'userDefined'):
+        return list(node.dynamic) or None
+    return list(node.dynamic) + sorted(_scene.ALIASES)
+
+def attributeQuery(attr, **kwargs):
+    node = scene.node(_flag(kwargs, 'n', 'node'))
+    if _flag(kwargs, 'ex', 'exists'):
+        return node.has(attr)
+    raise NotImplementedError("attributeQuery: unsupported flags {0}".format(sorted(kwargs)))
+
+def connectAttr(source, destination, **kwargs):
+    src_node, src_attr = _plug(source)
+    dst_node, dst_attr = _plug(destination)
+    key = (dst_node, dst_attr)
+    if key in scene.connections and not _flag(kwargs, 'f', 'force'):
+        raise RuntimeError("{0} is already connected".format(destination))
+    if dst_node.is_locked(dst_attr):
+        raise RuntimeError("The destination attribute '{0}' is locked".format(destination))
+    scene.connections[key] = (src_node, src_attr)
+
+def listConnections(*args, **kwargs):
+    source = _flag(kwargs, 's', 'source', default=True)
+    destination = _flag(kwargs, 'd', 'destination', default=True)
+    ret = []
+    for path in _flatten(args):
+        node, attr = _split(path) if '.' in path else (scene.node(path), None)
+        for (dst, dst_attr), (src, src_attr) in scene.connections.items():
+            if source and dst is node and _overlaps(node, attr, dst_attr):
+                ret.append(src.name)
+            if destination and src is node and _overlaps(node, attr, src_attr):
+                ret.append(dst.name)
+    return ret
+
+def _overlaps(node, attr, other):
+    """Whether two attributes of a node are the same, or one is part of the other"""
+    if attr is None:
+        return True
+    first, second = node.resolve(attr), node.resolve(other)
+    if first is None or second is None:
+        return attr == other
+    return first[0] == second[0] and (first[1] == second[1] or None in (first[1], second[1]))
+
+def color(*args, **kwargs):
+    for node in _targets(args):
+        if 'rgb' in kwargs:
+            node.set('overrideColorRGB', kwargs['rgb'])
+        if 'ud' in kwargs:
+            node.set('overrideColor', kwargs['ud'])
+
+# Transforms -------------------------------------------------------------------------------------
+
+def xform(*args, **kwargs):
+    nodes = _targets(args)
+    world_space = _flag(kwargs, 'ws', 'worldSpace', default=False)
+    if _flag(kwargs, 'q', 'query'):
+        node = nodes[0]
+        if _flag(kwargs, 'm', 'matrix'):
+            return node.world() if world_space else node.local()
+        if _flag(kwargs, 't', 'translation'):
+            return node.world()[12:15] if world_space else node.get('translate')
+        if _flag(kwargs, 'rp', 'rotatePivot') or _flag(kwargs, 'sp', 'scalePivot'):
+            return node.world()[12:15] if world_space else [0.0, 0.0, 0.0]
+        if _flag(kwargs, 'piv', 'pivots'):
+            return node.world()[12:15] * 2 if world_space else [0.0] * 6
+        if _flag(kwargs, 'ro', 'rotation'):
+            return node.get('rotate')
+        raise NotImplementedError("xform: unsupported query {0}".format(sorted(kwargs)))
+    relative = _flag(kwargs, 'r', 'relative', default=False)
+    for node in nodes:
+        matrix = _flag(kwargs, 'm', 'matrix')
+        if matrix is not None:
+            matrix = [float(v) for v in matrix]
+            if relative:
+                matrix = _scene.mult(matrix, node.world() if world_space else node.local())
+            if world_space:
+                node.set_world(matrix)
+            else:
+                node.set_local(matrix)
+        translate = _flag(kwargs, 't', 'translation')
+        if translate is not None:
+            translate = [float(v) for v in translate]
+            if world_space:
+                world = node.world()
+                world[12:15] = [a + b for a, b in zip(world[12:15], translate)] if relative else translate
+                node.set_world(world)
+            else:
+                node.set('translate', [a + b for a, b in zip(node.get('translate'), translate)] if relative else translate)
+                Scene.touch()
+        # Pivots aren't modelled, so centering or placing them changes nothing
+
+def move(*args, **kwargs):
+    values = [float(v) for v in args[:3]]
+    targets = _flatten(args[3:]) or [node.name for node in scene.selection]
+    relative = _flag(kwargs, 'r', 'relative', default=False)
+    local = _flag(kwargs, 'ls', 'localSpace', 'os', 'objectSpace', default=False)
+    for target in targets:
+        node = scene.node(target)
+        component = target.split('.', 1)[1] if '.' in target else None
+        if component:
+            if component.startswith('cv['):
+                shape = node if node.type in _scene.SHAPE_TYPES else next(child for child in node.children if child.type in _scene.SHAPE_TYPES)
+                index = int(component[3:-1])
+                cv = shape.cvs[index % len(shape.cvs)]
+                shape.cvs[index % len(shape.cvs)] = [a + b for a, b in zip(cv, values)] if relative else values
+            continue
+        if local:
+            current = node.get('translate')
+            node.set('translate', [a + b for a, b in zip(current, values)] if relative else values)
+            Scene.touch()
+        else:
+            world = node.world()
+            world[12:15] = [a + b for a, b in zip(world[12:15], values)] if relative else values
+            node.set_world(world)
+
+def rotate(*args, **kwargs):
+    values = [float(v) for v in args[:3]]
+    relative = _flag(kwargs, 'r', 'relative', default=False)
+    for node in _targets(args[3:]):
+        current = node.get('rotate')
+        node.set('rotate', [a + b for a, b in zip(current, values)] if relative else values)
+    Scene.touch()
+
+def scale(*args, **kwargs):
+    values = [float(v) for v in args[:3]]
+    relative = _flag(kwargs, 'r', 'relative', default=False)
+    targets = _flatten(args[3:])
+    components = [target for target in targets if '.cv[' in target]
+    for target in components:
+        # CVs are scaled about their object's origin, whatever the pivot
+        node = scene.node(target)
+        shape = node if node.type in _scene.SHAPE_TYPES else next(child for child in node.children if child.type in _scene.SHAPE_TYPES)
+        shape.cvs = [[a * b for a, b in zip(cv, values)] for cv in shape.cvs]
+    if components:
+        return
+    for node in _targets(args[3:]):
+        current = node.get('scale')
+        node.set('scale', [a * b for a, b in zip(current, values)] if relative else values)
+    Scene.touch()
+
+def matchTransform(source, target, **kwargs):
+    source, target = scene.node(source), scene.node(target)
+    only = [flag for flag in ('pos', 'rot', 'scl') if kwargs.get(flag)]
+    world = target.world()
+    if only == ['pos']:
+        matched = source.world()
+        matched[12:15] = world[12:15]
+        world = matched
+    source.set_world(world)
+
+def makeIdentity(*args, **kwargs):
+    apply = _flag(kwargs, 'a', 'apply', default=False)
+    flags = {key: _flag(kwargs, key[0], key, default=None) for key in ('translate', 'rotate', 'scale')}
+    if not any(value is not None for value in flags.values()):
+        flags = dict(translate=True, rotate=True, scale=True)
+    for node in _targets(args):
+        if apply:
+            _freeze(node, bool(flags['translate']), bool(flags['rotate']), bool(flags['scale']))
+        else:
+            if flags['translate']:
+                node.set('translate', [0, 0, 0])
+            if flags['rotate']:
+                node.set('rotate', [0, 0, 0])
+            if flags['scale']:
+                node.set('scale', [1, 1, 1])
+            Scene.touch()
+
+def _freeze(node, translate, rotate, scale):
+    """Bakes the chosen transforms into the node's children, like Freeze Transformations"""
+    if not node.is_transform:
+        return
+    before = node.local()
+    if node.type == 'joint':
+        if rotate:
+            node.set('jointOrient', _scene.euler(_scene.mult(_scene.rotation(node.get('rotate')), _scene.rotation(node.get('jointOrient')))))
+            node.set('rotate', [0, 0, 0])
+        translate = False
+    else:
+        if rotate:
+            node.set('rotate', [0, 0, 0])
+    if translate:
+        node.set('translate', [0, 0, 0])
+    if scale:
+        node.set('scale', [1, 1, 1])
+    Scene.touch()
+    baked = _scene.mult(before, _scene.inverse(node.local()))
+    for child in node.children:
+        if child.type in _scene.SHAPE_TYPES:
+            child.cvs = [_scene.transform_point(cv, baked) for cv in child.cvs]
+        elif child.is_transform:
+            child.set_local(_scene.mult(child.local(), baked))
+            _freeze(child, translate, rotate, scale)
+
+# Joints -----------------------------------------------------------------------------------------
+
+def joint(*args, **kwargs):
+    if _flag(kwargs, 'q', 'query'):
+        node = _targets(args)[0]
+        if _flag(kwargs, 'p', 'position'):
+            return node.world()[12:15]
+        raise NotImplementedError("joint: unsupported query {0}".format(sorted(kwargs)))
+    if _flag(kwargs, 'e', 'edit'):
+        for node in _targets(args):
+            orient = _flag(kwargs, 'oj', 'orientJoint')
+            if orient is not None:
+                _orient_joint(node, orient, _flag(kwargs, 'sao', 'secondaryAxisOrient', default='xup'))
+            orientation = _flag(kwargs, 'o', 'orientation')
+            if orientation is not None:
+                node.set('jointOrient', [float(v) for v in orientation])
+            compensate = _flag(kwargs, 'sc', 'scaleCompensate')
+            if compensate is not None:
+                node.set('segmentScaleCompensate', bool(compensate))
+        Scene.touch()
+        return
+    selected = [node for node in scene.selection if node.type == 'joint']
+    node = scene.create('joint', _flag(kwargs, 'n', 'name', default='joint#'), selected[0] if selected else None)
+    position = _flag(kwargs, 'p', 'position')
+    if position is not None:
+        world = list(_scene.IDENTITY)
+        world[12:15] = [float(v) for v in position]
+        node.set_world(world)
+        node.set('jointOrient', [0, 0, 0])
+        Scene.touch()
+    scene.selection = [node]
+    return node.name
+
+def _orient_joint(node, orient, secondary):
+    """Points the joint's X axis at its first child joint, keeping its children in place"""
+    children = [child for child in node.children if child.is_transform]
+    worlds = [child.world() for child in children]
+    world = node.world()
+    if orient == 'none':
+        rot = list(_scene.IDENTITY)
+    else:
+        joints_ = [child for child in children if child.type == 'joint']
+        if not joints_:
+            return
+        direction = [a - b for a, b in zip(joints_[0].world()[12:15], world[12:15])]
+        up = {'xup': [1, 0, 0], 'yup': [0, 1, 0], 'zup': [0, 0, 1], 'xdown': [-1, 0, 0], 'ydown': [0, -1, 0], 'zdown': [0, 0, -1]}.get(secondary, [0, 1, 0])
+        rot = _scene.aim(direction, up)
+    oriented = list(rot)
+    oriented[12:15] = world[12:15]
+    node.set('rotate', [0, 0, 0])
+    node.set('scale', [1, 1, 1])
+    node.set_world(oriented)
+    for child, child_world in zip(children, worlds):
+        child.set_world(child_world)
+
+def mirrorJoint(root, **kwargs):
+    search, replace = _flag(kwargs, 'sr', 'searchReplace', default=(None, None))
+    behavior = _flag(kwargs, 'mb', 'mirrorBehavior', default=False)
+    mirror = _scene.scaling([-1, 1, 1])
+    ret = []
+
+    def copy(node, parent_node):
+        name = node.name.replace(search, replace) if search else node.name
+        dup = scene.create(node.type, name, parent_node)
+        dup.dynamic = {key: dict(value) for key, value in node.dynamic.items()}
+        dup.values = {key: value for key, value in node.values.items() if key in node.dynamic}
+        world = node.world()
+        t, rot, s = _scene.decompose(world)
+        rows = [_scene.transform_vector(rot[r * 4:r * 4 + 3], mirror) for r in range(3)]
+        # Flip axes so the result stays a rotation
+        signs = (-1, -1, -1) if behavior else (1, 1, -1)
+        rot = [v * sign for row, sign in zip(rows, signs) for v in row + [0]] + [0, 0, 0, 1]
+        for r in range(3):
+            rot[r * 4 + 3] = 0
+        rot[12:15] = [-t[0], t[1], t[2]]
+        dup.set_world(_scene.mult(_scene.scaling(s), rot))
+        ret.append(dup.name)
+        for child in node.children:
+            if child.type == 'joint':
+                copy(child, dup)
+        return dup
+
+    copy(scene.node(root), scene.node(root).parent)
+    return ret
+
+def ikHandle(**kwargs):
+    start = scene.node(_flag(kwargs, 'sj', 'startJoint'))
+    end = scene.node(_flag(kwargs, 'ee', 'endEffector'))
+    handle = scene.create('ikHandle', _flag(kwargs, 'n', 'name', default='ikHandle#'))
+    handle.set_world(_scene.translation(end.world()[12:15]))
+    effector = scene.create('ikEffector', 'effector#', end.parent)
+    scene.connections[(handle, 'startJoint')] = (start, 'message')
+    scene.connections[(handle, 'endEffector')] = (effector, 'handlePath[0]')
+    scene.selection = [handle]
+    return [handle.name, effector.name]
+
+def cluster(*args, **kwargs):
+    targets = _targets(args)
+    name = _flag(kwargs, 'n', 'name', default='cluster#')
+    deformer = scene.create('cluster', name)
+    handle = scene.create('clusterHandle', name + 'Handle')
+    for target in targets:
+        scene.connections[(deformer, 'input[{0}]'.format(len(scene.connections)))] = (target, 'worldSpace[0]')
+    scene.connections[(deformer, 'matrix')] = (handle, 'worldMatrix[0]')
+    scene.selection = [handle]
+    return [deformer.name, handle.name]
+
+# Constraints ------------------------------------------------------------------------------------
+
+def _constraint(type_, args, kwargs):
+    names = _flatten(args)
+    if len(names) < 2:
+        names = [node.name for node in scene.selection] + names
+    targets = [scene.node(name) for name in names[:-1]]
+    constrained = scene.node(names[-1])
+    existing = [child for child in constrained.children if child.type == type_]
+    if existing:
+        node = existing[0]
+    else:
+        node = scene.create(type_, _flag(kwargs, 'n', 'name', default='{0}_{1}#'.format(constrained.name, type_)), constrained)
+        node.values['count'] = 0
+    weight = _flag(kwargs, 'w', 'weight', default=1.0)
+    for target in targets:
+        index = node.values['count']
+        node.values['count'] += 1
+        node.dynamic['{0}W{1}'.format(target.name, index)] = dict(type='double', default=weight)
+        scene.connections[(node, 'target[{0}].targetParentMatrix'.format(index))] = (target, 'worldMatrix[0]')
+    scene.connections[(constrained, 'translate' if type_ != 'orientConstraint' else 'rotate')] = (node, 'constraintTranslate')
+    return [node.name]
+
+def parentConstraint(*args, **kwargs):
+    return _constraint('parentConstraint', args, kwargs)
+
+def pointConstraint(*args, **kwargs):
+    return _constraint('pointConstraint', args, kwargs)
+
+def orientConstraint(*args, **kwargs):
+    return _constraint('orientConstraint', args, kwargs)
+
+def scaleConstraint(*args, **kwargs):
+    return _constraint('scaleConstraint', args, kwargs)
+
+def poleVectorConstraint(*args, **kwargs):
+    return _constraint('poleVectorConstraint', args, kwargs)
+
+def aimConstraint(*args, **kwargs):
+    """Creates the constraint, and orients the constrained object right away since callers delete it to bake the rotation"""
+    ret = _constraint('aimConstraint', args, kwargs)
+    names = _flatten(args)
+    target, constrained = scene.node(names[0]), scene.node(names[-1])
+    world = constrained.world()
+    up = list(_flag(kwargs, 'wu', 'worldUpVector', default=(0, 1, 0)))
+    rot = _scene.aim([a - b for a, b in zip(target.world()[12:15], world[12:15])], up)
+    rot[12:15] = world[12:15]
+    t, _, s = _scene.decompose(world)
+    aimed = _scene.mult(_scene.scaling(s), rot)
+    if constrained.type == 'joint':
+        # Constraints drive rotate, leaving the joint orient alone
+        local = _scene.mult(aimed, _scene.inverse(_scene.mult(constrained.get('offsetParentMatrix'), constrained.parent_world())))
+        jo_inverse = _scene.inverse(_scene.rotation(constrained.get('jointOrient')))
+        constrained.set('rotate', _scene.euler(_scene.mult(_scene.decompose(local)[1], jo_inverse)))
+        Scene.touch()
+    else:
+        constrained.set_world(aimed)
+    return ret
+
+# Curves -----------------------------------------------------------------------------------------
+
+def _curve_node(name, points, parent_node=None):
+    transform = scene.create('transform', name, parent_node)
+    shape = scene.create('nurbsCurve', transform.name + 'Shape', transform)
+    shape.cvs = [[float(v) for v in point] for point in points]
+    return transform, shape
+
+def circle(*args, **kwargs):
+    normal = _scene._normalize([float(v) for v in _flag(kwargs, 'nr', 'normal', default=(0, 0, 1))])
+    radius = float(_flag(kwargs, 'r', 'radius', default=1.0))
+    sweep = math.radians(float(_flag(kwargs, 'sw', 'sweep', default=360)))
+    u = _scene._normalize(_scene._cross(normal, [0, 0, 1] if abs(normal[2]) < 0.9 else [1, 0, 0]))
+    v = _scene._cross(normal, u)
+    count = 8
+    points = []
+    for i in range(count):
+        angle = sweep * i / (count if sweep >= 2 * math.pi else count - 1)
+        points.append([radius * (math.cos(angle) * a + math.sin(angle) * b) for a, b in zip(u, v)])
+    transform, shape = _curve_node(_flag(kwargs, 'n', 'name', default='nurbsCircle#'), points)
+    scene.selection = [transform]
+    if _flag(kwargs, 'ch', 'constructionHistory', default=True):
+        history = scene.create('makeNurbCircle', 'makeNurbCircle#')
+        history.history = True
+        scene.connections[(shape, 'create')] = (history, 'outputCurve')
+        return [transform.name, history.name]
+    return [transform.name]
+
+def curve(*args, **kwargs):
+    points = [list(point) for point in _flag(kwargs, 'p', 'point', default=[])]
+    transform, _ = _curve_node(_flag(kwargs, 'n', 'name', default='curve#'), points)
+    scene.selection = [transform]
+    return transform.name
+
+def textCurves(*args, **kwargs):
+    text = _flag(kwargs, 't', 'text', default='')
+    top = scene.create('transform', 'Text_{0}_#'.format(text))
+    for i, char in enumerate(text):
+        letter = scene.create('transform', 'Char_{0}_#'.format(char), top)
+        _curve_node('curve#', [[i, 0, 0], [i + 0.5, 1, 0], [i + 1, 0, 0], [i, 0, 0]], letter)
+    history = scene.create('makeTextCurves', 'makeTextCurves#')
+    history.history = True
+    scene.connections[(top, 'message')] = (history, 'outputCurve')
+    scene.selection = [top]
+    return [top.name, history.name]
+
+# Nodes ------------------------------------------------------------------------------------------
+
+def createNode(type_, **kwargs):
+    parent_node = scene.node(kwargs['p']) if 'p' in kwargs else None
+    return scene.create(type_, _flag(kwargs, 'n', 'name', default=type_ + '#'), parent_node).name
+
+def shadingNode(type_, **kwargs):
+    return scene.create(type_, _flag(kwargs, 'n', 'name', default=type_ + '#')).name
+
+def __getattr__(name):
+    raise AttributeError("The Maya stand-in has no command `{0}`".format(name))
@@ -0,0 +1,9 @@
+"""
+Stand-in for `maya.utils`. Without an event loop, deferred calls run immediately.
+"""
+
+def executeDeferred(function, *args):
+    function(*args)
+
+def executeInMainThreadWithResult(function, *args):
+    return function(*args)
@@ -0,0 +1,120 @@
+import hashlib
+import importlib.util
+import os
+from maya import cmds
+from typing import Dict, List
+from .core import *
+
+"""
+On-disk cache of generated rigs.
+
+Rigs are stored as Maya ASCII files named after a hash of the marker group and the code that builds from it.
+The least recently used files are evicted once the cache grows past `MAX_SIZE` bytes.
+"""
+
+CACHE_DIR = os.environ.get('MAYARIG_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.mayarig', 'cache'))
+MAX_SIZE = int(os.environ.get('MAYARIG_CACHE_SIZE', 2 * 1024 ** 3))
+EXTENSION = '.ma'
+
+_CORE_MODULES = ['attributes', 'colors', 'controls', 'geometry', 'groups', 'joints', 'naming', 'nodes', 'schedule', 'selection', 'spline']
+# Modules deciding what gets built and in which order, hashed by path since they import this one
+_BUILD_MODULES = ['editor']
+
+def key(registered_generators: Dict[str, object]) -> str:
+    """Returns a hash of the active character's markers and the code versions of the build and the generators"""
+    digest = hashlib.sha1()
+    digest.update(naming.marker_grp.encode())
+    digest.update(naming.bind_grp.encode())
+    modules = ['.core.' + name for name in _CORE_MODULES] + ['.' + name for name in _BUILD_MODULES]
+    modules += [registered_generators[name].__name__ for name in sorted(registered_generators)]
+    for module in modules:
+        digest.update(_source(module))
+    for marker in _markers():
+        digest.update(marker.encode())
+        digest.update(repr([round(val, 5) for val in cmds.xform(marker, q=True, m=True, ws=True)]).encode())
+        for attr in cmds.listAttr(marker, ud=True) or []:
+            digest.update(attr.encode())
+            digest.update(repr(attributes.get(marker, attr)).encode())
+    return digest.hexdigest()
+
+def load(key: str) -> bool:
+    """Replaces the active character's rig with the cached one, if there is one"""
+    path = _path(key)
+    if not os.path.exists(path):
+        return False
+    existing = [grp for grp in rig_groups() if exists(grp)]
+    if existing:
+        cmds.delete(existing)
+    cmds.file(path, i=True, type='mayaAscii', defaultNamespace=True, ignoreVersion=True, preserveReferences=True)
+    assemble()
+    os.utime(path)
+    return True
+
+def store(key: str):
+    """Saves the active character's rig to the cache, evicting old entries if needed"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    prev_selection = selection.get()
+    selection.set_(rig_groups())
+    cmds.file(
+        _path(key),
+        exportSelected=True,
+        type='mayaAscii',
+        force=True,
+        constructionHistory=True,
+        channels=True,
+        constraints=True,
+        expressions=True,
+        shader=False
+    )
+    selection.set_(prev_selection)
+    evict()
+
+def evict(max_size: int = None):
+    """Deletes the least recently used cache entries until the cache fits in `max_size` bytes"""
+    if max_size is None:
+        max_size = MAX_SIZE
+    if not os.path.isdir(CACHE_DIR):
+        return
+    entries = []
+    for file_name in os.listdir(CACHE_DIR):
+        if file_name.endswith(EXTENSION):
+            stat = os.stat(os.path.join(CACHE_DIR, file_name))
+            entries.append((stat.st_mtime, stat.st_size, file_name))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    while entries and total > max_size:
+        _, size, file_name = entries.pop(0)
+        os.remove(os.path.join(CACHE_DIR, file_name))
+        total -= size
+
+def clear():
+    evict(0)
+
+def rig_groups() -> List[str]:
+    """The groups making up a generated rig, excluding the character's geometry"""
+    return [naming.control_grp, naming.bind_grp, naming.driver_grp, naming.systems_grp]
+
+def assemble():
+    """Rebuilds the character hierarchy around freshly imported rig groups"""
+    groups.push_front(n=naming.geometry_grp)
+    groups.push_front(
+        [
+            naming.geometry_grp,
+            naming.bind_grp,
+            naming.driver_grp,
+            naming.systems_grp
+        ],
+        n=naming.no_touch_grp)
+    groups.push_front([naming.control_grp, naming.no_touch_grp], n=naming.character_grp)
+
+# Helper methods ---------------------------------------------------------------------------------
+
+def _path(key: str) -> str:
+    return os.path.join(CACHE_DIR, key + EXTENSION)
+
+def _source(module: str) -> bytes:
+    with open(importlib.util.find_spec(module, __package__).origin, 'rb') as file:
+        return file.read()
+
+def _markers() -> List[str]:
+    return cmds.listRelatives(naming.marker_grp, ad=True, type='joint', fullPath=True) or []
@@ -1,2 +1,18 @@
-from . import attributes, colors, controls, groups, joints, naming, nodes, selection
-from .naming import Side, Suffix, exists
\ No newline at end of file
+import importlib
+
+"""
+Submodules are imported when first used, so `naming`, `colors` and `geometry` can be used without Maya,
+and importing the package stays quick. `from .core import *` still imports all of them.
+"""
+
+_MODULES = ['attributes', 'colors', 'controls', 'debounce', 'geometry', 'groups', 'joints', 'naming', 'nodes', 'selection', 'trace']
+_NAMES = {'Side': 'naming', 'Suffix': 'naming', 'exists': 'naming'}
+
+__all__ = _MODULES + list(_NAMES)
+
+def __getattr__(name: str):
+    if name in _MODULES:
+        return importlib.import_module('.' + name, __name__)
+    if name in _NAMES:
+        return getattr(importlib.import_module('.' + _NAMES[name], __name__), name)
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
@@ -0,0 +1,161 @@
+from contextlib import contextmanager
+from maya import cmds
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
+import numpy as np
+from typing import Iterator, List, Tuple
+
+"""
+Bulk sampling and keying of transforms.
+
+Matrices of many nodes are read in a single sweep over the frame range and decomposed into channels with NumPy.
+Keys are written through cmds, a whole curve per setAttr call, so they can be undone with the rest of the scene.
+"""
+
+CHANNELS = ['translateX', 'translateY', 'translateZ', 'rotateX', 'rotateY', 'rotateZ', 'scaleX', 'scaleY', 'scaleZ']
+CURVE_TYPES = ['animCurveTL'] * 3 + ['animCurveTA'] * 3 + ['animCurveTU'] * 3
+# Largest error allowed when simplifying each channel, in scene units, radians and scale factors
+TOLERANCES = np.array([0.01] * 3 + [np.radians(0.1)] * 3 + [0.001] * 3)
+# Frames sampled per block, bounding the size of the sample arrays
+BLOCK = 1000
+
+@contextmanager
+def suspended():
+    """Suspends viewport refresh and keeps the current frame"""
+    frame = oma.MAnimControl.currentTime()
+    cmds.refresh(suspend=True)
+    try:
+        yield
+    finally:
+        oma.MAnimControl.setCurrentTime(frame)
+        cmds.refresh(suspend=False)
+
+def frames(start: float, end: float, step: float = 1.0) -> np.ndarray:
+    return np.arange(start, end + step / 2, step)
+
+def sweep(plugs: List[str], times: np.ndarray, block: int = BLOCK, vectors: List[str] = None) -> Iterator[tuple]:
+    """Steps through `times` once, yielding blocks of (times, (len(times), len(plugs), 4, 4) matrices) of the matrix plugs.
+    With `vectors`, each block also holds the (len(times), len(vectors), 3) values of those double3 plugs."""
+    sel = om.MSelectionList()
+    for plug in plugs + (vectors or []):
+        sel.add(plug)
+    vector_plugs = [sel.getPlug(len(plugs) + i) for i in range(len(vectors or []))]
+    plugs = [sel.getPlug(i) for i in range(len(plugs))]
+    unit = om.MTime.uiUnit()
+    for start in range(0, len(times), block):
+        chunk = times[start:start + block]
+        matrices = np.empty((len(chunk), len(plugs), 16))
+        values = np.empty((len(chunk), len(vector_plugs), 3))
+        for i, frame in enumerate(chunk):
+            oma.MAnimControl.setCurrentTime(om.MTime(frame, unit))
+            for j, plug in enumerate(plugs):
+                matrices[i, j] = om.MFnMatrixData(plug.asMObject()).matrix()
+            for j, plug in enumerate(vector_plugs):
+                values[i, j] = [plug.child(k).asDouble() for k in range(3)]
+        if vectors is None:
+            yield chunk, matrices.reshape(len(chunk), len(plugs), 4, 4)
+        else:
+            yield chunk, matrices.reshape(len(chunk), len(plugs), 4, 4), values
+
+def sample(plugs: List[str], times: np.ndarray) -> np.ndarray:
+    """The (len(times), len(plugs), 4, 4) matrices of the matrix plugs, read in one sweep"""
+    return np.concatenate([matrices for _, matrices in sweep(plugs, times)])
+
+def evaluate(plug: str, times: np.ndarray) -> np.ndarray:
+    """Values of a plug at each of `times`, read off its animation curve if it has one"""
+    source = om.MSelectionList().add(plug).getPlug(0).connectedTo(True, False)
+    if source and source[0].node().hasFn(om.MFn.kAnimCurve):
+        curve = oma.MFnAnimCurve(source[0].node())
+        unit = om.MTime.uiUnit()
+        return np.array([curve.evaluate(om.MTime(time, unit)) for time in times.tolist()])
+    return np.full(len(times), float(cmds.getAttr(plug)))
+
+def channels(matrices: np.ndarray, orients: np.ndarray = None) -> np.ndarray:
+    """Decomposes (..., 4, 4) local matrices into (..., 9) translate, XYZ rotate (radians) and scale values.
+    `orients` are the (..., 3, 3) joint orient rotations to take out of the rotation, if any."""
+    scale = np.linalg.norm(matrices[..., :3, :3], axis=-1)
+    rotation = matrices[..., :3, :3] / scale[..., np.newaxis]
+    if orients is not None:
+        rotation = rotation @ np.swapaxes(orients, -1, -2)
+    return np.concatenate([matrices[..., 3, :3], euler_xyz(rotation), scale], axis=-1)
+
+def euler_xyz(rotation: np.ndarray) -> np.ndarray:
+    """(..., 3) XYZ euler angles in radians of (..., 3, 3) rotation matrices"""
+    y = np.arcsin(np.clip(-rotation[..., 0, 2], -1, 1))
+    gimbal = np.abs(rotation[..., 0, 2]) > 1 - 1e-9
+    x = np.where(gimbal, 0, np.arctan2(rotation[..., 1, 2], rotation[..., 2, 2]))
+    z = np.where(gimbal, np.arctan2(-rotation[..., 1, 0], rotation[..., 1, 1]), np.arctan2(rotation[..., 0, 1], rotation[..., 0, 0]))
+    return np.stack([x, y, z], axis=-1)
+
+def rotation_xyz(angles: np.ndarray) -> np.ndarray:
+    """(..., 3, 3) rotation matrices of (..., 3) XYZ euler angles in radians"""
+    cos, sin = np.cos(angles), np.sin(angles)
+    one, zero = np.ones_like(angles[..., 0]), np.zeros_like(angles[..., 0])
+    x = np.stack([one, zero, zero, zero, cos[..., 0], sin[..., 0], zero, -sin[..., 0], cos[..., 0]], axis=-1)
+    y = np.stack([cos[..., 1], zero, -sin[..., 1], zero, one, zero, sin[..., 1], zero, cos[..., 1]], axis=-1)
+    z = np.stack([cos[..., 2], sin[..., 2], zero, -sin[..., 2], cos[..., 2], zero, zero, zero, one], axis=-1)
+    shape = angles.shape[:-1] + (3, 3)
+    return x.reshape(shape) @ y.reshape(shape) @ z.reshape(shape)
+
+def unwrap(angles: np.ndarray, previous: np.ndarray = None) -> np.ndarray:
+    """Removes 360 degree jumps between frames along the first axis, continuing from the `previous` frame if given"""
+    if previous is None:
+        return np.unwrap(angles, axis=0)
+    return np.unwrap(np.concatenate([previous[np.newaxis], angles]), axis=0)[1:]
+
+def simplify(times: np.ndarray, values: np.ndarray, tolerance: float) -> np.ndarray:
+    """Returns which keys to keep so linear interpolation stays within `tolerance` of every value (Ramer-Douglas-Peucker)"""
+    keep = np.zeros(len(values), dtype=bool)
+    keep[[0, -1]] = True
+    spans = [(0, len(values) - 1)]
+    while spans:
+        first, last = spans.pop()
+        if last - first < 2:
+            continue
+        t = (times[first + 1:last] - times[first]) / (times[last] - times[first])
+        error = np.abs(values[first + 1:last] - (values[first] + t * (values[last] - values[first])))
+        i = int(np.argmax(error))
+        if error[i] > tolerance:
+            split = first + 1 + i
+            keep[split] = True
+            spans.append((first, split))
+            spans.append((split, last))
+    return keep
+
+def create_curve(type_: str, plug: str, times: np.ndarray, values: np.ndarray) -> str:
+    """Creates an unconnected animation curve named after `plug`, with linear keys at `times`, setting every key in one call.
+    Values of angle curves are in radians."""
+    curve = cmds.createNode(type_, n=plug.split('|')[-1].replace('.', '_'))
+    if type_ == 'animCurveTA':
+        values = np.degrees(values)
+    cmds.setAttr(
+        '{0}.keyTimeValue[0:{1}]'.format(curve, len(times) - 1),
+        *np.stack([times, values], axis=-1).ravel().tolist())
+    cmds.keyTangent(curve, itt='linear', ott='linear')
+    return curve
+
+def key(plugs: List[str], times: np.ndarray, values: np.ndarray, simplify_to: np.ndarray = None):
+    """Keys each plug with the matching column of (len(times), len(plugs)) values, replacing its keys in that range.
+    With `simplify_to`, each column only gets the keys needed to stay within the matching tolerance."""
+    for i, plug in enumerate(plugs):
+        keep = simplify(times, values[:, i], simplify_to[i]) if simplify_to is not None else slice(None)
+        curve = create_curve(curve_type(plug), plug, times[keep], values[keep, i])
+        if cmds.listConnections(plug, s=True, d=False, type='animCurve'):
+            # Keys outside the range stay on the existing curve
+            cmds.copyKey(curve)
+            cmds.pasteKey(plug, time=(times[0], times[-1]), option='replace')
+            cmds.delete(curve)
+        else:
+            cmds.connectAttr(curve + '.output', plug)
+
+def curve_type(plug: str) -> str:
+    """The type of animation curve that keys the plug"""
+    return {'doubleLinear': 'animCurveTL', 'doubleAngle': 'animCurveTA'}.get(cmds.getAttr(plug, type=True), 'animCurveTU')
+
+def settable(plugs: List[str]) -> List[bool]:
+    """Whether each plug can be keyed, meaning it is neither locked nor driven by anything but an animation curve"""
+    ret = []
+    for plug in plugs:
+        driver = cmds.listConnections(plug, s=True, d=False)
+        ret.append(not cmds.getAttr(plug, lock=True) and (not driver or cmds.nodeType(driver[0]).startswith('animCurve')))
+    return ret
@@ -1,4 +1,4 @@
-from typing import Any, List
+from typing import Any, Dict, List, Tuple
 from maya import cmds
 import maya.api.OpenMaya as om
 from .naming import attr_path, exists
@@ -17,7 +17,7 @@ def set_(obj: str, attr: str, value, type_: str=None, lock:bool=False, keyable:b
         type_='string'
     if type_ in ['bool', 'short', 'long', 'float', 'double', 'int', 'float']:
         type_=None
-    if hasattr(value, '__iter__') or isinstance(value, om.MVector) and not isinstance(value, str):
+    if (hasattr(value, '__iter__') or isinstance(value, om.MVector)) and not isinstance(value, str):
         print('Passed iterable')
         if type_:
             return cmds.setAttr(attr_path(obj, attr), *value, type=type_, l=lock, k=keyable, cb=channelBox)
@@ -101,30 +101,42 @@ def delete(obj:str, attribute: str):
     cmds.deleteAttr(attr_path(obj, attribute))
 
 def delete_except(obj, keep:List[str]):
-    if isinstance(obj, list):
-        for item in obj:
-            delete_all(item)
-        return
-    attrs = cmds.listAttr(obj, ud=True)
-    if attrs:
-        unlock(obj, attrs)
-        for attr in attrs:
-            if attr in keep:
-                continue
-            cmds.setAttr(attr_path(obj, attr), lock=False)
-            cmds.deleteAttr(attr_path(obj, attr))
+    if not isinstance(obj, list):
+        obj = [obj]
+    remove([(item, attr) for item, attr in _user_attributes(obj) if attr not in keep])
 
 def delete_all(obj):
-    if isinstance(obj, list):
-        for item in obj:
-            delete_all(item)
+    if not isinstance(obj, list):
+        obj = [obj]
+    remove(_user_attributes(obj))
+
+def remove(pairs:List[Tuple[str, str]]):
+    """Unlock and delete all the given (node, attribute) pairs, with one `deleteAttr` per attribute name"""
+    by_node: Dict[str, List[str]] = dict()
+    for obj, attr in pairs:
+        by_node.setdefault(obj, []).append(attr)
+    if not by_node:
         return
-    attrs = cmds.listAttr(obj, ud=True)
-    if attrs:
-        unlock(obj, attrs)
+    sel = om.MSelectionList()
+    for obj in by_node:
+        sel.add(obj)
+
+    # The API is only used to query, the scene is changed through cmds so the removal can be undone
+    by_attr: Dict[str, List[str]] = dict()
+    for i, (obj, attrs) in enumerate(by_node.items()):
+        node = sel.getDependNode(i)
+        fn = om.MFnDependencyNode(node)
         for attr in attrs:
-            cmds.setAttr(attr_path(obj, attr), lock=False)
-            cmds.deleteAttr(attr_path(obj, attr))
+            if not fn.hasAttribute(attr):
+                raise Exception("Attribute doesn't exist:", attr_path(obj, attr))
+            attribute = fn.attribute(attr)
+            if not om.MFnAttribute(attribute).parent.isNull():
+                continue  # Goes along with its compound parent
+            if om.MPlug(node, attribute).isLocked:
+                cmds.setAttr(attr_path(obj, attr), lock=False)
+            by_attr.setdefault(attr, []).append(obj)
+    for attr, objs in by_attr.items():
+        cmds.deleteAttr(objs, at=attr)
 
 def increment(obj:str, attr:str, val):
     set_(obj, attr, get(obj, attr) + val)
@@ -138,6 +150,9 @@ def multiply(obj: str, attr: str, val):
 def divide(obj: str, attr: str, val):
     set_(obj, attr, get(obj, attr) / val)
 
+def _user_attributes(objs:List[str]) -> List[Tuple[str, str]]:
+    return [(obj, attr) for obj in objs for attr in cmds.listAttr(obj, ud=True) or []]
+
 def add_control_size(obj:str, default:float = 1):
     add(obj, CONTROL_SCALE, default, type_='float', keyable=True)
     set_range(obj, CONTROL_SCALE, min_=0.0)
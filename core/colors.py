@@ -1,5 +1,3 @@
-from maya import cmds
-from . import attributes
 PALLETTE = {
     'shadow red':       (0.389, 0.040, 0.000),
     'shadow orange':    (0.498, 0.153, 0.000),
@@ -27,6 +25,7 @@ PALLETTE = {
 }
 
 def set_(obj:str, color):
+    from maya import cmds
     if isinstance(color, tuple):
         return cmds.color(obj, rgb=color)
     if isinstance(color, int):
@@ -1,21 +1,30 @@
 import math
 from maya import cmds
 import maya.api.OpenMaya as om
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
-from . import naming, groups, attributes, nodes, selection, joints
-from .naming import Side, Suffix
+from . import naming, geometry, groups, attributes, nodes, selection, joints, trace
+from .naming import Side, Suffix, exists
+
+SOURCE_MARKER_ATTR = 'sourceMarker'
+BUILT_SCALE_ATTR = 'builtScale'
+# Attributes on an FK/IK switch listing the limb's controls and joints, for matching
+IK_LIMB_ATTRS = ['fkControls', 'fkJoints', 'ikJoints', 'ikControl', 'poleControl']
 
 # Control curves
 
+@trace.traced
 def circle(name:str, suffix:str, joint:str, parent:str, flipped:bool=False, * , radius:float=4, normal:Tuple[float, float, float]=(1, 0, 0), offset:Tuple[float, float, float] = (0, 0, 0)):
     name = naming.replace(joint, name=name, suffix=suffix)
-    radius *= attributes.get_control_size(joint)
+    scale = attributes.get_control_size(joint)
+    radius *= scale
     
     ret = cmds.circle(n=name, nr = normal, r=radius)[0]
+    _record_scale(ret, joint, scale)
 
     return _match_joint(ret, joint, parent=parent, offset=offset)
 
+@trace.traced
 def ellipse(name:str, suffix:str, joint:str, parent:str, * , normal:Tuple[float, float, float]=(1, 0, 0), size:Tuple[float, float, float]=(4, 4, 4)):
     name = naming.replace(joint, name=name, suffix=suffix)
     scale=attributes.get_control_size(joint)
@@ -27,11 +36,46 @@ def ellipse(name:str, suffix:str, joint:str, parent:str, * , normal:Tuple[float,
         ret
     )
     cmds.makeIdentity(a=True, s=True)
+    _record_scale(ret, joint, scale)
     return _match_joint(ret, joint, parent=parent)
 
+@trace.traced
+def ellipse_chain(names:List[str], suffix:str, joints_:List[str], parent:str, normals:List[Tuple[float, float, float]], * , size:Tuple[float, float, float]=(4, 4, 4)) -> List[str]:
+    """Creates a nested chain of `ellipse` controls, one per joint, each parented to the previous one.
+    Transforms are read once up front, and each control's rest pose is written straight to its
+    offset parent matrix, so the cost per control doesn't grow with the length of the chain."""
+    sel = om.MSelectionList()
+    for joint in joints_:
+        sel.add(joint)
+    worlds = [sel.getDagPath(i).inclusiveMatrix() for i in range(sel.length())]
+    parent_world = om.MMatrix(cmds.xform(parent, q=True, m=True, ws=True)) if parent else om.MMatrix()
+
+    ret = []
+    for name, joint, normal, world in zip(names, joints_, normals, worlds):
+        name = naming.replace(joint, name=name, suffix=suffix)
+        scale = attributes.get_control_size(joint)
+        ctrl = cmds.circle(n=name, nr=normal, r=1, ch=False)[0]
+        shape = om.MFnNurbsCurve(om.MSelectionList().add(ctrl).getDagPath(0).extendToShape())
+        shape.setCVPositions(om.MPointArray([
+            om.MPoint(cv.x * scale * size[0], cv.y * scale * size[1], cv.z * scale * size[2])
+            for cv in shape.cvPositions()
+        ]))
+        shape.updateCurve()
+        _record_scale(ctrl, joint, scale)
+
+        if parent:
+            ctrl = cmds.parent(ctrl, parent, r=True)[0]
+        cmds.setAttr(attributes.attr_path(ctrl, 'offsetParentMatrix'), world * parent_world.inverse(), type='matrix')
+        ret.append(ctrl)
+        parent = ctrl
+        parent_world = world
+    return ret
+
+@trace.traced
 def square(name: str, suffix:str, joint:str, parent:str, flipped:bool=False, * , size:float=4, slide:float=0):
     name=naming.replace(joint, name=name, suffix=suffix)
-    size *= attributes.get_control_size(joint)
+    scale = attributes.get_control_size(joint)
+    size *= scale
     if flipped:
         slide = -slide
     ret = cmds.curve(n=name, d=1, p=[
@@ -41,11 +85,14 @@ def square(name: str, suffix:str, joint:str, parent:str, flipped:bool=False, * ,
         (slide, -size,  size),
         (slide, -size, -size)
     ])
+    _record_scale(ret, joint, scale)
     return _match_joint(ret, joint, parent=parent)
 
+@trace.traced
 def ik_pole(name: str, joint: str, parent:str=None, * , size:float=2, dist:float=2.0, center_on_parent:bool=False):
     name = naming.replace(joint, name=name, suffix='pole')
-    r = 0.5 * size * attributes.get_control_size(joint)
+    scale = attributes.get_control_size(joint)
+    r = 0.5 * size * scale
 
     ret = cmds.curve(n=name, d=1, p=[
         ( r, 0, 0),
@@ -68,12 +115,15 @@ def ik_pole(name: str, joint: str, parent:str=None, * , size:float=2, dist:float
     circle_z = cmds.circle(nr=(0, 0, 1), r=radius)[0]
     ret = _combine([circle_x, circle_y, circle_z], name)
 """
+    _record_scale(ret, joint, scale)
     pos = _pole_position(joint, dist, center_on_parent=center_on_parent)
     return _to_pos(ret, pos, parent)
 
+@trace.traced
 def ik_switch(name: str, joint:str, offset, parent:str, flipped=False, * , size:float=5):
     name = naming.replace(joint, name=name, suffix=Suffix.IK_SWITCH)
-    size *= attributes.get_control_size(joint)
+    scale = attributes.get_control_size(joint)
+    size *= scale
     fk = _text_curve('fk#', text='FK', scale=size)
     ik = _text_curve('ik#', 'IK', scale=size)
 
@@ -81,6 +131,7 @@ def ik_switch(name: str, joint:str, offset, parent:str, flipped=False, * , size:
     ik_curves = cmds.listRelatives(ik, shapes=True)
 
     ctrl = _combine([fk, ik], name)
+    _record_scale(ctrl, joint, scale)
     cmds.matchTransform(ctrl, joint, pos=True)
     if flipped:
         offset = (-offset[0], offset[1], offset[2])
@@ -101,6 +152,19 @@ def ik_switch(name: str, joint:str, offset, parent:str, flipped=False, * , size:
 
     return ctrl, inverter
 
+def record_ik_limb(switch: str, fk_controls: List[str], fk_joints: List[str], ik_joints: List[str], ik_control: str, pole: str):
+    """Stores the controls and joints on both sides of an FK/IK switch on the switch control"""
+    values = [fk_controls, fk_joints, ik_joints, [ik_control], [pole]]
+    for attr, value in zip(IK_LIMB_ATTRS, values):
+        attributes.add(switch, attr, ' '.join(value), type_='string', lock=True, hidden=True)
+
+def ik_limb(switch: str) -> Dict[str, List[str]]:
+    """The controls and joints recorded on an FK/IK switch control"""
+    if not exists(switch, IK_LIMB_ATTRS[0]):
+        raise Exception("Not an FK/IK switch with limb information: " + switch)
+    return {attr: attributes.get(switch, attr).split() for attr in IK_LIMB_ATTRS}
+
+@trace.traced
 def foot(name:str, ankle:str, heel:str, toe:str, inner:str, outer:str, parent:str, flipped=False):
     heel_pos = om.MVector(cmds.joint(heel, q=True, p=True))
     toe_pos = om.MVector(cmds.joint(toe, q=True, p=True))
@@ -127,9 +191,11 @@ def foot(name:str, ankle:str, heel:str, toe:str, inner:str, outer:str, parent:st
     )
     return _match_joint(ankle_ctrl, ankle, parent=parent)
 
+@trace.traced
 def circle_with_arrows(name:str, suffix:str, joint:str = None, parent:str = None, * , offset = (0, 0, 0), radius=12, arrow_width=0.125, arrow_length=0.125):
     if joint:
-        radius *= attributes.get_control_size(joint)
+        scale = attributes.get_control_size(joint)
+        radius *= scale
         name = naming.replace(joint, name=name, suffix=suffix)
     else:
         name = naming.compose(Side.CENTER, name, suffix)
@@ -165,10 +231,12 @@ def circle_with_arrows(name:str, suffix:str, joint:str = None, parent:str = None
     cmds.rotate(0, 90, 0, quarter4, r=True)
     ret = _combine([quarter1, quarter2, quarter3, quarter4], name=name)
     if joint:
+        _record_scale(ret, joint, scale)
         return _match_joint(ret, joint, parent=parent, offset=offset)
     else:
         return _to_pos(ret, offset, parent)
 
+@trace.traced
 def saddle(name:str, suffix:str, joint:str, parent:str, * , radius:float=8.0, depth:float=4.0, normal:Tuple[float, float, float]=(0, 1, 0), offset:Tuple[float, float, float] = (0, 0, 0)):
     name = naming.replace(joint, name=name, suffix=suffix)
     size = attributes.get_control_size(joint)
@@ -180,12 +248,15 @@ def saddle(name:str, suffix:str, joint:str, parent:str, * , radius:float=8.0, de
 
     cmds.move(depth_offset.x, depth_offset.y, depth_offset.z, ret+".cv[3]", ret+".cv[7]", r=True)
     cmds.move(-depth_offset.x, -depth_offset.y, -depth_offset.z, ret+".cv[1]", ret+".cv[5]", r=True)
+    _record_scale(ret, joint, size)
 
     return _match_joint(ret, joint, parent=parent, offset=offset)
 
+@trace.traced
 def finger_root(name:str, suffix:str, joint:str, parent:str, flipped=False, * , offset = 2.0, size = 1.0):
     name=naming.replace(joint, name=name, suffix=suffix)
-    size *= attributes.get_control_size(joint)
+    scale = attributes.get_control_size(joint)
+    size *= scale
     offset *= size
     if flipped:
         offset = -offset
@@ -198,8 +269,53 @@ def finger_root(name:str, suffix:str, joint:str, parent:str, flipped=False, * ,
         (0, size,  offset + size),
         (0, 0,     offset)
     ])
+    _record_scale(ret, joint, scale)
     return _match_joint(ret, joint, parent=parent)
 
+# Resizing ---------------------------------------------------------------------------------------
+
+@trace.traced
+def rescale(ctrls: List[str] = None) -> List[str]:
+    """Resize controls in place to match the current control scale of their source markers.
+    Defaults to every control in the scene. Returns the controls that changed size."""
+    if ctrls is None:
+        ctrls = cmds.ls('*.' + SOURCE_MARKER_ATTR, o=True) or []
+    if not ctrls:
+        return []
+    sel = om.MSelectionList()
+    for ctrl in ctrls:
+        sel.add(ctrl)
+
+    marker_scales = dict()
+    ret = []
+    for i in range(sel.length()):
+        node = om.MFnDependencyNode(sel.getDependNode(i))
+        if not node.hasAttribute(SOURCE_MARKER_ATTR) or not node.hasAttribute(BUILT_SCALE_ATTR):
+            continue
+        marker = node.findPlug(SOURCE_MARKER_ATTR, False).asString()
+        if marker not in marker_scales:
+            marker_scales[marker] = attributes.get_control_size(marker) if exists(marker) else None
+        scale = marker_scales[marker]
+        built_scale = node.findPlug(BUILT_SCALE_ATTR, False).asDouble()
+        if scale is None or built_scale <= 0 or scale == built_scale:
+            continue
+
+        # Written through cmds rather than the API so the resize can be undone
+        factor = scale / built_scale
+        path = sel.getDagPath(i)
+        name = path.partialPathName()
+        cvs = [
+            om.MFnDagNode(path.child(j)).partialPathName() + '.cv[*]'
+            for j in range(path.childCount()) if path.child(j).hasFn(om.MFn.kNurbsCurve)
+        ]
+        if cvs:
+            # Scaling uniformly about the control's origin scales its CVs in object space
+            matrix = path.inclusiveMatrix()
+            cmds.scale(factor, factor, factor, cvs, r=True, p=[matrix.getElement(3, axis) for axis in range(3)])
+        cmds.setAttr(attributes.attr_path(name, BUILT_SCALE_ATTR), scale)
+        ret.append(name)
+    return ret
+
 # Transformations --------------------------------------------------------------------------------
 
 def display_transform(controller, target, systems_group):
@@ -234,6 +350,7 @@ def set_rest_pose(obj: str):
     reset_transforms(obj)
     return obj
 
+@trace.traced
 def space_switch(
     target: str,
     spaces_and_names: List[Tuple[str, str]],
@@ -312,6 +429,14 @@ def space_switch(
 
 # Helper methods ---------------------------------------------------------------------------------
 
+def _record_scale(control: str, joint: str, scale: float):
+    """Remember which marker sized the control, and at what scale, so it can be resized later"""
+    marker = naming.replace(joint, suffix=Suffix.marker)
+    if not exists(marker):
+        marker = naming.flip(marker)
+    attributes.add(control, SOURCE_MARKER_ATTR, marker, type_='string', hidden=True)
+    attributes.add(control, BUILT_SCALE_ATTR, scale, type_='float', hidden=True)
+
 def _match_joint(control: str, joint: str, * , offset = (0, 0, 0), parent: str):
     cmds.matchTransform(control, joint)
     if parent:
@@ -344,11 +469,12 @@ def _pole_position(obj: str, distance: float, center_on_parent=False):
     parent = cmds.listRelatives(obj, parent=True)[0]
     children = cmds.listRelatives(obj, children=True)
 
-    obj_pos = om.MVector(cmds.joint(obj, q=True, p=True, a=True))
-    parent_pos = om.MVector(cmds.joint(parent, q=True, p=True, a=True))
-    child_pos = om.MVector(cmds.joint(children[0], q=True, p=True, a=True))
-
-    pole_vec = ((obj_pos - parent_pos).normalize() + (obj_pos - child_pos).normalize()).normalize()
+    obj_pos = cmds.joint(obj, q=True, p=True, a=True)
+    pole_vec = om.MVector(geometry.pole_direction(
+        cmds.joint(parent, q=True, p=True, a=True),
+        obj_pos,
+        cmds.joint(children[0], q=True, p=True, a=True)))
+    obj_pos = om.MVector(obj_pos)
 
     parent_pos = om.MVector(cmds.xform(parent, q=True, rp=True, ws=True))
     distance *= (obj_pos - parent_pos).length()
@@ -0,0 +1,30 @@
+import threading
+import maya.utils
+
+class Debouncer:
+    """Collapses bursts of `trigger` calls into one call of `callback` on Maya's main thread,
+    made once no trigger has arrived for `window` seconds."""
+    def __init__(self, callback, window: float):
+        self.callback = callback
+        self.window = window
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def trigger(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.window, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+            self._timer = None
+
+    def _fire(self):
+        with self._lock:
+            self._timer = None
+        maya.utils.executeDeferred(self.callback)
@@ -0,0 +1,38 @@
+import math
+from typing import Tuple
+
+"""
+Vector math behind pole placement and joint orientation, on plain (x, y, z) tuples.
+Needs no Maya, so it can be used from any Python.
+"""
+
+Vector = Tuple[float, float, float]
+
+def pole_direction(parent: Vector, joint: Vector, child: Vector) -> Vector:
+    """The direction a pole vector points from the middle joint of a chain, away from the bend"""
+    return normalize(add(normalize(sub(joint, parent)), normalize(sub(joint, child))))
+
+def normal(parent: Vector, joint: Vector, child: Vector, * , other_side=False) -> Vector:
+    """The normal of the plane through three joints"""
+    ret = normalize(cross(sub(parent, joint), sub(child, joint)))
+    return scale(ret, -1) if other_side else ret
+
+def add(a: Vector, b: Vector) -> Vector:
+    return (a[0] + b[0], a[1] + b[1], a[2] + b[2])
+
+def sub(a: Vector, b: Vector) -> Vector:
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+def scale(a: Vector, factor: float) -> Vector:
+    return (a[0] * factor, a[1] * factor, a[2] * factor)
+
+def cross(a: Vector, b: Vector) -> Vector:
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+def length(a: Vector) -> float:
+    return math.sqrt(a[0] * a[0] + a[1] * a[1] + a[2] * a[2])
+
+def normalize(a: Vector) -> Vector:
+    """`a` scaled to unit length; like MVector, a zero vector stays zero"""
+    size = length(a)
+    return scale(a, 1 / size) if size else (0.0, 0.0, 0.0)
@@ -1,15 +1,20 @@
+from contextlib import contextmanager
 from maya import cmds
 import maya.api.OpenMaya as om
-from typing import List, Tuple
+from typing import Dict, List, NamedTuple, Tuple
 
 from . import naming
-from .naming import Side, Suffix, exists
-from . import attributes, colors, selection
+from .naming import Side, Suffix, attr_path, exists
+from . import attributes, colors, geometry, selection, trace
 
 GENERATOR_ATTRIBUTE = 'autorig_limb'
 SYMMETRY_ATTRIBUTE = 'symmetrical'
 JOINT_TYPE_ATTR = 'MayaRigJoint'
 BIND_ATTR = 'Bind'
+LOCAL_CHANNELS = ['translate', 'rotate', 'scale', 'jointOrient', 'rotateOrder']
+
+# Existing joints `variants` may keep instead of duplicating, mapped to their type
+_reusable: Dict[str, str] = None
 
 def get_chain(root: str) -> List[str]:
     """Returns a list of the root's child joints in the same generator."""
@@ -26,36 +31,159 @@ def get_chain(root: str) -> List[str]:
             frontier.extend(children)
     return chain
 
+class Limb(NamedTuple):
+    generator: str
+    chain: List[str]
+    symmetrical: bool
+    parent: str  # Root of the limb this one hangs off, if any
+
+@trace.traced
+def partition(group: str) -> List[Limb]:
+    """Splits the joints under `group` into limbs with a single hierarchy traversal.
+    Limbs come before the limbs parented to them, and each chain is ordered like `get_chain`."""
+    paths = cmds.listRelatives(group, ad=True, type='joint', fullPath=True)
+    if not paths:
+        return []
+    roots = (
+        set(cmds.ls([attr_path(path, GENERATOR_ATTRIBUTE) for path in paths], o=True, long=True) or []) &
+        set(cmds.ls([attr_path(path, SYMMETRY_ATTRIBUTE) for path in paths], o=True, long=True) or [])
+    )
+
+    # listRelatives lists descendants deepest first, so reversing it visits parents first
+    children: Dict[str, List[str]] = {path: [] for path in paths}
+    top = []
+    for path in reversed(paths):
+        parent = _joint_ancestor(path, children)
+        if parent:
+            children[parent].append(path)
+        else:
+            top.append(path)
+
+    # Find the outermost limb roots, looking through joints that don't belong to a limb
+    pending = []
+    frontier = list(top)
+    while frontier:
+        path = frontier.pop()
+        if path in roots:
+            pending.append((path, None))
+        else:
+            frontier.extend(children[path])
+    pending.reverse()
+
+    ret = []
+    for root, parent_limb in pending:
+        chain = []
+        frontier = [root]
+        while frontier:
+            path = frontier.pop()
+            chain.append(_short_name(path))
+            for child in children[path]:
+                if child in roots:
+                    pending.append((child, _short_name(root)))
+                else:
+                    frontier.append(child)
+        ret.append(Limb(
+            generator=attributes.get(root, GENERATOR_ATTRIBUTE),
+            chain=chain,
+            symmetrical=attributes.get(root, SYMMETRY_ATTRIBUTE),
+            parent=parent_limb
+        ))
+    return ret
+
+@trace.traced
+def prune_limbs(limbs: List[Limb]) -> List[Limb]:
+    """Drops the joints deleted since the limbs were partitioned, and the limbs whose root was deleted"""
+    remaining = set(cmds.ls([joint for limb in limbs for joint in limb.chain]) or [])
+    return [
+        limb._replace(chain=[joint for joint in limb.chain if joint in remaining])
+        for limb in limbs if limb.chain[0] in remaining
+    ]
+
 def get_child(root:str) -> str:
     return cmds.listRelatives(root, type='joint')[0]
 
 def get_children(root:str) -> List[str]:
     return cmds.listRelatives(root, type='joint')
 
+@trace.traced
 def variants(joints: List[str], suffix:str, * , parent_if_exists=False, clear_attributes=False, keep_root=False, root_parent = None) -> List[str]:
     """Creates a duplicate of the given joints, keeping internal parent/child relationships
     Does not recreate bones if they exist already.
+    Names and parents are worked out for the whole batch first, then applied with one reparent per destination.
     """
-    dups = cmds.duplicate(joints, po=True, n='temp')
-    ret = []
-    for i in range(len(dups)):
-        new_joint = naming.replace(joints[i], suffix=suffix)
-        cmds.rename(dups[i], new_joint)
-        ret.append(new_joint)
-        if not keep_root:
-            clear_root(new_joint)
-        if clear_attributes:
-            attributes.delete_all(new_joint)
-        
-        current_parent = get_parent(new_joint)
+    ret = [naming.replace(joint, suffix=suffix) for joint in joints]
+    index = {new_joint: i for i, new_joint in enumerate(ret)}
+    desired_parents = [naming.replace(parent, suffix=suffix) if parent else None for parent in _parents(joints)]
+    preexisting = set(cmds.ls([parent for parent in desired_parents if parent]) or [])
+    reused = _claim(joints, ret)
+
+    copies = [(joint, new_joint) for joint, new_joint in zip(joints, ret) if new_joint not in reused]
+    if copies:
+        dups = cmds.duplicate([joint for joint, _ in copies], po=True, n='temp')
+        for dup, (_, new_joint) in zip(dups, copies):
+            cmds.rename(dup, new_joint)
+
+    if clear_attributes:
+        attributes.delete_all(ret)
+    elif not keep_root:
+        root_attrs = cmds.ls([attr_path(new_joint, attr) for new_joint in ret for attr in (GENERATOR_ATTRIBUTE, SYMMETRY_ATTRIBUTE)])
+        attributes.remove([tuple(path.split('.', 1)) for path in root_attrs or []])
+
+    sources = set(joints)
+    moves: Dict[str, List[str]] = dict()
+    for i, (new_joint, current_parent) in enumerate(zip(ret, _parents(ret))):
         if i == 0 and root_parent and current_parent != root_parent:
-            cmds.parent(new_joint, root_parent)
-        elif parent_if_exists or current_parent in joints:
-            desired_parent = naming.replace(get_parent(joints[i]), suffix=suffix)
-            if current_parent != desired_parent and exists(desired_parent):
-                cmds.parent(new_joint, desired_parent)
+            moves.setdefault(root_parent, []).append(new_joint)
+        elif parent_if_exists or current_parent in sources:
+            desired_parent = desired_parents[i]
+            # Only parents created earlier in the batch, or already in the scene, are used
+            available = index.get(desired_parent, i) < i or desired_parent in preexisting
+            if current_parent != desired_parent and available:
+                moves.setdefault(desired_parent, []).append(new_joint)
+    for parent, children in moves.items():
+        cmds.parent(children, parent)
+    for joint, new_joint in zip(joints, ret):
+        if new_joint in reused:
+            for channel in LOCAL_CHANNELS:
+                value = cmds.getAttr(attr_path(joint, channel))
+                if isinstance(value, list):
+                    cmds.setAttr(attr_path(new_joint, channel), *value[0])
+                else:
+                    cmds.setAttr(attr_path(new_joint, channel), value)
     return ret
 
+@contextmanager
+def reusing(existing: List[str]):
+    """While active, `variants` keeps any of the `existing` joints with the same name and type as a variant,
+    matching its transform instead of duplicating a new joint.
+    Yields the list of joints that were not kept, which is filled in on exit."""
+    global _reusable
+    _reusable = {joint: _type(joint) for joint in existing}
+    unclaimed = []
+    try:
+        yield unclaimed
+    finally:
+        unclaimed.extend(joint for joint in _reusable if exists(joint))
+        _reusable = None
+
+def remove(joints_: List[str]):
+    """Deletes the joints, moving any other children up to their closest remaining ancestor"""
+    if not joints_:
+        return
+    removed = set(joints_)
+    for joint in joints_:
+        children = [child for child in get_children(joint) or [] if child not in removed]
+        if not children:
+            continue
+        ancestor = get_parent(joint)
+        while ancestor in removed:
+            ancestor = get_parent(ancestor)
+        if ancestor:
+            cmds.parent(children, ancestor)
+        else:
+            cmds.parent(children, world=True)
+    cmds.delete(joints_)
+
 def prune(joint):
     """Removes the joint from the hierarchy, transferring any children to its parent"""
     cmds.parent(get_children(joint), get_parent(joint))
@@ -101,6 +229,7 @@ def clear_root(joint:str):
     if exists(joint, SYMMETRY_ATTRIBUTE):
         attributes.delete(joint, SYMMETRY_ATTRIBUTE)
 
+@trace.traced
 def mirror(joint: str, mirrorBehavior = True, parent_if_exists = True):
     """Mirror a joint and its children"""
     if exists(naming.flip(joint)):
@@ -145,6 +274,46 @@ def marker(side:Side, name:str, pos:Tuple[float, float, float], type_:str = None
     attributes.add(ret, BIND_ATTR, bind, type_='bool')
     return ret
 
+def _parents(objs: List[str]) -> List[str]:
+    """The parent of each object, looked up in one pass"""
+    sel = om.MSelectionList()
+    for obj in objs:
+        sel.add(obj)
+    ret = []
+    for i in range(sel.length()):
+        parent = om.MFnDagNode(sel.getDagPath(i)).parent(0)
+        ret.append(None if parent.hasFn(om.MFn.kWorld) else om.MFnDagNode(parent).name())
+    return ret
+
+def _claim(joints_: List[str], names: List[str]) -> List[str]:
+    """Claims the reusable joints matching the variants to be made, and renames any of the wrong type out of the way"""
+    if _reusable is None:
+        return []
+    ret = []
+    for joint, name in zip(joints_, names):
+        if name not in _reusable:
+            continue
+        if _reusable.pop(name) == _type(joint):
+            ret.append(name)
+        else:
+            stale = cmds.rename(name, name + '_stale#')
+            _reusable[stale] = None
+    return ret
+
+def _type(joint: str) -> str:
+    return attributes.get(joint, JOINT_TYPE_ATTR) if exists(joint, JOINT_TYPE_ATTR) else None
+
+def _joint_ancestor(path: str, joints_: Dict[str, List[str]]) -> str:
+    """The closest ancestor of the full path that is one of the given joints"""
+    while '|' in path:
+        path = path[:path.rfind('|')]
+        if path in joints_:
+            return path
+    return None
+
+def _short_name(path: str) -> str:
+    return path[path.rfind('|') + 1:]
+
 def _flip_joint_orientation(joint):
     children = cmds.listRelatives(joint, c=True)
     if children:
@@ -161,6 +330,7 @@ def offset_to(joint, joint2=None) -> om.MVector:
     pos2 = om.MVector(cmds.joint(joint2, q=True, p=True))
     return pos2 - pos
 
+@trace.traced
 def orient(joint, flip_right = True, secondaryAxisOrient='yup', twist=0):
     if isinstance(joint, list):
         for obj in joint:
@@ -215,16 +385,10 @@ def twist_align(obj:str, normal, flip_right=True, twist=0):
         cmds.parent(children, obj)
 
 def get_normal(objects:List[str], * , other_side = False):
-    pos0 = om.MVector(cmds.joint(objects[0], q=True, p=True))
-    pos1 = om.MVector(cmds.joint(objects[1], q=True, p=True))
-    pos2 = om.MVector(cmds.joint(objects[2], q=True, p=True))
-
-    to_parent = pos0 - pos1
-    to_child =  pos2 - pos1
-
-    normal = om.MVector((to_parent ^ to_child).normalize())
-    return -normal if other_side else normal
+    positions = [cmds.joint(obj, q=True, p=True) for obj in objects[:3]]
+    return om.MVector(geometry.normal(*positions, other_side=other_side))
 
+@trace.traced
 def coplanar_orient(obj: str, flip_right=True, plane_child=None, other_side=False):
     parent = cmds.listRelatives(obj, parent=True)[0]
     if not plane_child:
@@ -1,10 +1,12 @@
 import re
 from typing import List, Tuple
 from enum import Enum
-from maya import cmds
 """
 Naming Conventions:
 General format: [initial]_([l/r]_)[bone]_[suffix]
+
+Only `exists` and `new` look at the scene, and they load Maya when they are first called,
+so the rest of this module can be used outside of Maya.
 """
 
 class Side(str, Enum):
@@ -49,6 +51,8 @@ driver_grp = None
 systems_grp = None
 control_grp = None
 no_touch_grp = None
+preview_grp = None
+symmetry_grp = None
 
 root_control = None
 cog_control = None
@@ -63,6 +67,8 @@ def set_active_character(name: str, initials: str):
     global systems_grp
     global control_grp
     global no_touch_grp
+    global preview_grp
+    global symmetry_grp
     global root_control
 
     _name = name
@@ -76,12 +82,15 @@ def set_active_character(name: str, initials: str):
     control_grp = _initials + '_CONTROLS'
     systems_grp = _initials + '_SYSTEMS'
     no_touch_grp = _initials + '_DO_NOT_TOUCH'
+    preview_grp = _initials + '_PREVIEW'
+    symmetry_grp = _initials + '_SYMMETRY'
 
     
 
 # Query scene ------------------------------------------------------------------------------------
 
 def exists(obj: str, attribute: str = None) -> bool:
+    from maya import cmds
     if attribute:
         return cmds.objExists(attr_path(obj, attribute))
     return cmds.objExists(obj)
@@ -174,6 +183,7 @@ def _name_start(name: str):
     )
 
 def _increment_until_free(name: str):
+    from maya import cmds
     while (cmds.objExists(name)):
         name = _increment_name(name)
     return name
@@ -55,4 +55,30 @@ def matrixParent(source: str, target: str, connect=True):
     attributes.connect(target_parent, 'worldInverseMatrix[0]', offset_mat, 'matrixIn[2]')
     if connect:
         attributes.connect(offset_mat, 'matrixSum', target, 'offsetParentMatrix')
-    return offset_mat
\ No newline at end of file
+    return offset_mat
+
+def matrixConstraint(source: str, target: str, offset: om.MMatrix = None):
+    """
+    Returns a matMult node that keeps the target at its current offset from the source,
+    standing in for a parent and scale constraint pair with maintained offset.
+
+    The offset is precomputed at build time, and drives the target's offset parent matrix.
+    Callers that already know it can pass it in: for a source placed exactly on the target,
+    it's the inverse of the target's local matrix.
+    """
+    target_parent = cmds.listRelatives(target, p=True)[0]
+    offset_mat = matMult(naming.replace(
+        target,
+        name="{0}To{1}".format(naming.get_name(target), naming.get_name(source)),
+        suffix='matrix_constraint'
+    ))
+    if offset is None:
+        # Cancel out the target's own transform, which stays applied on top of the offset parent matrix
+        local = om.MMatrix(cmds.xform(target, q=True, m=True, ws=False))
+        offset = local.inverse() * om.MMatrix(attributes.get(target, 'worldMatrix[0]')) * om.MMatrix(attributes.get(source, 'worldInverseMatrix[0]'))
+
+    attributes.set_(offset_mat, 'matrixIn[0]', offset, type_='matrix')
+    attributes.connect(source, 'worldMatrix[0]', offset_mat, 'matrixIn[1]')
+    attributes.connect(target_parent, 'worldInverseMatrix[0]', offset_mat, 'matrixIn[2]')
+    attributes.connect(offset_mat, 'matrixSum', target, 'offsetParentMatrix')
+    return offset_mat
@@ -0,0 +1,67 @@
+from typing import Dict, List, Tuple
+from .joints import Limb
+
+"""
+Build order of a character's limbs.
+
+Every limb depends on the limb its root hangs off, as `joints.partition` records it. Limbs are built in a topological
+order of those dependencies, so a limb always comes after the limb it is parented to, whatever order the hierarchy
+was listed in. Limbs without a dependency between them fall into the same batch, and could be planned concurrently.
+The critical path is the costliest chain of dependent limbs, the least time a build could take with unlimited batches.
+"""
+
+def dependencies(limbs: List[Limb]) -> Dict[str, List[str]]:
+    """The roots of the limbs each limb root depends on"""
+    roots = {limb.chain[0] for limb in limbs}
+    return {limb.chain[0]: [limb.parent] if limb.parent in roots else [] for limb in limbs}
+
+def batches(limbs: List[Limb]) -> List[List[Limb]]:
+    """Groups the limbs into batches that only depend on limbs in earlier batches, keeping their order within a batch"""
+    deps = dependencies(limbs)
+    placed = set()
+    remaining = list(limbs)
+    ret = []
+    while remaining:
+        ready = [limb for limb in remaining if all(dep in placed for dep in deps[limb.chain[0]])]
+        if not ready:
+            raise Exception("Limbs depend on each other in a cycle: " + ', '.join(limb.chain[0] for limb in remaining))
+        placed.update(limb.chain[0] for limb in ready)
+        remaining = [limb for limb in remaining if limb.chain[0] not in placed]
+        ret.append(ready)
+    return ret
+
+def order(limbs: List[Limb]) -> List[Limb]:
+    """The limbs with every limb after the limbs it depends on"""
+    return [limb for batch in batches(limbs) for limb in batch]
+
+def critical_path(limbs: List[Limb], costs: Dict[str, float] = None) -> Tuple[List[Limb], float]:
+    """The costliest chain of dependent limbs and its total cost.
+    `costs` maps limb roots to the time they take, and limbs missing from it cost their number of joints."""
+    costs = costs or dict()
+    deps = dependencies(limbs)
+    totals: Dict[str, float] = dict()
+    previous: Dict[str, Limb] = dict()
+    by_root = {limb.chain[0]: limb for limb in limbs}
+    for limb in order(limbs):
+        root = limb.chain[0]
+        before = max(deps[root], key=totals.get, default=None)
+        totals[root] = costs.get(root, len(limb.chain)) + (totals[before] if before else 0)
+        previous[root] = by_root[before] if before else None
+    if not totals:
+        return [], 0.0
+    last = by_root[max(totals, key=totals.get)]
+    path = []
+    while last:
+        path.append(last)
+        last = previous[last.chain[0]]
+    path.reverse()
+    return path, totals[path[-1].chain[0]]
+
+def costs(events: List[dict]) -> Dict[str, float]:
+    """Seconds spent on each limb, from the spans of a build trace tagged with the limb's root"""
+    ret: Dict[str, float] = dict()
+    for event in events:
+        limb = event.get('args', {}).get('limb')
+        if limb:
+            ret[limb] = ret.get(limb, 0.0) + event['dur'] * 1e-6
+    return ret
@@ -0,0 +1,55 @@
+import numpy as np
+
+"""
+Curve fitting for spline based limbs.
+
+Joints are parameterized by normalized chord length and weighted by the Bernstein polynomials of a Bezier curve.
+Fitting the curve to the joints gives the handle positions, and the weights say how much each handle moves each joint.
+"""
+
+def chord_parameters(points: np.ndarray) -> np.ndarray:
+    """Normalized distance along the polyline through `points`, from 0 at the first point to 1 at the last"""
+    points = np.asarray(points, dtype=float)
+    lengths = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    distance = np.concatenate(([0.0], np.cumsum(lengths)))
+    if distance[-1] == 0:
+        return np.linspace(0, 1, len(points))
+    return distance / distance[-1]
+
+def bernstein(t: np.ndarray, degree: int) -> np.ndarray:
+    """Returns a (len(t), degree + 1) matrix of Bernstein basis weights, each row summing to 1"""
+    t = np.asarray(t, dtype=float)[:, np.newaxis]
+    k = np.arange(degree + 1)
+    binomial = np.array([_binomial(degree, i) for i in k], dtype=float)
+    return binomial * t ** k * (1 - t) ** (degree - k)
+
+def fit(points: np.ndarray, degree: int = 2):
+    """Fit a Bezier curve through `points`, keeping its ends on the first and last point.
+
+    Returns:
+    t: the curve parameter of each point
+    weights: the (len(points), degree + 1) influence of each handle on each point
+    handles: the (degree + 1, 3) fitted handle positions
+    """
+    points = np.asarray(points, dtype=float)
+    t = chord_parameters(points)
+    weights = bernstein(t, degree)
+    handles = np.empty((degree + 1, points.shape[1]))
+    handles[0] = points[0]
+    handles[-1] = points[-1]
+    if degree > 1:
+        # Least squares for the inner handles, with the end handles pinned
+        residual = points - np.outer(weights[:, 0], handles[0]) - np.outer(weights[:, -1], handles[-1])
+        handles[1:-1] = np.linalg.lstsq(weights[:, 1:-1], residual, rcond=None)[0]
+    return t, weights, handles
+
+def evaluate(handles: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """Returns the points of the Bezier curve at the parameters `t`"""
+    handles = np.asarray(handles, dtype=float)
+    return bernstein(t, len(handles) - 1) @ handles
+
+def _binomial(n: int, k: int) -> int:
+    ret = 1
+    for i in range(1, k + 1):
+        ret = ret * (n - k + i) // i
+    return ret
@@ -0,0 +1,85 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import List
+
+"""
+Timeline of build stages, saved in the Chrome trace format.
+
+Open the saved file in chrome://tracing or https://ui.perfetto.dev to see which limb and step a build spends its time in.
+Nothing is recorded unless tracing is enabled, and traced functions then cost a single flag check.
+"""
+
+_enabled = False
+_events: List[dict] = []
+_start = 0.0
+
+def enable():
+    """Start recording spans, discarding any earlier ones"""
+    global _enabled, _start
+    _events.clear()
+    _start = time.perf_counter()
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+def events() -> List[dict]:
+    return list(_events)
+
+def save(path: str):
+    """Writes the recorded spans to `path` as Chrome trace JSON"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump({'traceEvents': _events, 'displayTimeUnit': 'ms'}, file)
+
+@contextmanager
+def span(name: str, category: str = 'build', **args):
+    """Records the time spent in the enclosed block"""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, category, start, args)
+
+def traced(fn):
+    """Records a span for every call to `fn` while tracing is enabled"""
+    name = fn.__module__.rsplit('.', 1)[-1] + '.' + fn.__name__
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _record(name, 'helper', start, None)
+    return wrapper
+
+# Helper methods ---------------------------------------------------------------------------------
+
+def _record(name: str, category: str, start: float, args: dict):
+    event = {
+        'name': name,
+        'cat': category,
+        'ph': 'X',
+        'ts': (start - _start) * 1e6,
+        'dur': (time.perf_counter() - start) * 1e6,
+        'pid': os.getpid(),
+        'tid': threading.get_ident()
+    }
+    if args:
+        event['args'] = args
+    _events.append(event)
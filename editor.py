@@ -1,8 +1,14 @@
+import os
+import time
 from maya import cmds
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 from .core import *
+from .core import schedule
 
-from .generators import simple, arm, leg, torso
+from .generators import simple, arm, leg, torso, spine
+from . import bake, cache, fitting, preview, progress, rollback, shapes, skinning, symmetry, validate
+
+GENERATORS = [simple, arm, leg, torso, spine]
 
 def open_():
     win = 'autorig_edit'
@@ -26,14 +32,42 @@ def open_():
     tabs = []
     registered_generators = dict()
 
-    register_generator(simple, tabs, createMenu, registered_generators)
-    register_generator(arm, tabs, createMenu, registered_generators)
-    register_generator(leg, tabs, createMenu, registered_generators)
-    register_generator(torso, tabs, createMenu, registered_generators)
+    for generator in GENERATORS:
+        register_generator(generator, tabs, createMenu, registered_generators)
 
     cmds.tabLayout(createTabs, edit=True, tabLabel=tabs)
     cmds.setParent(mainLayout)
-    cmds.button(label="Create Metarig", command=lambda _ : create_metarig(registered_generators), w=258)
+    cmds.columnLayout(parent=mainLayout, cat=('both', 4), w=258)
+    cache_field = cmds.checkBox(label='Use Build Cache', v=False)
+    keep_bind_field = cmds.checkBox(label='Keep Bind Joints', v=False)
+    trace_field = cmds.checkBox(label='Save Build Trace', v=False)
+    progressive_field = cmds.checkBox(label='Build in Background', v=False)
+    cmds.checkBox(
+        label='Live Preview',
+        v=preview.is_active(),
+        onCommand=lambda _ : preview.start(),
+        offCommand=lambda _ : preview.stop())
+    cmds.checkBox(
+        label='Symmetric Editing',
+        v=symmetry.is_active(),
+        onCommand=lambda _ : symmetry.start(),
+        offCommand=lambda _ : symmetry.stop())
+    cmds.setParent(mainLayout)
+    cmds.button(label="Fit Markers to Mesh", command=lambda _ : fitting.fit(), w=258)
+    cmds.button(
+        label="Create Metarig",
+        command=lambda _ : create_metarig(
+            registered_generators,
+            use_cache=cmds.checkBox(cache_field, q=True, v=True),
+            keep_bind=cmds.checkBox(keep_bind_field, q=True, v=True),
+            trace_path=_trace_path() if cmds.checkBox(trace_field, q=True, v=True) else None,
+            progressive=cmds.checkBox(progressive_field, q=True, v=True)),
+        w=258)
+    cmds.button(label="Update Control Scale", command=lambda _ : controls.rescale(), w=258)
+    cmds.button(label="Export Selected Shapes", command=lambda _ : shapes.export_selected(), w=258)
+    cmds.button(label="Apply Library Shapes", command=lambda _ : shapes.apply(), w=258)
+    cmds.button(label="Bind Geometry", command=lambda _ : skinning.bind(), w=258)
+    cmds.button(label="Bake Bind Joints", command=lambda _ : bake.bake(), w=258)
     cmds.showWindow()
     cmds.window(win, edit=True, w=100, h = 100)
 
@@ -42,51 +76,153 @@ def register_generator(generator, tabs:list, createMenu, registered_generators:d
     tabs.append((generator.create_menu(), generator.name))
     cmds.menuItem(parent=createMenu, label=generator.name)
 
-def create_metarig(registered_generators):
-    create_rig_groups()
-    create_driver_bones()
+def create_metarig(registered_generators, use_cache=False, trace_path=None, keep_bind=False, progressive=False):
+    """Generate the rig from the active character's markers.
+    With `use_cache`, an unchanged character is imported from the build cache instead of being rebuilt.
+    If the build fails, the previous rig is restored.
+    Skinned geometry is unbound before the build and rebound to the new bind joints with its saved weights.
+    With `keep_bind`, existing bind joints whose name and type still match are kept and only moved and re-driven,
+    so skinning on them is left in place. The build cache is not loaded from in this mode.
+    With `trace_path`, a timeline of the build stages is saved there in the Chrome trace format.
+    With `progressive`, the build runs a few steps at a time from Maya's idle queue behind a modal progress window,
+    and cancelling it restores the previous rig."""
+    steps = build_steps(registered_generators, use_cache, trace_path, keep_bind)
+    if progressive:
+        count = step_count(joints.partition(naming.marker_grp), use_cache, keep_bind and exists(naming.bind_grp))
+        progress.run(steps, 'Create Metarig', count=count)
+        return
+    for _ in steps:
+        pass
+
+def build_steps(registered_generators, use_cache=False, trace_path=None, keep_bind=False) -> Iterator[str]:
+    """The build of `create_metarig`, yielding a description of each step before running it.
+    Closing the generator part way restores the previous rig, like a failure."""
+    if trace_path:
+        trace.enable()
+    try:
+        yield 'Validating markers'
+        with trace.span('validate'):
+            errors = validate.markers(registered_generators)
+        if errors:
+            cmds.error("Invalid markers:\n  " + "\n  ".join(errors))
+
+        keep_bind = keep_bind and exists(naming.bind_grp)
+        with trace.span('skinning.save_weights'):
+            skinned = skinning.save_weights(unbind=not keep_bind)
+        failed = True
+        try:
+            yield from rollback.guarded(_build(registered_generators, use_cache, keep_bind))
+            failed = False
+        finally:
+            # Kept bind joints stay skinned, unless the rollback replaced them
+            if failed or not keep_bind:
+                with trace.span('skinning.restore_weights'):
+                    skinning.restore_weights(skinned)
+    finally:
+        if trace_path:
+            trace.disable()
+            trace.save(trace_path)
+            print("Saved build trace to", trace_path)
+
+def step_count(limbs: List[joints.Limb], use_cache=False, keep_bind=False) -> int:
+    """The number of steps `build_steps` yields for the marker limbs `limbs`, if the cache doesn't have the rig"""
+    by_root = {limb.chain[0]: limb for limb in limbs}
+    def mirrored(limb):
+        # Mirroring a limb mirrors the limbs parented to it along with it
+        while limb:
+            if limb.symmetrical:
+                return True
+            limb = by_root.get(limb.parent)
+        return False
+    # Validation and driver bones, the cache load and store, and the controllers and bind joints of every driver limb
+    cache_steps = (1 if use_cache else 0) + (1 if use_cache and not keep_bind else 0)
+    return 2 + cache_steps + 2 * sum(2 if mirrored(limb) else 1 for limb in limbs)
 
-    create_layout_control()
-    chains = get_roots()
-    for generator, chain in chains:
-        registered_generators[generator].create_controllers(chain)
+def _build(registered_generators, use_cache, keep_bind=False) -> Iterator[str]:
+    if use_cache:
+        with trace.span('cache.key'):
+            cache_key = cache.key(registered_generators)
+    if use_cache and not keep_bind:
+        yield 'Loading from the build cache'
+        with trace.span('cache.load'):
+            loaded = cache.load(cache_key)
+        if loaded:
+            attributes.set_(naming.no_touch_grp, 'visibility', False)
+            return
 
-    chains = get_roots()
-    for generator, chain in chains:
-        registered_generators[generator].create_bind_joints(chain)
+    yield 'Creating driver bones'
+    with trace.span('create_rig_groups'):
+        create_rig_groups(keep_bind)
+    with trace.span('create_driver_bones'):
+        create_driver_bones()
+
+    with trace.span('create_layout_control'):
+        create_layout_control()
+    limbs = schedule.order(joints.partition(naming.driver_grp))
+    progress.expect(2 * len(limbs) + (1 if use_cache else 0))
+    for limb in limbs:
+        yield 'Creating controllers for ' + limb.chain[0]
+        with trace.span(limb.generator + '.create_controllers', limb=limb.chain[0]):
+            registered_generators[limb.generator].create_controllers(limb.chain)
+
+    # Generators may have deleted driver joints, but never add any
+    remaining = joints.prune_limbs(limbs)
+    progress.expect(len(remaining) + (1 if use_cache else 0))
+    existing = (cmds.listRelatives(naming.bind_grp, ad=True, type='joint') or []) if keep_bind else []
+    with joints.reusing(existing) as unclaimed:
+        for limb in remaining:
+            yield 'Creating bind joints for ' + limb.chain[0]
+            with trace.span(limb.generator + '.create_bind_joints', limb=limb.chain[0]):
+                registered_generators[limb.generator].create_bind_joints(limb.chain)
+    if existing:
+        joints.remove(unclaimed)
+        # Kept joints stay bound while they move to their new markers
+        with trace.span('skinning.reset_bind_pose'):
+            skinning.reset_bind_pose([joint for joint in existing if joint not in unclaimed])
+        print("Kept {0} bind joints, removed {1}".format(len(existing) - len(unclaimed), len(unclaimed)))
+    if trace.is_enabled():
+        # Pruned limbs were still built on first, so the path runs through the scheduled ones
+        path, seconds = schedule.critical_path(limbs, schedule.costs(trace.events()))
+        print("Critical path of {0:.3f}s through {1} of {2} limbs: {3}".format(
+            seconds, len(path), len(limbs), ' -> '.join(limb.chain[0] for limb in path)))
     
     attributes.set_(naming.no_touch_grp, 'visibility', False)
 
+    if use_cache:
+        yield 'Storing in the build cache'
+        with trace.span('cache.store'):
+            cache.store(cache_key)
+
+def _trace_path() -> str:
+    directory = os.environ.get('MAYARIG_TRACE_DIR', os.path.join(os.path.expanduser('~'), '.mayarig', 'traces'))
+    return os.path.join(directory, '{0}_{1}.json'.format(naming.character_grp, time.strftime('%Y%m%d_%H%M%S')))
+
 def get_roots() -> List[Tuple[str, List[str]]]:
-    ret = []
-    all_drivers = cmds.listRelatives(naming.driver_grp, ad=True, type='joint')
-    roots = [obj for obj in all_drivers if joints.is_root(obj)]
-    for root in roots:
-        chain = joints.get_chain(root)
-        generator = joints.get_generator(root)
-        ret.append((generator, chain))
-    ret.reverse()
-    return ret
+    return [(limb.generator, limb.chain) for limb in schedule.order(joints.partition(naming.driver_grp))]
 
 def create_driver_bones():
     """Create driver bones from all limb roots"""
-    all_markers = cmds.listRelatives(naming.marker_grp, ad=True, type='joint')
-    roots = [obj for obj in all_markers if joints.is_root(obj)]
-    roots.reverse()
-    for root in roots:
+    for limb in schedule.order(joints.partition(naming.marker_grp)):
+        root = limb.chain[0]
         if exists(naming.replace(root, suffix=Suffix.DRIVER_JOINT)):
             continue
-        chain = joints.variants(joints.get_chain(root), suffix=Suffix.DRIVER_JOINT, parent_if_exists=True, keep_root=True)
+        chain = joints.variants(limb.chain, suffix=Suffix.DRIVER_JOINT, parent_if_exists=True, keep_root=True)
         cmds.makeIdentity(chain, a=True, r=True, s=True)
-        if joints.get_parent(root) == naming.marker_grp:
+        if limb.parent is None and joints.get_parent(root) == naming.marker_grp:
             cmds.parent(chain[0], naming.driver_grp)
-        if joints.is_symmetrical(root):
+        if limb.symmetrical:
             joints.mirror(chain[0])
 
-def create_rig_groups():
-    """Create or re-create the groups making up the final rig"""
+def create_rig_groups(keep_bind=False):
+    """Create or re-create the groups making up the final rig.
+    With `keep_bind`, the bind joints are kept and only their constraints are removed."""
     groups.push_front(n=naming.geometry_grp)
-    groups.recreate(n=naming.bind_grp)
+    if keep_bind and exists(naming.bind_grp):
+        constraints = cmds.listRelatives(naming.bind_grp, ad=True, type='constraint')
+        if constraints:
+            cmds.delete(constraints)
+    else:
+        groups.recreate(n=naming.bind_grp)
     groups.recreate(n=naming.driver_grp)
     groups.recreate(n=naming.systems_grp)
     
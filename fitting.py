@@ -0,0 +1,286 @@
+from maya import cmds
+import numpy as np
+from typing import Callable, Dict, List, NamedTuple
+from .core import *
+from . import skinning
+
+"""
+Places the active character's markers on the mesh in its geometry group.
+
+The mesh is expected in a T or A pose, standing on the ground plane with Y up, facing +Z, and its left side towards +X.
+All vertices are read into one array and sliced into horizontal cross sections. The cross sections give the floor,
+the crotch, the waist and the neck. Each arm is found past the sides of the torso and runs along its principal axis,
+and the cross sections across that axis give its root, its thinnest point at the wrist and its extremity at the fingertips.
+Joints are placed at the centroid of the cross section they fall in.
+
+Markers a mesh doesn't pin down, like fingers, clavicles and spine joints, keep their current layout,
+moved and scaled to fit between the joints that were placed.
+"""
+
+# Cross sections over the height of a dense mesh, and fewer for meshes with fewer vertices
+MAX_SLICES = 256
+MIN_SLICES = 32
+# Lateral offset from the center past which the sides of the body belong to the arms, as multiples of the waist half width
+ARM_START = 1.5
+# Lateral offset of the shoulder joints, as a multiple of the waist half width
+SHOULDER_WIDTH = 1.2
+# Height of the hip joints above the crotch, and thickness of the bands sampled around each joint, as fractions of the height
+HIP_HEIGHT = 0.02
+BAND = 0.01
+# Position of the ball of the foot from the heel to the toe
+BALL = 0.68
+# Cross sections along each arm
+ARM_SECTIONS = 64
+
+class Body(NamedTuple):
+    points: np.ndarray
+    floor: float
+    height: float
+    # X of the plane of symmetry
+    center: float
+    crotch: float
+    # Half width of the torso above the hips
+    waist: float
+    # Height and half width of each cross section through the center of the body, or 0 where it is empty
+    rows: np.ndarray
+    widths: np.ndarray
+
+def fit(meshes: List[str] = None) -> List[str]:
+    """Moves the markers of every arm, leg, torso and spine onto `meshes`, or the meshes in the geometry group.
+    Returns the markers that were moved."""
+    meshes = meshes or skinning.geometry()
+    if not meshes:
+        raise Exception("No meshes to fit the markers to in " + naming.geometry_grp)
+    with trace.span('fitting.points', meshes=len(meshes)):
+        points = np.concatenate([skinning.points(mesh) for mesh in meshes])
+    with trace.span('fitting.analyze', vertices=len(points)):
+        body = analyze(points)
+
+    moved = []
+    for limb in joints.partition(naming.marker_grp):
+        fitter = FITTERS.get(limb.generator)
+        if fitter is None:
+            print("No automatic fit for {0} limbs, leaving {1} in place".format(limb.generator, limb.chain[0]))
+            continue
+        markers = {naming.get_name(marker): marker for marker in limb.chain}
+        template = {name: np.array(cmds.xform(marker, q=True, ws=True, t=True)) for name, marker in markers.items()}
+        side = -1 if naming.get_side(limb.chain[0]) == Side.RIGHT else 1
+        with trace.span('fitting.' + limb.generator, limb=limb.chain[0]):
+            targets = fitter(body, template, side)
+        # Chains list parents first, so children are placed after the parent that carries them
+        for marker in limb.chain:
+            name = naming.get_name(marker)
+            if name in targets:
+                cmds.xform(marker, ws=True, t=targets[name].tolist())
+                moved.append(marker)
+    print("Fitted {0} markers to {1} vertices".format(len(moved), len(points)))
+    return moved
+
+def analyze(points: np.ndarray) -> Body:
+    """Finds the floor, center, crotch, waist and cross section widths of a body's vertices"""
+    low, high = points.min(axis=0), points.max(axis=0)
+    height = float(high[1] - low[1])
+    center = float(np.median(points[:, 0]))
+    slices = int(np.clip(np.sqrt(len(points)) / 4, MIN_SLICES, MAX_SLICES))
+    size = height / slices
+
+    # Occupancy of each cross section, projected onto X; vertices on the front and back fill in the interior
+    row = np.minimum(((points[:, 1] - low[1]) / size).astype(int), slices - 1)
+    reach = int(np.ceil(np.abs(points[:, 0] - center).max() / size))
+    column = np.rint((points[:, 0] - center) / size).astype(int) + reach
+    occupied = np.zeros((slices, 2 * reach + 1), dtype=bool)
+    occupied[row, column] = True
+    # Below the crotch, the legs leave the center empty
+    start = max(1, int(0.05 * slices))
+    filled = np.flatnonzero(occupied[start:, reach])
+    if not len(filled):
+        raise Exception("Couldn't find the crotch; the mesh should stand with its plane of symmetry at its median X")
+    crotch_row = start + int(filled[0])
+    # Close single cell gaps left by sparse vertices
+    occupied[:, 1:-1] |= occupied[:, :-2] & occupied[:, 2:]
+
+    # Each cross section's run of occupied cells through the center, which stops at the gaps between the body and the arms
+    empty = ~occupied
+    index = np.arange(occupied.shape[1])
+    left = np.where(empty[:, :reach], index[:reach], -1).max(axis=1) + 1
+    right = np.where(empty[:, reach + 1:], index[reach + 1:], occupied.shape[1]).min(axis=1) - 1
+    widths = np.where(occupied[:, reach], np.maximum(reach - left, right - reach) + 0.5, 0) * size
+    rows = low[1] + (np.arange(slices) + 0.5) * size
+
+    waist_rows = widths[crotch_row + max(1, int(0.03 * slices)):crotch_row + max(2, int(0.15 * slices))]
+    waist = float(np.median(waist_rows[waist_rows > 0])) if np.any(waist_rows > 0) else 0.1 * height
+    return Body(points, float(low[1]), height, center, float(low[1] + crotch_row * size), waist, rows, widths)
+
+# Limbs ------------------------------------------------------------------------------------------
+
+def fit_leg(body: Body, template: Dict[str, np.ndarray], side: int) -> Dict[str, np.ndarray]:
+    """Places the leg joints in the cross sections below the crotch, and the foot markers at the foot's extremities"""
+    points = body.points
+    lateral = side * (points[:, 0] - body.center)
+    leg = points[(points[:, 1] < body.crotch) & (lateral > 0) & (lateral < 1.5 * body.waist)]
+    if not len(leg):
+        raise Exception("Couldn't find the {0} leg".format(_side_name(side)))
+    band = BAND * body.height
+
+    hip = _centroid(leg, 1, body.crotch - 2 * band, body.crotch)
+    hip[1] = body.crotch + HIP_HEIGHT * body.height
+
+    # The ankle is the thinnest cross section from front to back above the foot
+    low = leg[(leg[:, 1] > body.floor + 0.02 * body.height) & (leg[:, 1] < body.floor + 0.1 * body.height)]
+    rows = ((low[:, 1] - low[:, 1].min()) / band).astype(int)
+    depth = _reduce(np.maximum, low[:, 2], rows) - _reduce(np.minimum, low[:, 2], rows)
+    count = np.bincount(rows)
+    depth[count < max(3, np.median(count) / 4)] = np.inf
+    ankle_y = low[:, 1].min() + (np.argmin(depth) + 0.5) * band
+    ankle = _centroid(leg, 1, ankle_y - band / 2, ankle_y + band / 2)
+
+    knee_y = (hip[1] + ankle[1]) / 2
+    knee = _centroid(leg, 1, knee_y - band, knee_y + band)
+
+    # The foot's extremities give the heel, toe and banks
+    foot = leg[leg[:, 1] < ankle[1]]
+    heel_z, toe = foot[:, 2].min(), foot[np.argmax(foot[:, 2])]
+    ball_z = heel_z + BALL * (toe[2] - heel_z)
+    across = foot[np.abs(foot[:, 2] - ball_z) < 0.05 * (toe[2] - heel_z)]
+    ball = np.array([across[:, 0].mean(), body.floor + 0.15 * (ankle[1] - body.floor), ball_z])
+    inner = across[np.argmin(side * across[:, 0]), 0]
+    outer = across[np.argmax(side * across[:, 0]), 0]
+
+    return dict(
+        hip=hip,
+        knee=knee,
+        ankle=ankle,
+        heel=np.array([ankle[0], body.floor, heel_z]),
+        ballOfFoot=ball,
+        tipOfToe=np.array([toe[0], body.floor, toe[2]]),
+        footBankInner=np.array([inner, body.floor, ball_z]),
+        footBankOuter=np.array([outer, body.floor, ball_z]))
+
+def fit_arm(body: Body, template: Dict[str, np.ndarray], side: int) -> Dict[str, np.ndarray]:
+    """Places the arm joints in the cross sections along the arm's principal axis, and moves the hand along with them"""
+    points = body.points
+    arm = points[(points[:, 1] > body.crotch) & (side * (points[:, 0] - body.center) > ARM_START * body.waist)]
+    if len(arm) < 3:
+        raise Exception("Couldn't find the {0} arm".format(_side_name(side)))
+    mean = arm.mean(axis=0)
+    centered = arm - mean
+    axis = np.linalg.eigh(centered.T @ centered)[1][:, -1]
+    axis *= side * np.sign(axis[0])
+    along = centered @ axis
+
+    # The shoulder sits inside the torso, on the line from the arm's root along its axis
+    root = arm[along < along.min() + 0.05 * np.ptp(along)].mean(axis=0)
+    shoulder = root + axis * (body.center + side * SHOULDER_WIDTH * body.waist - root[0]) / axis[0]
+    start = (shoulder - mean) @ axis
+    tip = arm[np.argmax(along)]
+    length = along.max() - start
+
+    # Cross sections along the arm; the wrist is the thinnest one over the forearm
+    sections = ARM_SECTIONS
+    index = np.clip(((along - start) / length * sections).astype(int), 0, sections - 1)
+    count = np.bincount(index, minlength=sections)
+    weight = 1 / np.maximum(count, 1)
+    centroid = np.stack([np.bincount(index, arm[:, i], sections) for i in range(3)], axis=1) * weight[:, np.newaxis]
+    # Spread of each cross section across the axis, its total variance less the variance along the axis
+    spread = np.bincount(index, np.einsum('ij,ij->i', arm, arm), sections) * weight - np.einsum('ij,ij->i', centroid, centroid)
+    spread -= np.bincount(index, along ** 2, sections) * weight - (np.bincount(index, along, sections) * weight) ** 2
+    forearm = np.arange(int(0.55 * sections), int(0.85 * sections))
+    forearm = forearm[count[forearm] > 0]
+    if not len(forearm):
+        raise Exception("Couldn't find the {0} wrist".format(_side_name(side)))
+    wrist_section = forearm[np.argmin(spread[forearm])]
+    wrist = centroid[wrist_section]
+    elbow_section = wrist_section // 2
+    elbow = centroid[elbow_section] if count[elbow_section] else (shoulder + wrist) / 2
+
+    ret = dict(shoulder=shoulder, elbow=elbow, wrist=wrist)
+    # The clavicle keeps its offset to the shoulder, scaled with the arm
+    if 'clavicle' in template and 'shoulder' in template and 'wrist' in template:
+        scale = np.linalg.norm(wrist - shoulder) / max(np.linalg.norm(template['wrist'] - template['shoulder']), 1e-6)
+        ret['clavicle'] = shoulder + scale * (template['clavicle'] - template['shoulder'])
+    # The hand keeps its layout, stretched from the wrist to the farthest fingertip
+    hand = [name for name in template if name not in ('clavicle', 'shoulder', 'elbow', 'wrist')]
+    if hand and 'wrist' in template:
+        farthest = max(hand, key=lambda name: np.linalg.norm(template[name] - template['wrist']))
+        place = _similarity(template['wrist'], template[farthest], wrist, tip)
+        for name in hand:
+            ret[name] = place(template[name])
+    return ret
+
+def fit_torso(body: Body, template: Dict[str, np.ndarray], side: int) -> Dict[str, np.ndarray]:
+    """Fits the torso between the pelvis and the base of the neck, keeping the layout of the markers in between"""
+    pelvis, neck = _spine_ends(body)
+    if 'pelvis' not in template or 'neckBase' not in template:
+        return dict()
+    place = _similarity(template['pelvis'], template['neckBase'], pelvis, neck)
+    return {name: place(position) for name, position in template.items()}
+
+def fit_spine(body: Body, template: Dict[str, np.ndarray], side: int) -> Dict[str, np.ndarray]:
+    """Fits the spine from the pelvis to the base of the neck"""
+    pelvis, neck = _spine_ends(body)
+    names = list(template)
+    place = _similarity(template[names[0]], template[names[-1]], pelvis, neck)
+    return {name: place(position) for name, position in template.items()}
+
+FITTERS: Dict[str, Callable[[Body, Dict[str, np.ndarray], int], Dict[str, np.ndarray]]] = dict(
+    arm=fit_arm,
+    leg=fit_leg,
+    torso=fit_torso,
+    spine=fit_spine,
+)
+
+# Helper methods ---------------------------------------------------------------------------------
+
+def _spine_ends(body: Body):
+    """The pelvis, level with the hips, and the base of the neck, where the body narrows above the shoulders"""
+    band = BAND * body.height
+    central = body.points[np.abs(body.points[:, 0] - body.center) < body.waist]
+    hip_y = body.crotch + HIP_HEIGHT * body.height
+    pelvis = np.array([body.center, hip_y, _centroid(central, 1, hip_y - band, hip_y + band)[2]])
+
+    # Search between the top of the arms' reach and the middle of the head
+    top = body.floor + body.height
+    arms = body.points[np.abs(body.points[:, 0] - body.center) > ARM_START * body.waist]
+    shoulder_y = arms[:, 1].max() if len(arms) else body.crotch + 0.6 * (top - body.crotch)
+    search = np.flatnonzero((body.rows > shoulder_y) & (body.rows < shoulder_y + 0.6 * (top - shoulder_y)) & (body.widths > 0))
+    if not len(search):
+        raise Exception("Couldn't find the neck")
+    narrowest = body.widths[search].min()
+    neck_y = body.rows[search[np.argmax(body.widths[search] <= 1.2 * narrowest)]]
+    neck = np.array([body.center, neck_y, _centroid(central, 1, neck_y - band, neck_y + band)[2]])
+    return pelvis, neck
+
+def _centroid(points: np.ndarray, axis: int, low: float, high: float) -> np.ndarray:
+    """The mean of the points between `low` and `high` along `axis`, or of the nearest point if there are none"""
+    inside = (points[:, axis] >= low) & (points[:, axis] <= high)
+    if np.any(inside):
+        return points[inside].mean(axis=0)
+    return points[np.argmin(np.abs(points[:, axis] - (low + high) / 2))].copy()
+
+def _reduce(ufunc: np.ufunc, values: np.ndarray, bins: np.ndarray) -> np.ndarray:
+    """`ufunc` reduced over the values in each bin, NaN for empty bins"""
+    ret = np.full(bins.max() + 1, np.nan)
+    order = np.argsort(bins, kind='stable')
+    present, starts = np.unique(bins[order], return_index=True)
+    ret[present] = ufunc.reduceat(values[order], starts)
+    return ret
+
+def _similarity(start: np.ndarray, end: np.ndarray, new_start: np.ndarray, new_end: np.ndarray) -> Callable[[np.ndarray], np.ndarray]:
+    """Maps points along with the segment from `start` to `end`, onto the segment from `new_start` to `new_end`,
+    turning it by the smallest rotation and scaling it uniformly"""
+    before, after = end - start, new_end - new_start
+    scale = np.linalg.norm(after) / max(np.linalg.norm(before), 1e-6)
+    u, v = before / max(np.linalg.norm(before), 1e-6), after / max(np.linalg.norm(after), 1e-6)
+    cross, dot = np.cross(u, v), np.dot(u, v)
+    skew = np.array([[0, -cross[2], cross[1]], [cross[2], 0, -cross[0]], [-cross[1], cross[0], 0]])
+    if dot > -1 + 1e-9:
+        rotation = np.eye(3) + skew + skew @ skew / (1 + dot)
+    else:
+        # Half a turn about any axis perpendicular to the segment
+        perpendicular = np.cross(u, np.eye(3)[np.argmin(np.abs(u))])
+        perpendicular /= np.linalg.norm(perpendicular)
+        rotation = 2 * np.outer(perpendicular, perpendicular) - np.eye(3)
+    return lambda point: new_start + scale * rotation @ (point - start)
+
+def _side_name(side: int) -> str:
+    return 'right' if side < 0 else 'left'
@@ -6,6 +6,11 @@ from ..core.joints import marker
 
 name = "arm"
 
+required_markers = ['shoulder', 'elbow', 'wrist']
+required_attributes = []
+
+COMPACT_HAND_ATTR = 'compactHand'
+
 def create_menu():
     """Returns a layout containing:
     - Any options the generator needs to generate
@@ -16,12 +21,14 @@ def create_menu():
     cmds.menuItem(label='Right')
     symmetrical_field=cmds.checkBox(label='Symmetrical', v=True)
     clavicle_field=cmds.checkBox(label='Include Shoulders', v=True)
+    compact_field=cmds.checkBox(label='Compact Hand', v=False)
     cmds.button(
         label='Add', 
         command=lambda _ : _create_markers(
             symmetrical_field, 
             side_field,
-            clavicle_field), 
+            clavicle_field,
+            compact_field), 
         w=250)
     cmds.setParent('..')
     return layout
@@ -61,12 +68,16 @@ def create_controllers(driver_joints:List[str]):
         cmds.parentConstraint(clavicle, shoulder_loc, mo=True)
         cmds.parent(arm_space, clavicle_curve)
     
-    fk = _create_fk(driver_joints, control_grp, systems_grp, flipped, shoulder_loc=shoulder_loc)
-    ik = _create_ik(driver_joints, control_grp, systems_grp, flipped, shoulder_loc=shoulder_loc)
+    fk, fk_controls = _create_fk(driver_joints, control_grp, systems_grp, flipped, shoulder_loc=shoulder_loc)
+    ik, ik_control, pole = _create_ik(driver_joints, control_grp, systems_grp, flipped, shoulder_loc=shoulder_loc)
 
-    _ik_switch(driver_joints, fk, ik, control_grp, flipped, arm_space)
+    switch = _ik_switch(driver_joints, fk, ik, control_grp, flipped, arm_space)
+    controls.record_ik_limb(switch, fk_controls, fk, ik, ik_control, pole)
 
-    _create_hand(driver_joints, control_grp, flipped)
+    if exists(driver_joints[0], COMPACT_HAND_ATTR) and attributes.get(driver_joints[0], COMPACT_HAND_ATTR):
+        _create_compact_hand(driver_joints, control_grp, flipped)
+    else:
+        _create_hand(driver_joints, control_grp, flipped)
 
 def create_bind_joints(driver_joints:List[str]):
     """Generates bind joints driven by the driver joints."""
@@ -82,14 +93,18 @@ def create_bind_joints(driver_joints:List[str]):
     attributes.delete_all(driver_joints)
 
 # Create markers --------------------------------------------------------------------------------
-def _create_markers(symmetrical_field, side_field, clavicle_field):
-    has_clavicle = cmds.checkBox(clavicle_field, q=True, v=True)
-    is_symmetrical = cmds.checkBox(symmetrical_field, q=True, v=True)
-    side_str = cmds.optionMenu(side_field, q=True, v=True)
+def _create_markers(symmetrical_field, side_field, clavicle_field, compact_field):
     side = Side.LEFT
-    if side_str == 'Right':
+    if cmds.optionMenu(side_field, q=True, v=True) == 'Right':
         side = Side.RIGHT
-    
+    create_markers(
+        side,
+        cmds.checkBox(symmetrical_field, q=True, v=True),
+        cmds.checkBox(clavicle_field, q=True, v=True),
+        cmds.checkBox(compact_field, q=True, v=True))
+
+def create_markers(side:Side=Side.LEFT, is_symmetrical:bool=True, has_clavicle:bool=True, compact_hand:bool=False) -> str:
+    """Adds the limb's markers to the active character and returns its root"""
     selection.clear()
     root = None
     if has_clavicle:
@@ -141,7 +156,9 @@ def _create_markers(symmetrical_field, side_field, clavicle_field):
         cmds.delete(root)
         root = root_r
     joints.mark_root(root, name, is_symmetrical)
+    attributes.add(root, COMPACT_HAND_ATTR, compact_hand, type_='bool')
     selection.set_(root)
+    return root
 
 # Create controls --------------------------------------------------------------------------------
 
@@ -211,7 +228,7 @@ def _create_fk(driver_joints, control_grp, systems_grp, flipped, shoulder_loc):
     attributes.lock(wrist_ctrl, ['translate'])
 
     attributes.delete_all(fk)
-    return fk
+    return fk, [shoulder_ctrl, elbow_ctrl, wrist_ctrl]
     
 def _create_ik(driver_joints, control_grp, systems_grp, flipped, shoulder_loc):
     driver_joints = [
@@ -259,7 +276,7 @@ def _create_ik(driver_joints, control_grp, systems_grp, flipped, shoulder_loc):
     cmds.orientConstraint(wrist_ctrl, wrist, mo=True)
 
     attributes.delete_all(ik)
-    return ik
+    return ik, wrist_ctrl, pole
 
 def _ik_switch(driver_joints, fk, ik, control_grp, arm_space, flipped):
     wrist = naming.find('wrist', driver_joints)
@@ -281,6 +298,7 @@ def _ik_switch(driver_joints, fk, ik, control_grp, arm_space, flipped):
         scale = cmds.scaleConstraint([fk_joint, ik_joint], driver_joint)[0]
         attributes.connect(invert, 'output1D', scale, fk_joint + 'W0')
         attributes.connect(switch, naming.IK_SWITCH_ATTR, scale, ik_joint + 'W1')
+    return switch
 
 def _create_hand(driver_joints, control_grp, flipped):
     wrist = naming.find('wrist', driver_joints)
@@ -324,6 +342,68 @@ def _create_hand(driver_joints, control_grp, flipped):
             cmds.scaleConstraint(ctrl, joint)
             prev = ctrl
 
+def _create_compact_hand(driver_joints, control_grp, flipped):
+    """A lighter alternative to `_create_hand` with the same controls, driving them and the finger joints from one network.
+    As in `_create_hand`, each finger root's curl feeds a bend matrix, combined with the precomputed offset of every
+    segment past the first. That combined matrix places both the tweak control and its joint, and the joint's channels
+    follow the control's directly, so only the knuckle needs a constraint.
+    Returns the number of utility nodes saved compared to `_create_hand`."""
+    wrist = naming.find('wrist', driver_joints)
+
+    hand_group = groups.empty_at(wrist, 'hand', parent=control_grp, suffix='offset')
+    cmds.parentConstraint(wrist, hand_group)
+    cmds.scaleConstraint(wrist, hand_group)
+
+    fingers = []
+    for knuckle in joints.find_children('knuckle', wrist):
+        finger_joints = joints.find_children('finger', knuckle, backwards=True)
+        finger_joints.append(knuckle)
+        finger_joints.reverse()
+        fingers.append(finger_joints)
+    # A bend node and a knuckle constraint per finger, and an offset per segment past the first
+    node_count = sum(2 + len(finger_joints) - 1 for finger_joints in fingers)
+    # A bend node per finger, an offset per segment past the first, and two constraints per joint
+    standard_count = sum(1 + len(finger_joints) - 1 + 2 * len(finger_joints) for finger_joints in fingers)
+
+    with trace.span('arm.compact_hand', limb=wrist, nodes=node_count, saved=standard_count - node_count):
+        for finger_joints in fingers:
+            knuckle = finger_joints[0]
+            finger_name = naming.get_name(knuckle, ignore_num=True)
+            root_ctrl = controls.finger_root(
+                finger_name, suffix=Suffix.CONTROL, 
+                joint=knuckle, 
+                parent=hand_group,
+                flipped=flipped
+            )
+
+            fingerBend = nodes.composeMatrix(naming.replace(knuckle, suffix='bend'))
+            attributes.connect(root_ctrl, 'rotate.rotateY', fingerBend, 'inputRotate.inputRotateY')
+            prev = root_ctrl
+            for joint in finger_joints:
+                ctrl = controls.circle(
+                    naming.get_name(joint, ignore_num=False),
+                    suffix=Suffix.TWEAK_CONTROL,
+                    joint=joint,
+                    parent=prev,
+                    flipped=flipped,
+                    radius=1
+                )
+                if (prev == root_ctrl):
+                    # The control rests on the knuckle, so the offset only cancels the knuckle's own transform
+                    nodes.matrixConstraint(ctrl, joint, om.MMatrix(cmds.xform(joint, q=True, m=True, ws=False)).inverse())
+                else:
+                    parentOffset = nodes.matMult(naming.replace(joint, suffix='parentOffset'))
+                    attributes.connect(fingerBend, 'outputMatrix', parentOffset, 'matrixIn[0]')
+                    attributes.copy(ctrl, 'offsetParentMatrix', parentOffset, 'matrixIn[1]', type_='matrix')
+                    attributes.connect(parentOffset, 'matrixSum', ctrl, 'offsetParentMatrix')
+                    # The joint rests exactly on its control, so the control's offset is also the joint's rest pose
+                    attributes.connect(parentOffset, 'matrixSum', joint, 'offsetParentMatrix')
+                    cmds.joint(joint, e=True, orientation=(0, 0, 0), scaleCompensate=False)
+                    for channel in ['translate', 'rotate', 'scale']:
+                        attributes.connect(ctrl, channel, joint)
+                prev = ctrl
+    return standard_count - node_count
+
 # Arm Specific Controls ==========================================================================
 
 def clavicle_control(name: str, suffix:str, joint:str, parent:str, flipped=False, * , size=6):
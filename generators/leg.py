@@ -6,6 +6,9 @@ from ..core.joints import marker
 
 name = "leg"
 
+required_markers = ['hip', 'knee', 'ankle', 'heel', 'ballOfFoot', 'tipOfToe', 'footBankInner', 'footBankOuter']
+required_attributes = []
+
 def create_menu():
     """Returns a layout containing:
     - Any options the generator needs to generate
@@ -48,19 +51,20 @@ def create_controllers(driver_joints:List[str]):
     systems_grp = groups.systems_group(driver_joints[0], name)
     flipped=naming.get_side(driver_joints[0]) == Side.RIGHT
 
-    fk = _create_fk(
+    fk, fk_controls = _create_fk(
         driver_joints, 
         control_grp,
         systems_grp, 
         flipped)
-    ik = _create_ik(
+    ik, ik_control, pole = _create_ik(
         driver_joints, 
         reverse_foot_drivers, 
         control_grp,
         systems_grp, 
         flipped)
 
-    _ik_switch(driver_joints, fk, ik, control_grp, flipped)
+    switch = _ik_switch(driver_joints, fk, ik, control_grp, flipped)
+    controls.record_ik_limb(switch, fk_controls, fk[:3], ik[:3], ik_control, pole)
 
     for joint in reverse_foot_drivers:
         children = cmds.listRelatives(joint, c=True)
@@ -89,12 +93,13 @@ def create_bind_joints(driver_joints:List[str]):
 
 # Create markers --------------------------------------------------------------------------------
 def _create_markers(symmetrical_field, side_field):
-    is_symmetrical = cmds.checkBox(symmetrical_field, q=True, v=True)
-    side_str = cmds.optionMenu(side_field, q=True, v=True)
     side = Side.LEFT
-    if side_str == 'Right':
+    if cmds.optionMenu(side_field, q=True, v=True) == 'Right':
         side = Side.RIGHT
-    
+    create_markers(side, cmds.checkBox(symmetrical_field, q=True, v=True))
+
+def create_markers(side:Side=Side.LEFT, is_symmetrical:bool=True) -> str:
+    """Adds the limb's markers to the active character and returns its root"""
     selection.clear()
     hip = marker(Side.LEFT, 'hip', (7, 80, 0))
     marker(Side.LEFT, 'knee', (7, 45, 1))
@@ -115,6 +120,7 @@ def _create_markers(symmetrical_field, side_field):
     joints.mark_root(hip, name, is_symmetrical)
 
     selection.set_(hip)
+    return hip
 
 # Create controls --------------------------------------------------------------------------------
 def _create_fk(driver_joints, control_grp, systems_grp, flipped):
@@ -169,7 +175,7 @@ def _create_fk(driver_joints, control_grp, systems_grp, flipped):
     attributes.lock(toe_ctrl, ['translate', 'rotateY', 'rotateZ'])
 
     attributes.delete_all(fk)
-    return fk
+    return fk, [hip_ctrl, knee_ctrl, ankle_ctrl]
     
 def _create_ik(driver_joints, reverse_foot_drivers, control_grp, systems_grp, flipped):
     ik = joints.variants(driver_joints, Suffix.IK_JOINT, root_parent=systems_grp)
@@ -280,7 +286,7 @@ def _create_ik(driver_joints, reverse_foot_drivers, control_grp, systems_grp, fl
     controls.set_rest_pose(handle)
 
     attributes.delete_all(ik)
-    return ik
+    return ik, foot_ctrl, pole
 
 def _ik_switch(driver_joints, fk, ik, control_grp, flipped):
     ankle = naming.find('ankle', driver_joints)
@@ -306,4 +312,5 @@ def _ik_switch(driver_joints, fk, ik, control_grp, flipped):
     switch_parent = cmds.parentConstraint([ankle_fk, ankle_ik], switch, mo=True)[0]
     attributes.connect(invert, 'output1D', switch_parent, ankle_fk + 'W0')
     attributes.connect(switch, naming.IK_SWITCH_ATTR, switch_parent, ankle_ik + 'W1')
+    return switch
     
\ No newline at end of file
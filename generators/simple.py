@@ -1,9 +1,13 @@
 from maya import cmds
 from typing import List
+import maya.api.OpenMaya as om
 from ..core import *
 
 name = "simple"
 
+required_markers = []
+required_attributes = ['axis']
+
 def create_menu():
     """Returns a layout containing:
     - Any options the generator needs to generate
@@ -27,21 +31,24 @@ def create_controllers(driver_joints:List[str]):
     """Generates controllers for the driver joints.
     May modify the structure of the driver skeleton."""
     control_grp = groups.create_control_group(driver_joints[0], naming.get_name(driver_joints[0]))
-    parent = control_grp
     axis = attributes.get(driver_joints[0], 'axis')
+    normals = []
     for bone in driver_joints:
         if exists(bone, 'axis'):
             axis = attributes.get(bone, 'axis')
         normal = [0, 0, 0]
         normal[axis] = 1
-        ctrl = controls.ellipse(
-            name=naming.get_name(bone), suffix=Suffix.CONTROL,
-            joint=bone,
-            parent=parent,
-            normal=tuple(normal))
-        parent = ctrl
-        cmds.parentConstraint(ctrl, bone)
-        cmds.scaleConstraint(ctrl, bone)
+        normals.append(tuple(normal))
+    # Read the rest pose before any bone is driven
+    locals_ = [om.MMatrix(cmds.xform(bone, q=True, m=True, ws=False)) for bone in driver_joints]
+
+    ctrls = controls.ellipse_chain(
+        [naming.get_name(bone) for bone in driver_joints], Suffix.CONTROL,
+        driver_joints,
+        control_grp,
+        normals)
+    for ctrl, bone, local in zip(ctrls, driver_joints, locals_):
+        nodes.matrixConstraint(ctrl, bone, offset=local.inverse())
 
 def create_bind_joints(driver_joints:List[str]):
     """Generates bind joints driven by the driver joints."""
@@ -55,6 +62,13 @@ def create_bind_joints(driver_joints:List[str]):
 
     attributes.delete_all(driver_joints)
 
+def create_markers(side:Side=Side.CENTER, symmetrical:bool=True) -> str:
+    """Adds the limb's markers to the active character and returns its root"""
+    joint = joints.marker(side, 'joint', (0, 0, 0))
+    joints.mark_root(joint, name, symmetrical)
+    attributes.add_enum(joint, 'axis', 'X:Y:Z:', active=0, keyable=True)
+    return joint
+
 def _create_markers(symmetrical_field, side_field):
     side_str = cmds.optionMenu(side_field, q=True, v=True)
     side = Side.CENTER
@@ -62,6 +76,4 @@ def _create_markers(symmetrical_field, side_field):
         side = Side.LEFT
     elif side_str == 'Right':
         side = Side.RIGHT
-    joint = joints.marker(side, 'joint', (0, 0, 0))
-    joints.mark_root(joint, name, cmds.checkBox(symmetrical_field, q=True, v=True))
-    attributes.add_enum(joint, 'axis', 'X:Y:Z:', active=0, keyable=True)
\ No newline at end of file
+    create_markers(side, cmds.checkBox(symmetrical_field, q=True, v=True))
\ No newline at end of file
@@ -0,0 +1,159 @@
+from maya import cmds
+import maya.api.OpenMaya as om
+import numpy as np
+from typing import List
+from ..core import *
+from ..core import spline
+
+name = "spine"
+
+required_markers = ['spine']
+required_attributes = []
+
+def create_menu():
+    """Returns a layout containing:
+    - Any options the generator needs to generate
+    - A button that generates markers for the limb"""
+    layout = cmds.columnLayout(w=250, rs=4)
+    count_field = cmds.intSliderGrp(label='Joints', field=True, min=3, max=20, fmx=100, v=6, cw3=(40, 40, 170))
+    length_field = cmds.floatFieldGrp(label='Length', v1=30, cw2=(40, 80))
+    cmds.button(
+        label='Add', 
+        command=lambda _ : _create_markers(
+            count_field,
+            length_field), 
+        w=250)
+    cmds.setParent('..')
+    return layout
+
+def create_controllers(driver_joints:List[str]):
+    """Generates controllers for the driver joints.
+    May modify the structure of the driver skeleton."""
+    chain = _chain(driver_joints)
+    positions = [tuple(joints.get_position(joint)) for joint in chain]
+    t, weights, handles = spline.fit(positions)
+    # The middle control is the curve's middle handle, so each joint follows it by exactly its Bernstein weight
+    middle = handles[1]
+    middle_joint = chain[int(abs(t - 0.5).argmin())]
+    middle_pos = joints.get_position(middle_joint)
+    middle_offset = (middle[0] - middle_pos.x, middle[1] - middle_pos.y, middle[2] - middle_pos.z)
+
+    control_grp = groups.create_control_group(chain[0], name)
+    base_ctrl = controls.circle(
+        'spineBase', Suffix.CONTROL,
+        joint=chain[0],
+        parent=control_grp,
+        radius=12,
+        normal=(0, 1, 0)
+    )
+    middle_ctrl = controls.circle(
+        'spineMiddle', Suffix.CONTROL,
+        joint=middle_joint,
+        parent=base_ctrl,
+        radius=10,
+        normal=(0, 1, 0),
+        offset=middle_offset
+    )
+    top_ctrl = controls.circle(
+        'spineTop', Suffix.CONTROL,
+        joint=chain[-1],
+        parent=middle_ctrl,
+        radius=12,
+        normal=(0, 1, 0)
+    )
+
+    handle_ctrls = [base_ctrl, middle_ctrl, top_ctrl]
+    curve = _create_curve(chain[0], handle_ctrls, handles, groups.systems_group(chain[0], name))
+    # Each control's rotation, without its position, for the joints to blend between
+    rotations = []
+    for ctrl in handle_ctrls:
+        rotation = cmds.createNode('pickMatrix', n=naming.replace(ctrl, suffix='rotation'))
+        attributes.connect(ctrl, 'worldMatrix[0]', rotation, 'inputMatrix')
+        for attr in ['useTranslate', 'useScale', 'useShear']:
+            attributes.set_(rotation, attr, False)
+        rotations.append(rotation)
+    for joint, param, joint_weights in zip(chain, t.tolist(), weights.tolist()):
+        _follow_curve(joint, curve, param, rotations, joint_weights)
+
+def create_bind_joints(driver_joints:List[str]):
+    """Generates bind joints driven by the driver joints."""
+    driver_joints = [joint for joint in driver_joints if joints.to_bind(joint)]
+    bind_joints = joints.variants(driver_joints, suffix=Suffix.BIND_JOINT, parent_if_exists=True)
+    if joints.get_parent(bind_joints[0]) == naming.driver_grp:
+        cmds.parent(bind_joints[0], naming.bind_grp)
+    for i in range(len(driver_joints)):
+        cmds.parentConstraint(driver_joints[i], bind_joints[i])
+        cmds.scaleConstraint(driver_joints[i], bind_joints[i])
+
+    attributes.delete_all(driver_joints)
+
+# Create markers --------------------------------------------------------------------------------
+def _create_markers(count_field, length_field):
+    create_markers(
+        cmds.intSliderGrp(count_field, q=True, v=True),
+        cmds.floatFieldGrp(length_field, q=True, v1=True))
+
+def create_markers(count:int=6, length:float=30) -> str:
+    """Adds the spine's markers to the active character and returns its root"""
+    selection.clear()
+    root = None
+    for i in range(count):
+        joint = joints.marker(Side.CENTER, 'spine', (0, length * i / (count - 1), 0), type_='spine')
+        if not root:
+            root = joint
+    joints.mark_root(root, name)
+    selection.set_(root)
+    return root
+
+# Helper methods ---------------------------------------------------------------------------------
+
+def _create_curve(root: str, handle_ctrls: List[str], handles: np.ndarray, systems_grp: str) -> str:
+    """A Bezier curve in world space with a CV on each handle control, returning its shape"""
+    # With three CVs and these knots, the NURBS curve is the fitted Bezier, and shares its parameters
+    curve = cmds.curve(n=naming.replace(root, name=name, suffix='curve'), d=2, p=handles.tolist(), k=[0, 0, 1, 1])
+    cmds.parent(curve, systems_grp)
+    attributes.set_(curve, 'inheritsTransform', False)
+    shape = cmds.listRelatives(curve, shapes=True)[0]
+    for i, ctrl in enumerate(handle_ctrls):
+        position = nodes.decomposeMatrix(naming.replace(ctrl, suffix='position'))
+        attributes.connect(ctrl, 'worldMatrix[0]', position, 'inputMatrix')
+        attributes.connect(position, 'outputTranslate', shape, 'controlPoints[{0}]'.format(i))
+    return shape
+
+def _follow_curve(joint: str, curve: str, param: float, rotations: List[str], weights: List[float]):
+    """Drives the joint's offset parent matrix with the point of the curve at `param`,
+    turned by the handle controls' rotations blended by `weights`, keeping the joint where it is"""
+    point = cmds.createNode('pointOnCurveInfo', n=naming.replace(joint, suffix='curvePoint'))
+    attributes.connect(curve, 'worldSpace[0]', point, 'inputCurve')
+    attributes.set_(point, 'parameter', param)
+    position = nodes.composeMatrix(naming.replace(joint, suffix='curvePosition'))
+    attributes.connect(point, 'position', position, 'inputTranslate')
+
+    # Blending in one control after another, with each weight relative to the total so far, gives the weighted average
+    rotation = nodes.blendMatrix(naming.replace(joint, suffix='curveRotation'))
+    attributes.connect(rotations[0], 'outputMatrix', rotation, 'inputMatrix')
+    total = weights[0]
+    for i, (source, weight) in enumerate(zip(rotations[1:], weights[1:])):
+        total += weight
+        attributes.connect(source, 'outputMatrix', rotation, 'target[{0}].targetMatrix'.format(i))
+        attributes.set_(rotation, 'target[{0}].weight'.format(i), weight / total if total else 0.0)
+
+    # Cancel out the joint's own transform and its rest offset from the curve
+    local = om.MMatrix(cmds.xform(joint, q=True, m=True, ws=False))
+    frame = om.MMatrix(attributes.get(rotation, 'outputMatrix')) * om.MMatrix(attributes.get(position, 'outputMatrix'))
+    offset = local.inverse() * om.MMatrix(attributes.get(joint, 'worldMatrix[0]')) * frame.inverse()
+    world = nodes.matMult(naming.replace(joint, suffix='curveMatrix'))
+    attributes.set_(world, 'matrixIn[0]', offset, type_='matrix')
+    attributes.connect(rotation, 'outputMatrix', world, 'matrixIn[1]')
+    attributes.connect(position, 'outputMatrix', world, 'matrixIn[2]')
+    attributes.connect(joints.get_parent(joint), 'worldInverseMatrix[0]', world, 'matrixIn[3]')
+    attributes.connect(world, 'matrixSum', joint, 'offsetParentMatrix')
+
+def _chain(driver_joints:List[str]) -> List[str]:
+    """The spine joints from root to tip"""
+    chain = [driver_joints[0]]
+    while True:
+        children = [child for child in (joints.get_children(chain[-1]) or []) if child in driver_joints]
+        if not children:
+            return chain
+        chain.append(children[0])
@@ -4,6 +4,11 @@ from ..core import *
 
 name = "torso"
 
+required_markers = ['CoG', 'pelvis']
+required_attributes = ['style']
+# Extra markers needed by each style
+style_markers = {1: ['pelvisNib', 'spine0', 'spine1', 'spine2']}
+
 def create_menu():
     """Returns a layout containing:
     - Any options the generator needs to generate
@@ -114,8 +119,11 @@ def create_bind_joints(driver_joints:List[str]):
 # IMPLEMENTATION =================================================================================
 
 def _create_markers(type_field):
-    type_str = cmds.optionMenu(type_field, q=True, v=True)
+    create_markers(cmds.optionMenu(type_field, q=True, v=True))
 
+def create_markers(type_str:str='FK') -> str:
+    """Adds the torso's markers to the active character and returns its root.
+    `type_str` is 'Simple' or 'FK'."""
     center_of_gravity = joints.marker(Side.CENTER, "centerOfGravity", (0, 0, 0), type_="CoG", bind=False)
     attributes.set_(center_of_gravity, 'radius', 2)
     joints.mark_root(center_of_gravity, name)
@@ -124,7 +132,7 @@ def _create_markers(type_field):
         attributes.add(center_of_gravity, 'style', 0, type_='number')
         pelvis = joints.marker(Side.CENTER, "pelvis", (0, 0, 0), type_="pelvis")
         selection.set_(center_of_gravity)
-        return
+        return center_of_gravity
     if type_str == 'FK':
         attributes.add(center_of_gravity, 'style', 1, type_='float')
 
@@ -143,4 +151,4 @@ def _create_markers(type_field):
         joints.marker(Side.CENTER, 'spine2', (0, 17, -4), type_='spine2')
         joints.marker(Side.CENTER, 'neckBase', (0, 32, -6), type_='neckBase')
         selection.set_(center_of_gravity)
-        return
+        return center_of_gravity
@@ -0,0 +1,120 @@
+from maya import cmds
+import numpy as np
+from typing import Dict, List
+from .core import *
+from .core import animation
+
+"""
+FK/IK matching for arm and leg rigs over a frame range.
+
+The switch control of each limb records the limb's FK controls, FK and IK joints, IK control and pole vector.
+Every matched limb is sampled in one sweep over the frame range, the matching control poses for all frames are
+solved at once with NumPy, and each control channel is then keyed in a single call.
+
+Controls keep their offset to the joints they drive, measured on each frame, so the controls' own orientations
+and the foot's roll pivots are respected.
+"""
+
+FK_CHANNELS = ['rotateX', 'rotateY', 'rotateZ']
+IK_CHANNELS = ['translateX', 'translateY', 'translateZ', 'rotateX', 'rotateY', 'rotateZ']
+POLE_CHANNELS = ['translateX', 'translateY', 'translateZ']
+
+def match_selected(to_ik: bool, start: float = None, end: float = None, **kwargs):
+    """Matches the limbs of the selected FK/IK switch controls over the frame range, defaulting to the playback range"""
+    switches = [obj for obj in selection.get() if exists(obj, controls.IK_LIMB_ATTRS[0])]
+    if not switches:
+        raise Exception("Select the FK/IK switch controls of the limbs to match")
+    match(switches, to_ik, start, end, **kwargs)
+
+def match(switches: List[str], to_ik: bool, start: float = None, end: float = None, step: float = 1.0, switch: bool = True, simplify: bool = False):
+    """Keys the IK controls of each limb to follow its FK pose from `start` to `end`, or the FK controls to follow its IK pose.
+    With `switch`, the switch attribute is keyed to the matched side as well."""
+    if start is None:
+        start = cmds.playbackOptions(q=True, min=True)
+    if end is None:
+        end = cmds.playbackOptions(q=True, max=True)
+    times = animation.frames(start, end, step)
+    limbs = [controls.ik_limb(switch_ctrl) for switch_ctrl in switches]
+
+    nodes = []
+    for limb in limbs:
+        nodes += limb['fkControls'] + limb['fkJoints'] + limb['ikJoints'] + limb['ikControl'] + limb['poleControl']
+    nodes = list(dict.fromkeys(nodes))
+    ctrls = [node for limb in limbs for node in limb['fkControls'] + limb['ikControl'] + limb['poleControl']]
+    with trace.span('matching.sample', limbs=len(limbs)), animation.suspended():
+        matrices = animation.sample(
+            [naming.attr_path(node, 'worldMatrix[0]') for node in nodes] + [naming.attr_path(ctrl, 'matrix') for ctrl in ctrls],
+            times)
+    world = {node: matrices[:, i] for i, node in enumerate(nodes)}
+    local = {ctrl: matrices[:, len(nodes) + i] for i, ctrl in enumerate(ctrls)}
+
+    plugs, columns, tolerances = [], [], []
+    for limb, switch_ctrl in zip(limbs, switches):
+        if to_ik:
+            targets = match_ik(limb, world, local)
+            channels = [IK_CHANNELS, POLE_CHANNELS]
+        else:
+            targets = match_fk(limb, world, local)
+            channels = [FK_CHANNELS] * len(targets)
+        for (ctrl, target), ctrl_channels in zip(targets.items(), channels):
+            values = animation.channels(target)
+            values[:, 3:6] = animation.unwrap(values[:, 3:6])
+            ctrl_plugs = [naming.attr_path(ctrl, channel) for channel in ctrl_channels]
+            for plug, channel, keyable in zip(ctrl_plugs, ctrl_channels, animation.settable(ctrl_plugs)):
+                if keyable:
+                    index = animation.CHANNELS.index(channel)
+                    plugs.append(plug)
+                    columns.append(values[:, index])
+                    tolerances.append(animation.TOLERANCES[index])
+        if switch:
+            plugs.append(naming.attr_path(switch_ctrl, naming.IK_SWITCH_ATTR))
+            columns.append(np.full(len(times), 1.0 if to_ik else 0.0))
+            tolerances.append(0.0)
+
+    with trace.span('matching.key', plugs=len(plugs)):
+        animation.key(plugs, times, np.stack(columns, axis=1), np.array(tolerances) if simplify else None)
+    print("Matched {0} limbs to {1} over frames {2} to {3}".format(len(limbs), 'IK' if to_ik else 'FK', start, end))
+
+def match_ik(limb: Dict[str, List[str]], world: Dict[str, np.ndarray], local: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Local matrices on each frame that put the IK control on the FK end joint, and the pole in the FK chain's plane"""
+    ik_ctrl, pole = limb['ikControl'][0], limb['poleControl'][0]
+    start, middle, end = (world[joint][:, 3, :3] for joint in limb['fkJoints'])
+
+    # The IK control keeps its offset to the IK end joint, and moves with the FK end joint instead
+    ik_target = world[ik_ctrl] @ np.linalg.inv(world[limb['ikJoints'][2]]) @ world[limb['fkJoints'][2]]
+
+    # The pole keeps its distance to the middle joint, on the side the FK chain bends towards
+    pole_target = world[pole].copy()
+    distance = np.linalg.norm(world[pole][:, 3, :3] - world[limb['ikJoints'][1]][:, 3, :3], axis=1, keepdims=True)
+    chord = end - start
+    along = np.einsum('ij,ij->i', middle - start, chord) / np.maximum(np.einsum('ij,ij->i', chord, chord), 1e-12)
+    bend = middle - (start + along[:, np.newaxis] * chord)
+    length = np.linalg.norm(bend, axis=1, keepdims=True)
+    bent = length[:, 0] > 1e-6
+    pole_target[bent, 3, :3] = middle[bent] + bend[bent] / length[bent] * distance[bent]
+
+    return {
+        ik_ctrl: ik_target @ np.linalg.inv(_parent_space(ik_ctrl, world, local)),
+        pole: pole_target @ np.linalg.inv(_parent_space(pole, world, local)),
+    }
+
+def match_fk(limb: Dict[str, List[str]], world: Dict[str, np.ndarray], local: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Local matrices on each frame that line the FK joints up with the IK joints"""
+    ret = dict()
+    parent, parent_target = None, None
+    for ctrl, fk_joint, ik_joint in zip(limb['fkControls'], limb['fkJoints'], limb['ikJoints']):
+        # Each control keeps its offset to its FK joint, which moves onto the IK joint
+        target = world[ctrl] @ np.linalg.inv(world[fk_joint]) @ world[ik_joint]
+        space = _parent_space(ctrl, world, local)
+        if parent:
+            # Child controls move with their parent's new pose
+            space = space @ np.linalg.inv(world[parent]) @ parent_target
+        ret[ctrl] = target @ np.linalg.inv(space)
+        parent, parent_target = ctrl, target
+    return ret
+
+# Helper methods ---------------------------------------------------------------------------------
+
+def _parent_space(ctrl: str, world: Dict[str, np.ndarray], local: Dict[str, np.ndarray]) -> np.ndarray:
+    """The matrices that take the control's local matrix to world space, its offset parent matrix and parent included"""
+    return np.linalg.inv(local[ctrl]) @ world[ctrl]
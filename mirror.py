@@ -0,0 +1,135 @@
+from contextlib import contextmanager
+from maya import cmds
+import numpy as np
+from typing import Dict, List, NamedTuple, Tuple
+from .core import *
+from .core import animation
+
+"""
+Pose and animation mirroring for the active character's controls.
+
+A mirror table pairs every control with its opposite side through `naming.flip`, and stores the axis flip
+that carries a pose from one side's rest orientation to the other's. The flips are measured from the rig itself
+with every control at rest, so they follow however the generators oriented the right side.
+The table is built once per rig, and again whenever the character's control group is rebuilt or replaced.
+Mirroring then samples the local matrices of all source controls in one sweep,
+mirrors every frame of every control in one batched product, and writes the results per channel.
+"""
+
+MODES = ['flip', Side.LEFT, Side.RIGHT]
+# Reflection across the character's YZ plane
+REFLECTION = np.diag([-1.0, 1.0, 1.0, 1.0])
+CHANNELS = animation.CHANNELS[:6]
+
+class MirrorTable(NamedTuple):
+    controls: List[str]
+    # Index of each control's opposite, or its own index for center and unpaired controls
+    partners: np.ndarray
+    # (len(controls), 4, 4) matrices taking a local pose of the partner to this control
+    flips: np.ndarray
+    user_attributes: List[List[str]]
+
+# Each character's table, with the UUID of the control group it was built from
+_tables: Dict[str, Tuple[str, MirrorTable]] = dict()
+
+def table(rebuild: bool = False) -> MirrorTable:
+    """The mirror table of the active character, built on first use and again once its rig is rebuilt or replaced"""
+    rig = cmds.ls(naming.control_grp, uuid=True)
+    if not rig:
+        raise Exception("No rig to mirror: " + naming.control_grp + " doesn't exist")
+    cached = _tables.get(naming.control_grp)
+    if rebuild or not cached or cached[0] != rig[0]:
+        _tables[naming.control_grp] = (rig[0], build_table())
+    return _tables[naming.control_grp][1]
+
+def build_table() -> MirrorTable:
+    ctrls = _controls()
+    unsupported = [ctrl for ctrl in ctrls if attributes.get(ctrl, 'rotateOrder') != 0]
+    if unsupported:
+        cmds.warning("Skipping controls without the xyz rotate order: " + ', '.join(unsupported))
+        ctrls = [ctrl for ctrl in ctrls if ctrl not in unsupported]
+    index = {ctrl: i for i, ctrl in enumerate(ctrls)}
+    partners = np.array([index.get(naming.flip(ctrl), i) for i, ctrl in enumerate(ctrls)])
+
+    with _at_rest(ctrls):
+        rest = np.array([cmds.xform(ctrl, q=True, ws=True, m=True) for ctrl in ctrls]).reshape(-1, 4, 4)
+    rest[:, :3, :3] /= np.linalg.norm(rest[:, :3, :3], axis=-1, keepdims=True)
+    rest[:, 3, :3] = 0
+    # Rest frames relate as this = flip @ partner @ reflection, so a partner pose carries over by conjugating with the flip
+    flips = rest @ REFLECTION @ np.linalg.inv(rest[partners])
+    snapped = np.round(flips)
+    close = np.all(np.abs(flips - snapped) < 1e-3, axis=(1, 2))
+    flips[close] = snapped[close]
+
+    user_attributes = [cmds.listAttr(ctrl, ud=True, k=True) or [] for ctrl in ctrls]
+    return MirrorTable(ctrls, partners, flips, user_attributes)
+
+def mirror(ctrls: List[str] = None, mode: str = 'flip', start: float = None, end: float = None, step: float = 1.0):
+    """Mirrors the pose of `ctrls`, or of every control, at the current frame, or their animation from `start` to `end`.
+    `mode` is 'flip' to swap both sides and flip the center, or the side to copy to the other side."""
+    if mode not in MODES:
+        raise Exception("Unknown mirror mode `{0}`, expected one of {1}".format(mode, MODES))
+    mirror_table = table()
+    index = {ctrl: i for i, ctrl in enumerate(mirror_table.controls)}
+    selected = range(len(index)) if ctrls is None else [index[ctrl] for ctrl in ctrls if ctrl in index]
+    targets = sorted(set(selected) | set(mirror_table.partners[selected].tolist()))
+    if mode != 'flip':
+        targets = [i for i in targets if naming.get_side(mirror_table.controls[i]) not in (mode, Side.CENTER)]
+    if not targets:
+        return
+    sources = mirror_table.partners[targets]
+    animated = start is not None or end is not None
+    if animated:
+        times = animation.frames(cmds.playbackOptions(q=True, min=True) if start is None else start, cmds.playbackOptions(q=True, max=True) if end is None else end, step)
+    else:
+        times = np.array([cmds.currentTime(q=True)])
+
+    with trace.span('mirror', controls=len(targets), frames=len(times)), animation.suspended():
+        local = animation.sample([naming.attr_path(mirror_table.controls[i], 'matrix') for i in sources], times)
+    flips = mirror_table.flips[targets]
+    values = animation.channels(flips @ local @ np.linalg.inv(flips))
+    values[..., 3:6] = animation.unwrap(values[..., 3:6])
+
+    plugs, columns = [], []
+    for column, (target, source) in enumerate(zip(targets, sources)):
+        target_ctrl = mirror_table.controls[target]
+        target_plugs = [naming.attr_path(target_ctrl, channel) for channel in CHANNELS]
+        for c, (plug, keyable) in enumerate(zip(target_plugs, animation.settable(target_plugs))):
+            if keyable:
+                plugs.append(plug)
+                columns.append(values[:, column, c])
+        # User attributes, such as spaces and foot rolls, are copied unchanged
+        source_ctrl = mirror_table.controls[source]
+        for attr in mirror_table.user_attributes[target]:
+            plug = naming.attr_path(target_ctrl, attr)
+            if attr in mirror_table.user_attributes[source] and animation.settable([plug])[0]:
+                plugs.append(plug)
+                columns.append(animation.evaluate(naming.attr_path(source_ctrl, attr), times))
+
+    # Both branches write through cmds, so either can be undone
+    if animated:
+        animation.key(plugs, times, np.stack(columns, axis=1))
+    else:
+        for plug, column in zip(plugs, columns):
+            cmds.setAttr(plug, np.degrees(column[0]) if '.rotate' in plug else column[0])
+
+# Helper methods ---------------------------------------------------------------------------------
+
+def _controls() -> List[str]:
+    """Every transform with a curve shape under the active character's control group"""
+    shapes = cmds.listRelatives(naming.control_grp, ad=True, type='nurbsCurve') or []
+    return list(dict.fromkeys(cmds.listRelatives(shapes, p=True) or []))
+
+@contextmanager
+def _at_rest(ctrls: List[str]):
+    """Temporarily zeroes the free transform channels of the controls"""
+    plugs = [naming.attr_path(ctrl, channel) for ctrl in ctrls for channel in animation.CHANNELS]
+    plugs = [plug for plug, keyable in zip(plugs, animation.settable(plugs)) if keyable]
+    values = [cmds.getAttr(plug) for plug in plugs]
+    for plug in plugs:
+        cmds.setAttr(plug, 1 if '.scale' in plug else 0)
+    try:
+        yield
+    finally:
+        for plug, value in zip(plugs, values):
+            cmds.setAttr(plug, value)
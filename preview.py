@@ -0,0 +1,120 @@
+import time
+from maya import cmds
+import maya.api.OpenMaya as om
+from typing import Dict, Set
+from .core import *
+from .core.debounce import Debouncer
+
+"""
+Live preview of control sizes while editing markers.
+
+Every marker gets a preview circle in the character's preview group.
+Changes to marker transforms or control scales are collected, and once edits pause for `window` seconds
+only the affected circles are redrawn, spending at most `budget` seconds per update.
+"""
+
+WINDOW = 0.1
+BUDGET = 0.02
+RADIUS = 4
+
+_WATCHED = ('translate', 'rotate', 'jointOrient', attributes.CONTROL_SCALE)
+
+_callbacks = []
+_previews: Dict[str, str] = dict()
+_children: Dict[str, list] = dict()
+_pending: Set[str] = set()
+_debouncer: Debouncer = None
+_budget = BUDGET
+_stats = dict()
+
+def start(window: float = WINDOW, budget: float = BUDGET):
+    """Start previewing the active character's markers"""
+    global _debouncer, _budget
+    stop()
+    _budget = budget
+    _debouncer = Debouncer(_flush, window)
+    _reset_stats()
+
+    groups.recreate(n=naming.preview_grp)
+    cmds.setAttr(attributes.attr_path(naming.preview_grp, 'overrideEnabled'), True)
+    cmds.setAttr(attributes.attr_path(naming.preview_grp, 'overrideDisplayType'), 2)  # reference
+
+    markers = cmds.listRelatives(naming.marker_grp, ad=True, type='joint') or []
+    for marker in markers:
+        _previews[marker] = cmds.circle(n=naming.replace(marker, suffix='preview'), nr=(1, 0, 0), r=RADIUS, ch=False)[0]
+        cmds.parent(_previews[marker], naming.preview_grp)
+        _children[marker] = cmds.listRelatives(marker, ad=True, type='joint') or []
+
+    sel = om.MSelectionList()
+    for marker in markers:
+        sel.add(marker)
+    for i in range(sel.length()):
+        _callbacks.append(om.MNodeMessage.addAttributeChangedCallback(sel.getDependNode(i), _on_change, markers[i]))
+    _update(markers)
+
+def stop() -> dict:
+    """Stop previewing and remove the preview controls. Returns the stats of the preview that was stopped."""
+    global _debouncer
+    ret = stats()
+    if _callbacks:
+        om.MMessage.removeCallbacks(_callbacks)
+        del _callbacks[:]
+    if _debouncer:
+        _debouncer.cancel()
+        _debouncer = None
+    _previews.clear()
+    _children.clear()
+    _pending.clear()
+    if naming.preview_grp and exists(naming.preview_grp):
+        cmds.delete(naming.preview_grp)
+    return ret
+
+def is_active() -> bool:
+    return _debouncer is not None
+
+def stats() -> dict:
+    """Returns the number of updates, shapes redrawn, and the total and slowest update time in seconds"""
+    return dict(_stats)
+
+# Helper methods ---------------------------------------------------------------------------------
+
+def _on_change(msg, plug, other_plug, marker):
+    if not msg & om.MNodeMessage.kAttributeSet:
+        return
+    if not plug.partialName(useLongNames=True).startswith(_WATCHED):
+        return
+    _pending.add(marker)
+    _pending.update(_children.get(marker, []))
+    _debouncer.trigger()
+
+def _flush():
+    if not _debouncer:
+        return
+    start_time = time.perf_counter()
+    updated = []
+    while _pending and time.perf_counter() - start_time < _budget:
+        marker = _pending.pop()
+        if marker in _previews:
+            _update([marker])
+            updated.append(marker)
+    elapsed = time.perf_counter() - start_time
+
+    _stats['updates'] += 1
+    _stats['shapes'] += len(updated)
+    _stats['total'] += elapsed
+    _stats['slowest'] = max(_stats['slowest'], elapsed)
+    if _pending:
+        # Out of budget, pick up the rest on the next idle
+        _debouncer.trigger()
+
+def _update(markers):
+    for marker in markers:
+        if not exists(marker):
+            continue
+        preview = _previews[marker]
+        cmds.xform(preview, ws=True, m=cmds.xform(marker, q=True, ws=True, m=True))
+        scale = attributes.get_control_size(marker)
+        cmds.setAttr(attributes.attr_path(preview, 'scale'), scale, scale, scale)
+
+def _reset_stats():
+    _stats.update(updates=0, shapes=0, total=0.0, slowest=0.0)
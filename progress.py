@@ -0,0 +1,96 @@
+import time
+from maya import cmds
+from typing import Iterator
+from .core import *
+
+"""
+Runs a long task a few steps at a time from Maya's idle queue, behind a progress window that Esc cancels.
+
+A task is a generator yielding a description of each step before running it. Steps are run back to back
+for up to `SLICE` seconds, then the rest is queued behind Maya's own idle work, so the viewport keeps
+redrawing without adding a measurable delay to the task itself.
+Maya's progress window is modal, so the scene can't be edited between steps, and the whole task is one undo chunk.
+Cancelling closes the generator, so its `finally` blocks and context managers clean up as if it had failed.
+"""
+
+SLICE = 0.1
+
+_active = None
+
+class Task:
+    def __init__(self, steps: Iterator[str], title: str, count: int):
+        self.steps = steps
+        self.title = title
+        self.count = max(count, 1)
+        self.done = 0
+        self.cancelled = False
+
+    def start(self):
+        cmds.progressWindow(title=self.title, status='Starting', progress=0, maxValue=self.count, isInterruptable=True)
+        cmds.undoInfo(openChunk=True, chunkName=self.title)
+        cmds.evalDeferred(self._run, lowestPriority=True)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def expect(self, remaining: int):
+        """Sets the number of steps left, once the task knows its plan"""
+        self.count = max(self.done + remaining, 1)
+        cmds.progressWindow(e=True, maxValue=self.count)
+
+    def _run(self):
+        status = None
+        try:
+            end = time.perf_counter() + SLICE
+            while time.perf_counter() < end and not self._is_cancelled():
+                status = next(self.steps)
+                self.done += 1
+            if self.cancelled:
+                self.steps.close()
+                self._finish()
+                print("{0} cancelled".format(self.title))
+                return
+        except StopIteration:
+            self._finish()
+            return
+        except BaseException:
+            self._finish()
+            raise
+        if status:
+            cmds.progressWindow(e=True, status=status, progress=min(self.done, self.count))
+        cmds.evalDeferred(self._run, lowestPriority=True)
+
+    def _is_cancelled(self) -> bool:
+        if not self.cancelled and cmds.progressWindow(q=True, isCancelled=True):
+            self.cancelled = True
+        return self.cancelled
+
+    def _finish(self):
+        global _active
+        if _active is not self:
+            return
+        _active = None
+        cmds.progressWindow(endProgress=True)
+        cmds.undoInfo(closeChunk=True)
+
+def run(steps: Iterator[str], title: str, count: int) -> Task:
+    """Starts running the steps in the background, with a progress bar out of `count` steps"""
+    global _active
+    if _active:
+        raise Exception("{0} is still running".format(_active.title))
+    _active = Task(steps, title, count)
+    _active.start()
+    return _active
+
+def expect(remaining: int):
+    """Tells the running task how many steps it has left. Does nothing outside of a task."""
+    if _active:
+        _active.expect(remaining)
+
+def is_running() -> bool:
+    return _active is not None
+
+def cancel():
+    """Cancels the running task, once its current step is done"""
+    if _active:
+        _active.cancel()
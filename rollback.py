@@ -0,0 +1,143 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from maya import cmds
+import maya.api.OpenMaya as om
+from typing import Iterator, List
+from .core import *
+from . import cache
+
+"""
+Restores the active character's rig when a build fails.
+
+Before building, the existing rig groups are exported to a temporary file in a single call.
+Nodes created during the build are tracked, so a failed build is undone by deleting them and re-importing the file,
+which takes the same time no matter how far the build got.
+Nodes the build may move into new groups, such as the character's geometry, are put back under their old parents first.
+"""
+
+EXTENSION = '.mb'
+
+class Snapshot:
+    def __init__(self):
+        self.path = None
+        self._created = []
+        self._parents = dict()
+        self._callback = None
+        self._tracking = True
+
+    def take(self):
+        """Saves the current rig groups and starts tracking new nodes"""
+        existing = [grp for grp in cache.rig_groups() if exists(grp)]
+        if existing:
+            handle, self.path = tempfile.mkstemp(prefix='mayarig_', suffix=EXTENSION)
+            os.close(handle)
+            prev_selection = selection.get()
+            selection.set_(existing)
+            cmds.file(
+                self.path,
+                exportSelected=True,
+                type='mayaBinary',
+                force=True,
+                constructionHistory=True,
+                channels=True,
+                constraints=True,
+                expressions=True,
+                shader=False
+            )
+            selection.set_(prev_selection)
+        self._parents = {node: joints.get_parent(node) for node in self._outside_rig() if exists(node)}
+        self._callback = om.MDGMessage.addNodeAddedCallback(self._on_added, 'dependNode')
+
+    def restore(self):
+        """Deletes everything built since `take` and brings back the saved rig groups"""
+        self._stop_tracking()
+        for node, parent in self._parents.items():
+            if exists(node) and joints.get_parent(node) != parent:
+                if parent and exists(parent):
+                    cmds.parent(node, parent)
+                else:
+                    cmds.parent(node, world=True)
+        doomed = [grp for grp in cache.rig_groups() if exists(grp)]
+        if doomed:
+            cmds.delete(doomed)
+        # Whatever the build created outside of the rig groups
+        doomed = [name for name in (self._name(handle) for handle in self._created) if name]
+        if doomed:
+            cmds.delete(doomed)
+        if self.path:
+            cmds.file(self.path, i=True, type='mayaBinary', defaultNamespace=True, ignoreVersion=True, preserveReferences=True)
+            cache.assemble()
+        self.discard()
+
+    def discard(self):
+        """Stops tracking and removes the saved rig groups"""
+        self._stop_tracking()
+        self._created = []
+        self._parents = dict()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+    def _outside_rig(self) -> List[str]:
+        """The nodes in the character groups that aren't saved with the rig groups"""
+        ret = [naming.geometry_grp]
+        for grp in [naming.character_grp, naming.no_touch_grp]:
+            if exists(grp):
+                ret += cmds.listRelatives(grp, children=True, type='transform') or []
+        rig_groups = cache.rig_groups()
+        return [node for node in dict.fromkeys(ret) if node not in rig_groups]
+
+    def pause(self):
+        """Stops recording new nodes until `resume`, so nodes created meanwhile are left alone by `restore`"""
+        self._tracking = False
+
+    def resume(self):
+        self._tracking = True
+
+    def _on_added(self, node, *args):
+        if self._tracking:
+            self._created.append(om.MObjectHandle(node))
+
+    def _stop_tracking(self):
+        if self._callback is not None:
+            om.MMessage.removeCallback(self._callback)
+            self._callback = None
+
+    def _name(self, handle: om.MObjectHandle) -> str:
+        if not handle.isValid():
+            return None
+        node = handle.object()
+        if node.hasFn(om.MFn.kDagNode):
+            return om.MDagPath.getAPathTo(node).fullPathName()
+        return om.MFnDependencyNode(node).name()
+
+@contextmanager
+def guard():
+    """Restores the rig groups if the enclosed build raises"""
+    snapshot = Snapshot()
+    snapshot.take()
+    try:
+        yield snapshot
+    except BaseException:
+        cmds.warning("Build did not finish, restoring the previous rig")
+        snapshot.restore()
+        raise
+    snapshot.discard()
+
+def guarded(steps: Iterator[str]) -> Iterator[str]:
+    """Runs the steps of a build generator, restoring the rig groups if one raises or the build is closed part way.
+    Only nodes created while a step runs are tracked, so anything made between steps survives a restore."""
+    with guard() as snapshot:
+        try:
+            while True:
+                try:
+                    status = next(steps)
+                except StopIteration:
+                    return
+                finally:
+                    snapshot.pause()
+                yield status
+                snapshot.resume()
+        finally:
+            steps.close()
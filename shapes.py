@@ -0,0 +1,211 @@
+import json
+import os
+from maya import cmds
+import maya.api.OpenMaya as om
+import numpy as np
+from typing import Dict, List, NamedTuple
+from .core import *
+
+"""
+A library of control shapes, exported from one rig and applied to the matching controls of any other.
+
+A library is one compressed .npz file of packed arrays: the CVs and knots of every curve laid end to end,
+the degree, form and array offsets of each curve, the curve offsets of each shape, and a json header
+recording where each shape came from.
+CVs are stored divided by the control's built scale, so a shape fits the same control on a character of any size.
+Shapes are keyed by control name without the character initials, so `BP_l_hand_ikControl` and `XY_l_hand_ikControl` share one.
+"""
+
+SHAPES_PATH = os.environ.get('MAYARIG_SHAPES_PATH', os.path.join(os.path.expanduser('~'), '.mayarig', 'shapes.npz'))
+VERSION = 1
+# Drawing overrides carried over when a control's curves are replaced
+OVERRIDE_ATTRS = ['overrideEnabled', 'overrideRGBColors', 'overrideColor', 'overrideColorRGB']
+
+class Curve(NamedTuple):
+    degree: int
+    form: int
+    # (numCVs, 3) object space positions
+    cvs: np.ndarray
+    knots: np.ndarray
+
+class Library(NamedTuple):
+    shapes: Dict[str, List[Curve]]
+    metadata: Dict[str, dict]
+
+def export_selected(path: str = None, merge: bool = True) -> List[str]:
+    """Adds the shapes of the selected controls to the library"""
+    ctrls = [obj for obj in selection.get() if _curve_shapes(obj)]
+    if not ctrls:
+        raise Exception("Select the controls to export the shapes of")
+    return export(ctrls, path, merge)
+
+def export(ctrls: List[str], path: str = None, merge: bool = True) -> List[str]:
+    """Saves the shapes of `ctrls` to the library at `path`, replacing any shapes of the same name.
+    Without `merge`, the library only keeps the new shapes. Returns the names of the saved shapes."""
+    path = path or SHAPES_PATH
+    library = load(path) if merge and os.path.exists(path) else Library(dict(), dict())
+    names = []
+    for ctrl in ctrls:
+        name = shape_name(ctrl)
+        scale = _built_scale(ctrl)
+        library.shapes[name] = [curve._replace(cvs=curve.cvs / scale) for curve in read(ctrl)]
+        library.metadata[name] = dict(control=ctrl, character=naming.character_grp)
+        names.append(name)
+    save(library, path)
+    print("Exported {0} control shapes to {1}".format(len(names), path))
+    return names
+
+def apply(control_groups: List[str] = None, path: str = None, names: List[str] = None) -> List[str]:
+    """Gives every control under `control_groups`, or the active character's controls, its shape from the library.
+    With `names`, only those shapes are applied. Returns the controls that were reshaped."""
+    library = load(path)
+    control_groups = control_groups or [naming.control_grp]
+    ctrls = []
+    for grp in control_groups:
+        curves = cmds.listRelatives(grp, ad=True, type='nurbsCurve', fullPath=True) or []
+        ctrls += cmds.listRelatives(curves, p=True, fullPath=True) or []
+    ctrls = [ctrl for ctrl in dict.fromkeys(ctrls) if shape_name(ctrl) in library.shapes]
+    if names is not None:
+        ctrls = [ctrl for ctrl in ctrls if shape_name(ctrl) in names]
+
+    with trace.span('shapes.apply', controls=len(ctrls)):
+        # Controls with the same curve layout are reshaped in place, keeping their shape nodes and connections
+        rebuilt = []
+        for ctrl in ctrls:
+            curves = library.shapes[shape_name(ctrl)]
+            scale = _built_scale(ctrl)
+            shapes = _curve_shapes(ctrl)
+            if _same_layout(shapes, curves):
+                for shape, curve in zip(shapes, curves):
+                    _set(shape, curve, scale)
+            else:
+                rebuilt.append((ctrl, curves, scale, shapes))
+        _rebuild(rebuilt)
+    print("Applied library shapes to {0} controls ({1} rebuilt)".format(len(ctrls), len(rebuilt)))
+    return ctrls
+
+def read(ctrl: str) -> List[Curve]:
+    """The curves making up a control's shape"""
+    ret = []
+    for shape in _curve_shapes(ctrl):
+        curve = om.MFnNurbsCurve(shape)
+        ret.append(Curve(
+            curve.degree,
+            curve.form,
+            np.array([(cv.x, cv.y, cv.z) for cv in curve.cvPositions()]),
+            np.array(curve.knots())))
+    return ret
+
+def shape_name(ctrl: str) -> str:
+    """The library name of a control's shape, which is its name without the character initials"""
+    name = ctrl.split('|')[-1]
+    return name[name.find('_') + 1:]
+
+# Library files ----------------------------------------------------------------------------------
+
+def load(path: str = None) -> Library:
+    path = path or SHAPES_PATH
+    if not os.path.exists(path):
+        raise Exception("No control shape library at " + path)
+    with np.load(path, allow_pickle=False) as data:
+        header = json.loads(str(data['header']))
+        if header['version'] != VERSION:
+            raise Exception("Unsupported control shape library version {0} in {1}".format(header['version'], path))
+        degrees, forms = data['degrees'].tolist(), data['forms'].tolist()
+        cvs, knots = data['cvs'].astype(float), data['knots']
+        cv_offsets, knot_offsets, curve_offsets = data['cvOffsets'], data['knotOffsets'], data['curveOffsets']
+    shapes = dict()
+    for i, name in enumerate(header['names']):
+        shapes[name] = [
+            Curve(degrees[c], forms[c], cvs[cv_offsets[c]:cv_offsets[c + 1]], knots[knot_offsets[c]:knot_offsets[c + 1]])
+            for c in range(curve_offsets[i], curve_offsets[i + 1])
+        ]
+    return Library(shapes, header['metadata'])
+
+def save(library: Library, path: str = None):
+    path = path or SHAPES_PATH
+    names = sorted(library.shapes)
+    curves = [curve for name in names for curve in library.shapes[name]]
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    np.savez_compressed(
+        path,
+        header=np.array(json.dumps(dict(version=VERSION, names=names, metadata=library.metadata))),
+        curveOffsets=_offsets([len(library.shapes[name]) for name in names]),
+        degrees=np.array([curve.degree for curve in curves], dtype=np.int8),
+        forms=np.array([curve.form for curve in curves], dtype=np.int8),
+        cvOffsets=_offsets([len(curve.cvs) for curve in curves]),
+        knotOffsets=_offsets([len(curve.knots) for curve in curves]),
+        cvs=np.concatenate([curve.cvs for curve in curves] or [np.empty((0, 3))]).astype(np.float32),
+        knots=np.concatenate([curve.knots for curve in curves] or [np.empty(0)]))
+
+# Helper methods ---------------------------------------------------------------------------------
+
+def _offsets(counts: List[int]) -> np.ndarray:
+    return np.concatenate([[0], np.cumsum(counts, dtype=np.int64)]).astype(np.int32)
+
+def _curve_shapes(ctrl: str) -> List[om.MObject]:
+    path = om.MSelectionList().add(ctrl).getDagPath(0)
+    shapes = [path.child(i) for i in range(path.childCount())]
+    return [shape for shape in shapes if shape.hasFn(om.MFn.kNurbsCurve) and not om.MFnDagNode(shape).isIntermediateObject]
+
+def _built_scale(ctrl: str) -> float:
+    if exists(ctrl, controls.BUILT_SCALE_ATTR):
+        scale = attributes.get(ctrl, controls.BUILT_SCALE_ATTR)
+        if scale > 0:
+            return scale
+    return 1.0
+
+def _same_layout(shapes: List[om.MObject], curves: List[Curve]) -> bool:
+    if len(shapes) != len(curves):
+        return False
+    for shape, curve in zip(shapes, curves):
+        fn = om.MFnNurbsCurve(shape)
+        if fn.degree != curve.degree or fn.form != curve.form or fn.numCVs != len(curve.cvs):
+            return False
+    return True
+
+def _curve_flags(curve: Curve, scale: float) -> dict:
+    return dict(
+        degree=curve.degree,
+        point=(curve.cvs * scale).tolist(),
+        knot=curve.knots.tolist(),
+        periodic=curve.form == om.MFnNurbsCurve.kPeriodic)
+
+def _set(shape: om.MObject, curve: Curve, scale: float):
+    cmds.curve(om.MFnDagNode(shape).fullPathName(), replace=True, **_curve_flags(curve, scale))
+
+def _rebuild(rebuilt: list):
+    """Replaces the curves of each control, deleting every old curve in one call"""
+    if not rebuilt:
+        return
+    kept = []
+    for ctrl, curves, scale, shapes in rebuilt:
+        names = [om.MFnDagNode(shape).partialPathName() for shape in shapes]
+        overrides = {attr: cmds.getAttr(naming.attr_path(names[0], attr)) for attr in OVERRIDE_ATTRS} if names else dict()
+        # Incoming connections, such as the visibility of the FK/IK switch letters, move to the curve of the same index
+        inputs = [(cmds.listConnections(name, s=True, d=False, c=True, p=True) or []) for name in names]
+        kept.append((overrides, inputs))
+    cmds.delete([om.MFnDagNode(shape).partialPathName() for _, _, _, shapes in rebuilt for shape in shapes])
+
+    for (ctrl, curves, scale, _), (overrides, inputs) in zip(rebuilt, kept):
+        short_name = ctrl.split('|')[-1]
+        for i, curve in enumerate(curves):
+            # Curves are created under a temporary transform, then moved under the control with their points in its space
+            tmp = cmds.curve(**_curve_flags(curve, scale))
+            shape = cmds.parent(cmds.listRelatives(tmp, shapes=True, fullPath=True), ctrl, s=True, r=True)[0]
+            cmds.delete(tmp)
+            name = cmds.rename(shape, '{0}Shape{1}'.format(short_name, i or ''))
+            _restore(name, overrides, inputs[i] if i < len(inputs) else [])
+
+def _restore(name: str, overrides: dict, inputs: List[str]):
+    for attr, value in overrides.items():
+        if isinstance(value, list):
+            cmds.setAttr(naming.attr_path(name, attr), *value[0])
+        else:
+            cmds.setAttr(naming.attr_path(name, attr), value)
+    for destination, source in zip(inputs[::2], inputs[1::2]):
+        attr = destination.split('.', 1)[1]
+        if attr != 'create':
+            cmds.connectAttr(source, naming.attr_path(name, attr))
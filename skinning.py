@@ -0,0 +1,302 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from maya import cmds
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
+import numpy as np
+from typing import List, Tuple
+from .core import *
+
+"""
+Automatic skin binding of the character's geometry to its bind joints.
+
+Each bind joint owns the bones to its child joints, or a single point if it has none.
+Vertices are weighted by their distance to the nearest bone of each joint, relative to the nearest bone overall,
+so weights stay in the same range regardless of the character's scale.
+Distances are computed in chunks of vertices on a thread pool, and only the strongest `MAX_INFLUENCES` weights per vertex are kept,
+so memory grows with the vertex count instead of vertex count times joint count.
+
+Rebuilding a rig deletes its bind joints, so the weights of every skin cluster bound to them are saved first and restored afterwards.
+Saved weights are kept in `WEIGHTS_DIR` as the same influence index and weight arrays, in .npy files that are memory mapped on load,
+next to a json file naming the influences and the cluster settings.
+Maya's arrays can't wrap NumPy buffers, so weights are copied into them, one batch of at most `CHUNK_VALUES` weights at a time.
+"""
+
+MAX_INFLUENCES = 4
+FALLOFFS = ['distance', 'heat']
+# Inverse distance exponent
+POWER = 4.0
+# Heat falloff width, in multiples of the average bone length
+SPREAD = 0.25
+# Weights below this are dropped before normalizing
+PRUNE = 0.01
+# Values per chunk and per apply call, bounding the size of temporary arrays
+CHUNK_VALUES = 1 << 20
+WORKERS = min(8, os.cpu_count() or 1)
+WEIGHTS_DIR = os.environ.get('MAYARIG_WEIGHTS_DIR', os.path.join(os.path.expanduser('~'), '.mayarig', 'weights'))
+
+def bind(meshes: List[str] = None, falloff: str = 'distance', max_influences: int = MAX_INFLUENCES, replace: bool = False) -> List[str]:
+    """Binds `meshes`, or every mesh in the geometry group, to the bind joints and returns the new skin clusters.
+    Meshes that are already skinned are skipped unless `replace` is set."""
+    if falloff not in FALLOFFS:
+        raise Exception("Unknown falloff `{0}`, expected one of {1}".format(falloff, FALLOFFS))
+    influences = cmds.listRelatives(naming.bind_grp, ad=True, type='joint') or []
+    if not influences:
+        raise Exception("No bind joints in " + naming.bind_grp)
+    influences.reverse()
+    starts, ends, owners = bones(influences)
+
+    ret = []
+    for mesh in meshes or geometry():
+        existing = skin_cluster(mesh)
+        if existing and not replace:
+            print("Skipping {0}, already bound by {1}".format(mesh, existing))
+            continue
+        if existing:
+            cmds.skinCluster(existing, e=True, unbind=True)
+        with trace.span('skinning.bind', mesh=mesh):
+            indices, values = weights(points(mesh), starts, ends, owners, len(influences), falloff, max_influences)
+            cluster = cmds.skinCluster(
+                influences, mesh,
+                toSelectedBones=True,
+                bindMethod=0,
+                maximumInfluences=max_influences,
+                normalizeWeights=1,
+                name=_transform(mesh) + '_skinCluster')[0]
+            apply(cluster, mesh, influences, indices, values)
+        ret.append(cluster)
+    return ret
+
+def weights(points: np.ndarray, starts: np.ndarray, ends: np.ndarray, owners: np.ndarray, count: int, falloff: str = 'distance', max_influences: int = MAX_INFLUENCES) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the (len(points), max_influences) influence indices and normalized weights of each point.
+    `starts`, `ends` and `owners` describe the bones, and which of the `count` influences each belongs to."""
+    max_influences = min(max_influences, count)
+    indices = np.empty((len(points), max_influences), dtype=np.int32)
+    values = np.empty((len(points), max_influences), dtype=np.float32)
+    order = np.argsort(owners, kind='stable')
+    first_bone = np.searchsorted(owners[order], np.arange(count))
+    starts, ends = starts[order], ends[order]
+    spread = SPREAD * max(np.mean(np.linalg.norm(ends - starts, axis=1)), 1e-6)
+
+    def solve(chunk: slice):
+        distance = np.minimum.reduceat(_bone_distances(points[chunk], starts, ends), first_bone, axis=1)
+        nearest = distance.min(axis=1, keepdims=True)
+        if falloff == 'heat':
+            weight = np.exp(-((distance - nearest) / spread) ** 2)
+        else:
+            weight = ((nearest + 1e-6) / (distance + 1e-6)) ** POWER
+        if max_influences < count:
+            strongest = np.argpartition(weight, -max_influences, axis=1)[:, -max_influences:]
+        else:
+            strongest = np.broadcast_to(np.arange(count), weight.shape)
+        weight = np.take_along_axis(weight, strongest, axis=1)
+        weight[weight < PRUNE * weight.max(axis=1, keepdims=True)] = 0
+        indices[chunk] = strongest
+        values[chunk] = weight / weight.sum(axis=1, keepdims=True)
+
+    size = max(1, CHUNK_VALUES // max(len(starts), 1))
+    chunks = [slice(i, i + size) for i in range(0, len(points), size)]
+    with ThreadPoolExecutor(WORKERS) as pool:
+        list(pool.map(solve, chunks))
+    return indices, values
+
+def apply(cluster: str, mesh: str, influences: List[str], indices: np.ndarray, values: np.ndarray):
+    """Replaces the weights of `cluster` on `mesh`, in one call per `CHUNK_VALUES` weights"""
+    fn = oma.MFnSkinCluster(_object(cluster))
+    path = om.MSelectionList().add(mesh).getDagPath(0)
+    logical = np.array([fn.indexForInfluenceObject(om.MSelectionList().add(joint).getDagPath(0)) for joint in influences])
+    used = np.unique(indices[(values > 0) & (indices >= 0)])
+    column = np.zeros(len(influences), dtype=np.int64)
+    column[used] = np.arange(len(used))
+
+    size = max(1, CHUNK_VALUES // max(len(used), 1))
+    for start in range(0, len(indices), size):
+        stop = min(start + size, len(indices))
+        # Only weighted entries are scattered; unused influences share column 0 and would overwrite its weights
+        weighted = (values[start:stop] > 0) & (indices[start:stop] >= 0)
+        rows = np.nonzero(weighted)[0]
+        dense = np.zeros((stop - start, len(used)))
+        dense[rows, column[indices[start:stop][weighted]]] = values[start:stop][weighted]
+        components = om.MFnSingleIndexedComponent()
+        vertices = components.create(om.MFn.kMeshVertComponent)
+        components.addElements(om.MIntArray(range(start, stop)))
+        fn.setWeights(path, vertices, om.MIntArray(logical[used].tolist()), om.MDoubleArray(dense.ravel().tolist()), normalize=False)
+
+def save_weights(directory: str = None, unbind: bool = True) -> List[str]:
+    """Saves, and unless told otherwise unbinds, every skin cluster bound to the bind joints.
+    Returns the meshes they were bound to."""
+    directory = directory or _weights_dir()
+    ret = []
+    for cluster in bound_clusters():
+        mesh = cmds.skinCluster(cluster, q=True, g=True)[0]
+        with trace.span('skinning.save_weights', mesh=mesh):
+            influences, indices, values = read(cluster, mesh)
+            os.makedirs(directory, exist_ok=True)
+            name = _file_name(mesh)
+            np.save(os.path.join(directory, name + '.indices.npy'), indices)
+            np.save(os.path.join(directory, name + '.weights.npy'), values)
+            with open(os.path.join(directory, name + '.json'), 'w') as file:
+                json.dump(dict(
+                    mesh=mesh,
+                    cluster=cluster,
+                    influences=influences,
+                    maxInfluences=attributes.get(cluster, 'maxInfluences'),
+                    skinningMethod=attributes.get(cluster, 'skinningMethod'),
+                ), file, indent=2)
+            if unbind:
+                cmds.skinCluster(cluster, e=True, unbind=True)
+        ret.append(mesh)
+    return ret
+
+def restore_weights(meshes: List[str], directory: str = None) -> List[str]:
+    """Rebinds `meshes` with their saved weights, and returns the new skin clusters.
+    Weights of influences that no longer exist are spread over the remaining ones, or recomputed if none remain."""
+    directory = directory or _weights_dir()
+    ret = []
+    for mesh in meshes:
+        name = _file_name(mesh)
+        with open(os.path.join(directory, name + '.json')) as file:
+            saved = json.load(file)
+        indices = np.load(os.path.join(directory, name + '.indices.npy'), mmap_mode='r')
+        values = np.load(os.path.join(directory, name + '.weights.npy'), mmap_mode='r')
+
+        with trace.span('skinning.restore_weights', mesh=mesh):
+            kept = [exists(joint) for joint in saved['influences']]
+            influences = [joint for joint, keep in zip(saved['influences'], kept) if keep]
+            if not influences:
+                print("No saved influences of {0} remain, skipping".format(mesh))
+                continue
+            if not all(kept):
+                print("Dropping missing influences of {0}: {1}".format(mesh, [joint for joint, keep in zip(saved['influences'], kept) if not keep]))
+                remap = np.cumsum(kept) - 1
+                padding = indices < 0
+                values = np.where(padding | ~np.array(kept)[indices], 0, values)
+                indices = np.where(padding, -1, remap[indices])
+                total = values.sum(axis=1, keepdims=True)
+                orphans = total[:, 0] == 0
+                values = np.divide(values, total, out=np.zeros_like(values), where=total > 0)
+                if orphans.any():
+                    starts, ends, owners = bones(influences)
+                    found_indices, found_values = weights(points(mesh)[orphans], starts, ends, owners, len(influences), max_influences=indices.shape[1])
+                    indices[orphans, :found_values.shape[1]] = found_indices
+                    values[orphans, :found_values.shape[1]] = found_values
+
+            existing = skin_cluster(mesh)
+            if existing:
+                cmds.skinCluster(existing, e=True, unbind=True)
+
+            cluster = cmds.skinCluster(
+                influences, mesh,
+                toSelectedBones=True,
+                bindMethod=0,
+                maximumInfluences=saved['maxInfluences'],
+                skinMethod=saved['skinningMethod'],
+                normalizeWeights=1,
+                name=saved['cluster'])[0]
+            apply(cluster, mesh, influences, indices, values)
+        ret.append(cluster)
+    return ret
+
+def read(cluster: str, mesh: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Returns the influences of `cluster`, and the influence indices and weights of each vertex of `mesh` with any weight on them.
+    Rows with fewer weights than the widest one are padded with index -1 and weight 0."""
+    fn = oma.MFnSkinCluster(_object(cluster))
+    path = om.MSelectionList().add(mesh).getDagPath(0)
+    influences = [influence.partialPathName() for influence in fn.influenceObjects()]
+    count = om.MFnMesh(path).numVertices
+    chunks = []
+    size = max(1, CHUNK_VALUES // len(influences))
+    for start in range(0, count, size):
+        stop = min(start + size, count)
+        components = om.MFnSingleIndexedComponent()
+        vertices = components.create(om.MFn.kMeshVertComponent)
+        components.addElements(om.MIntArray(range(start, stop)))
+        dense = np.array(fn.getWeights(path, vertices)[0]).reshape(stop - start, len(influences))
+        width = max(1, int(np.count_nonzero(dense, axis=1).max()))
+        strongest = np.argsort(-dense, axis=1, kind='stable')[:, :width]
+        chunks.append((strongest, np.take_along_axis(dense, strongest, axis=1)))
+    width = max(chunk[0].shape[1] for chunk in chunks)
+    indices = np.full((count, width), -1, dtype=np.int32)
+    values = np.zeros((count, width), dtype=np.float32)
+    start = 0
+    for strongest, weight in chunks:
+        indices[start:start + len(weight), :weight.shape[1]] = strongest
+        values[start:start + len(weight), :weight.shape[1]] = weight
+        start += len(weight)
+    return influences, indices, values
+
+def reset_bind_pose(joints_: List[str]):
+    """Makes the current pose of `joints_` their bind pose in every skin cluster they influence,
+    so joints moved while bound don't shift the skin"""
+    joints_ = set(joints_)
+    for cluster in bound_clusters():
+        fn = oma.MFnSkinCluster(_object(cluster))
+        for influence in fn.influenceObjects():
+            joint = influence.partialPathName()
+            if joint not in joints_:
+                continue
+            index = fn.indexForInfluenceObject(influence)
+            cmds.setAttr(
+                attributes.attr_path(cluster, 'bindPreMatrix[{0}]'.format(index)),
+                attributes.get(joint, 'worldInverseMatrix[0]'),
+                type='matrix')
+
+def bound_clusters() -> List[str]:
+    """The skin clusters with at least one bind joint influence"""
+    if not exists(naming.bind_grp):
+        return []
+    bind_joints = set(cmds.listRelatives(naming.bind_grp, ad=True, type='joint') or [])
+    return [cluster for cluster in cmds.ls(type='skinCluster') if bind_joints.intersection(cmds.skinCluster(cluster, q=True, inf=True) or [])]
+
+def bones(influences: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns the start and end world positions of each bone, and the index of the influence it belongs to"""
+    index = {joint: i for i, joint in enumerate(influences)}
+    position = np.array([cmds.xform(joint, q=True, ws=True, t=True) for joint in influences])
+    starts, ends, owners = [], [], []
+    for i, joint in enumerate(influences):
+        children = [child for child in cmds.listRelatives(joint, c=True, type='joint') or [] if child in index]
+        for child in children or [joint]:
+            starts.append(position[i])
+            ends.append(position[index[child]])
+            owners.append(i)
+    return np.array(starts), np.array(ends), np.array(owners)
+
+def points(mesh: str) -> np.ndarray:
+    """World space vertex positions of `mesh` as an (n, 3) array.
+    Read with one MFnMesh call and converted point by point, without a Python list of every coordinate."""
+    path = om.MSelectionList().add(mesh).getDagPath(0)
+    return np.array(om.MFnMesh(path).getPoints(om.MSpace.kWorld))[:, :3]
+
+def geometry() -> List[str]:
+    """The mesh shapes in the geometry group"""
+    shapes = cmds.listRelatives(naming.geometry_grp, ad=True, type='mesh', fullPath=True) or []
+    return [shape for shape in shapes if not attributes.get(shape, 'intermediateObject')]
+
+def skin_cluster(mesh: str) -> str:
+    clusters = cmds.ls(cmds.listHistory(mesh, pdo=True) or [], type='skinCluster')
+    return clusters[0] if clusters else None
+
+# Helper methods ---------------------------------------------------------------------------------
+
+def _bone_distances(points: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """(len(points), len(starts)) distance from each point to each bone segment, expanded into matrix products"""
+    direction = ends - starts
+    length = np.einsum('ij,ij->i', direction, direction)
+    along = points @ direction.T - np.einsum('ij,ij->i', starts, direction)
+    t = np.clip(along / np.where(length == 0, 1, length), 0, 1)
+    squared = np.einsum('ij,ij->i', points, points)[:, np.newaxis] - 2 * points @ starts.T + np.einsum('ij,ij->i', starts, starts)
+    squared += t * (t * length - 2 * along)
+    return np.sqrt(np.maximum(squared, 0, out=squared), out=squared)
+
+def _weights_dir() -> str:
+    return os.path.join(WEIGHTS_DIR, naming.character_grp)
+
+def _file_name(mesh: str) -> str:
+    return _transform(mesh).replace(':', '_')
+
+def _object(node: str) -> om.MObject:
+    return om.MSelectionList().add(node).getDependNode(0)
+
+def _transform(shape: str) -> str:
+    return cmds.listRelatives(shape, p=True)[0]
@@ -0,0 +1,165 @@
+import itertools
+from maya import cmds
+import maya.api.OpenMaya as om
+import numpy as np
+from typing import Dict, List, Set
+from .core import *
+from .core import animation
+from .core.debounce import Debouncer
+
+"""
+Symmetric editing of the active character's markers.
+
+When editing starts, every marker is paired with its opposite through `naming.flip`. Markers of symmetrical limbs,
+whose other side only appears once the rig is built, are paired with a stand-in joint in the character's symmetry group.
+Center markers are paired with themselves and kept on the YZ plane.
+Moving a marker queues it and its descendants. Once edits pause for `window` seconds, the queued markers are read,
+mirrored across the YZ plane with NumPy and written to their partners one hierarchy level at a time,
+so parents land before the children whose local positions depend on them. Orientations are mirrored by behavior,
+like `joints.mirror` does for the built rig. The writes of each update go through cmds as one undo chunk.
+"""
+
+WINDOW = 0.05
+# Mirrors the axes of a reflected orientation by behavior, so they point the same way relative to the limb
+BEHAVIOR = np.diag([1.0, -1.0, -1.0])
+_WATCHED = ('translate', 'rotate', 'jointOrient')
+
+_callbacks = []
+_pairs: Dict[str, str] = dict()
+_children: Dict[str, List[str]] = dict()
+_depths: Dict[str, int] = dict()
+_pending: Set[str] = set()
+_debouncer: Debouncer = None
+_mirroring = False
+
+def start(window: float = WINDOW):
+    """Start mirroring marker edits of the active character to the other side"""
+    global _debouncer
+    stop()
+    _debouncer = Debouncer(_flush, window)
+
+    markers = cmds.listRelatives(naming.marker_grp, ad=True, type='joint') or []
+    present = set(markers)
+    symmetrical = {marker for limb in joints.partition(naming.marker_grp) if limb.symmetrical for marker in limb.chain}
+    one_sided = [
+        marker for marker in markers
+        if marker in symmetrical and naming.get_side(marker) != Side.CENTER and naming.flip(marker) not in present
+    ]
+    if one_sided:
+        groups.recreate(n=naming.symmetry_grp)
+        cmds.setAttr(attributes.attr_path(naming.symmetry_grp, 'overrideEnabled'), True)
+        cmds.setAttr(attributes.attr_path(naming.symmetry_grp, 'overrideDisplayType'), 2)  # reference
+    for marker in one_sided:
+        _pairs[marker] = cmds.createNode('joint', n=naming.replace(marker, side=naming.get_side(naming.flip(marker)), suffix='mirror'), p=naming.symmetry_grp)
+    for marker in markers:
+        partner = naming.flip(marker)
+        if partner != marker and partner in present:
+            _pairs[marker] = partner
+        elif naming.get_side(marker) == Side.CENTER:
+            _pairs[marker] = marker
+
+    for marker, path in zip(markers, cmds.ls(markers, long=True)):
+        _depths[marker] = path.count('|')
+    for marker in _pairs:
+        _children[marker] = [child for child in cmds.listRelatives(marker, ad=True, type='joint') or [] if child in _pairs]
+
+    sel = om.MSelectionList()
+    paired = list(_pairs)
+    for marker in paired:
+        sel.add(marker)
+    for i in range(sel.length()):
+        _callbacks.append(om.MNodeMessage.addAttributeChangedCallback(sel.getDependNode(i), _on_change, paired[i]))
+    # The stand-ins start out on the other side and center markers on the plane; real pairs are left alone until one of them moves
+    _mirror_levels(one_sided + [marker for marker in _pairs if _pairs[marker] == marker])
+
+def stop():
+    """Stop mirroring and remove the stand-in markers"""
+    global _debouncer
+    if _callbacks:
+        om.MMessage.removeCallbacks(_callbacks)
+        del _callbacks[:]
+    if _debouncer:
+        _debouncer.cancel()
+        _debouncer = None
+    _pairs.clear()
+    _children.clear()
+    _depths.clear()
+    _pending.clear()
+    if naming.symmetry_grp and exists(naming.symmetry_grp):
+        cmds.delete(naming.symmetry_grp)
+
+def is_active() -> bool:
+    return _debouncer is not None
+
+def pairs() -> Dict[str, str]:
+    """Each mirrored marker and the marker or stand-in its edits are copied to. Center markers are their own partner."""
+    return dict(_pairs)
+
+# Helper methods ---------------------------------------------------------------------------------
+
+def _on_change(msg, plug, other_plug, marker):
+    if _mirroring or not msg & om.MNodeMessage.kAttributeSet:
+        return
+    if not plug.partialName(useLongNames=True).startswith(_WATCHED):
+        return
+    _pending.add(marker)
+    _pending.update(_children.get(marker, []))
+    _debouncer.trigger()
+
+def _flush():
+    if not _debouncer or not _pending:
+        return
+    # A marker and its partner may both be queued; the one edited last can't be told apart, so the first one wins
+    queued = sorted(_pending, key=_depths.get)
+    _pending.clear()
+    sources = []
+    for marker in queued:
+        if _pairs[marker] not in sources:
+            sources.append(marker)
+    with trace.span('symmetry.flush', markers=len(sources)):
+        _mirror_levels(sources)
+
+def _mirror_levels(sources: List[str]):
+    cmds.undoInfo(openChunk=True, chunkName='Symmetric Editing')
+    try:
+        for _, level in itertools.groupby(sorted(sources, key=_depths.get), key=_depths.get):
+            _mirror(list(level))
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+def _mirror(sources: List[str]):
+    """Moves the partners of `sources` to their mirrored world transforms, and center markers onto the YZ plane"""
+    global _mirroring
+    sources = [marker for marker in sources if exists(marker) and exists(_pairs[marker])]
+    if not sources:
+        return
+    # Center markers are their own partner, which one selection list would merge
+    source_sel, partner_sel = om.MSelectionList(), om.MSelectionList()
+    for marker in sources:
+        source_sel.add(marker)
+        partner_sel.add(_pairs[marker])
+    count = len(sources)
+    worlds = np.empty((count, 4, 4))
+    parents = np.empty((count, 4, 4))
+    for i in range(count):
+        worlds[i] = np.reshape(source_sel.getDagPath(i).inclusiveMatrix(), (4, 4))
+        parents[i] = np.reshape(partner_sel.getDagPath(i).exclusiveMatrix(), (4, 4))
+    centered = np.array([_pairs[marker] == marker for marker in sources])
+
+    worlds[:, :3, :3] /= np.linalg.norm(worlds[:, :3, :3], axis=-1, keepdims=True)
+    worlds[~centered, :3, :3] = worlds[~centered, :3, :3] @ BEHAVIOR
+    worlds[:, 3, 0] *= np.where(centered, 0, -1)
+    local = worlds @ np.linalg.inv(parents)
+    local[:, :3, :3] /= np.linalg.norm(local[:, :3, :3], axis=-1, keepdims=True)
+    orients = animation.rotation_xyz(np.radians([cmds.getAttr(attributes.attr_path(_pairs[marker], 'jointOrient'))[0] for marker in sources]))
+    rotations = np.degrees(animation.euler_xyz(local[:, :3, :3] @ np.swapaxes(orients, -1, -2)))
+
+    _mirroring = True
+    try:
+        for i, marker in enumerate(sources):
+            partner = _pairs[marker]
+            cmds.setAttr(attributes.attr_path(partner, 'translate'), *local[i, 3, :3].tolist())
+            if not centered[i]:
+                cmds.setAttr(attributes.attr_path(partner, 'rotate'), *rotations[i].tolist())
+    finally:
+        _mirroring = False
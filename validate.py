@@ -0,0 +1,124 @@
+from maya import cmds
+import maya.api.OpenMaya as om
+from typing import Dict, List, NamedTuple
+from .core import *
+
+"""
+Checks the active character's markers before building.
+
+The marker group is read once, then every limb is checked against its generator's required marker types
+and root attributes, the naming conventions and side consistency, collecting every error found.
+"""
+
+STYLE_ATTR = 'style'
+
+class Marker(NamedTuple):
+    name: str
+    path: str
+    type_: str
+    attributes: Dict[str, object]
+
+def markers(registered_generators: Dict[str, object]) -> List[str]:
+    """Returns a description of every problem with the active character's markers"""
+    snapshot = _snapshot(registered_generators)
+    errors = []
+    prefix = naming._initials + '_'
+    seen = dict()
+    roots = dict()
+    for marker in snapshot.values():
+        if marker.name in seen:
+            errors.append("Duplicate marker name: {0} ({1}, {2})".format(marker.name, seen[marker.name], marker.path))
+        seen[marker.name] = marker.path
+        if not marker.name.startswith(prefix) or naming.get_suffix(marker.name) != Suffix.marker:
+            errors.append("Marker doesn't follow the naming convention {0}[name]_{1}: {2}".format(prefix, Suffix.marker.value, marker.name))
+        for attr in (joints.JOINT_TYPE_ATTR, joints.BIND_ATTR, attributes.CONTROL_SCALE):
+            if attr not in marker.attributes:
+                errors.append("Marker is missing `{0}`: {1}".format(attr, marker.name))
+
+        has_generator = joints.GENERATOR_ATTRIBUTE in marker.attributes
+        has_symmetry = joints.SYMMETRY_ATTRIBUTE in marker.attributes
+        if has_generator and has_symmetry:
+            roots[marker.path] = marker
+        elif has_generator:
+            errors.append("Limb root is missing `{0}`: {1}".format(joints.SYMMETRY_ATTRIBUTE, marker.name))
+        elif has_symmetry:
+            errors.append("Limb root is missing `{0}`: {1}".format(joints.GENERATOR_ATTRIBUTE, marker.name))
+
+    limbs: Dict[str, List[Marker]] = {path: [] for path in roots}
+    for marker in snapshot.values():
+        root = _limb_root(marker.path, roots)
+        if root is None:
+            errors.append("Marker isn't part of any limb: " + marker.name)
+        else:
+            limbs[root].append(marker)
+
+    names = set(seen)
+    for path, root in roots.items():
+        errors.extend(_check_limb(root, limbs[path], registered_generators, snapshot, names))
+    return errors
+
+# Helper methods ---------------------------------------------------------------------------------
+
+def _check_limb(root: Marker, limb: List[Marker], registered_generators, snapshot: Dict[str, Marker], names) -> List[str]:
+    generator_name = root.attributes[joints.GENERATOR_ATTRIBUTE]
+    generator = registered_generators.get(generator_name)
+    if generator is None:
+        return ["Unknown limb type `{0}`: {1}".format(generator_name, root.name)]
+
+    errors = []
+    for attr in generator.required_attributes:
+        if attr not in root.attributes:
+            errors.append("{0} root is missing `{1}`: {2}".format(generator_name, attr, root.name))
+
+    required = list(generator.required_markers)
+    style = root.attributes.get(STYLE_ATTR)
+    if style is not None:
+        required.extend(getattr(generator, 'style_markers', dict()).get(int(style), []))
+    types = set(marker.attributes.get(joints.JOINT_TYPE_ATTR) for marker in limb)
+    for type_ in required:
+        if type_ not in types:
+            errors.append("{0} is missing a `{1}` marker: {2}".format(generator_name, type_, root.name))
+
+    if root.attributes[joints.SYMMETRY_ATTRIBUTE]:
+        # Mirroring covers everything below the root, including other limbs
+        below = [marker for marker in snapshot.values() if marker.path.startswith(root.path + '|')]
+        sides = set(naming.get_side(marker.name) for marker in [root] + below) - {Side.CENTER}
+        if len(sides) > 1:
+            errors.append("Both left and right sides under the mirrored joint: " + root.name)
+        flipped = naming.flip(root.name)
+        if flipped != root.name and flipped in names:
+            errors.append("Symmetrical limb already has markers on the other side: " + root.name)
+    return errors
+
+def _limb_root(path: str, roots: Dict[str, Marker]) -> str:
+    while path:
+        if path in roots:
+            return path
+        path = path[:path.rfind('|')]
+    return None
+
+def _snapshot(registered_generators) -> Dict[str, Marker]:
+    """Reads the marker attributes the checks need, in one pass over the marker group"""
+    paths = cmds.listRelatives(naming.marker_grp, ad=True, type='joint', fullPath=True) or []
+    string_attrs = [joints.JOINT_TYPE_ATTR, joints.GENERATOR_ATTRIBUTE]
+    other_attrs = set([joints.SYMMETRY_ATTRIBUTE, joints.BIND_ATTR, attributes.CONTROL_SCALE, STYLE_ATTR])
+    for generator in registered_generators.values():
+        other_attrs.update(generator.required_attributes)
+    other_attrs.difference_update(string_attrs)
+
+    sel = om.MSelectionList()
+    for path in paths:
+        sel.add(path)
+    ret = dict()
+    for i in range(sel.length()):
+        fn = om.MFnDependencyNode(sel.getDependNode(i))
+        values = dict()
+        for attr in string_attrs:
+            if fn.hasAttribute(attr):
+                values[attr] = fn.findPlug(attr, False).asString()
+        for attr in other_attrs:
+            if fn.hasAttribute(attr):
+                values[attr] = fn.findPlug(attr, False).asDouble()
+        path = sel.getDagPath(i).fullPathName()
+        ret[path] = Marker(fn.name(), path, values.get(joints.JOINT_TYPE_ATTR), values)
+    return ret